@@ -2,20 +2,45 @@
 An asynchronous library to communicate with Konstsmide Bluetooth string lights.
 """
 
-from .device import Device, connect
-from .exceptions import AioKonstmideError, DecodeError, DeviceNotFoundError, EncodeError
+from .device import Device, TimerSetting, connect
+from .exceptions import (
+    AdapterError,
+    AioKonstmideError,
+    DaemonError,
+    DecodeError,
+    DeviceNotFoundError,
+    EncodeError,
+    GroupError,
+    NotConnectedError,
+    QueueFullError,
+)
+from .fleet import Fleet
+from .group import DeviceGroup, FailurePolicy
 from .message import Function, Repeat
-from .scanner import check_address, find_devices
+from .pool import ConnectionPool
+from .scanner import PresenceScanner, check_address, find_devices, stream_devices
 
 __all__ = [
     "find_devices",
+    "stream_devices",
+    "PresenceScanner",
     "check_address",
     "connect",
     "Device",
+    "TimerSetting",
+    "DeviceGroup",
+    "FailurePolicy",
+    "ConnectionPool",
+    "Fleet",
     "Function",
     "Repeat",
     "AioKonstmideError",
     "DeviceNotFoundError",
     "EncodeError",
     "DecodeError",
+    "GroupError",
+    "NotConnectedError",
+    "QueueFullError",
+    "AdapterError",
+    "DaemonError",
 ]
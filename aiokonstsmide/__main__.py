@@ -0,0 +1,127 @@
+"""
+Command line interface to run the daemon and send commands to it,
+see `aiokonstsmide.daemon` and `python -m aiokonstsmide --help`.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import sys
+from typing import List, Optional
+
+from .daemon import DEFAULT_SOCKET, Daemon, request
+from .exceptions import DaemonError
+from .message import Function
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m aiokonstsmide",
+        description="Controls Konstsmide Bluetooth devices through a daemon "
+        "which keeps them connected.",
+    )
+    parser.add_argument(
+        "--socket", default=DEFAULT_SOCKET, help=f"default {DEFAULT_SOCKET}"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    daemon = commands.add_parser("daemon", help="run the daemon")
+    daemon.add_argument("--password", help="the default password of the devices")
+    daemon.add_argument("--adapter", help="the Bluetooth adapter to use, e.g. hci1")
+    daemon.add_argument(
+        "--max-connections",
+        type=int,
+        default=4,
+        help="maximum number of connected devices, default 4",
+    )
+    daemon.add_argument(
+        "--idle-timeout",
+        type=float,
+        help="disconnect devices unused for this many seconds",
+    )
+    daemon.add_argument("-v", "--verbose", action="store_true")
+
+    commands.add_parser("ping", help="check if the daemon is running")
+    commands.add_parser("stats", help="show the connection statistics")
+    for name, text in (
+        ("status", "show the status of a device"),
+        ("on", "turn on a device"),
+        ("off", "turn off a device"),
+        ("toggle", "toggle a device"),
+        ("sync-time", "synchronize the time of a device"),
+        ("disconnect", "disconnect a device"),
+    ):
+        command = commands.add_parser(name, help=text)
+        command.add_argument("address")
+        command.add_argument("--password")
+
+    control = commands.add_parser(
+        "control", help="set the function, brightness and flash speed of a device"
+    )
+    control.add_argument("address")
+    control.add_argument("--password")
+    control.add_argument(
+        "-f", "--function", choices=[f.name for f in Function if f != Function.Keep]
+    )
+    control.add_argument("-b", "--brightness", type=int, help="0 (dim) - 100 (bright)")
+    control.add_argument("-s", "--flash-speed", type=int, help="0 (slow) - 100 (fast)")
+
+    return parser.parse_args(argv)
+
+
+async def run_daemon(args: argparse.Namespace):
+    kwargs = {"adapter": args.adapter} if args.adapter else {}
+    daemon = Daemon(
+        args.socket,
+        args.max_connections,
+        args.idle_timeout,
+        args.password,
+        **kwargs,
+    )
+    async with daemon:
+        serving = asyncio.ensure_future(daemon.serve_forever())
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, serving.cancel)
+        try:
+            await serving
+        except asyncio.CancelledError:
+            pass
+
+
+async def run_client(args: argparse.Namespace):
+    params = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("socket", "command") and value is not None
+    }
+    result = await request(args.command.replace("-", "_"), args.socket, **params)
+    print(json.dumps(result, indent=2))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.command == "daemon":
+        logging.basicConfig(
+            level=logging.DEBUG if args.verbose else logging.INFO,
+            format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        )
+        try:
+            asyncio.run(run_daemon(args))
+        except DaemonError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        return 0
+
+    try:
+        asyncio.run(run_client(args))
+    except DaemonError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
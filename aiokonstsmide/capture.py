@@ -0,0 +1,188 @@
+"""
+Module for capturing the messages written to Konstsmide Bluetooth devices.
+
+A `Capture` keeps the most recent messages in memory. Pass it to one or more devices
+and dump it to a capture file when something went wrong:
+
+```python
+capture = Capture(size=4096)
+dev = aiokonstsmide.Device(address, capture=capture)
+...
+capture.dump("lights.kcap")
+
+for record in read_capture("lights.kcap"):
+    print(record.timestamp, record.address, record.frame)
+```
+
+A capture file starts with `FILE_HEADER`, followed by the records.
+Each record consists of `RECORD_HEADER` (timestamp, length of the address,
+plaintext and encoded message) followed by the address in ASCII,
+the plaintext and the encoded message.
+"""
+
+import os
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import BinaryIO, Deque, Iterable, Iterator, List, Union
+
+from . import message
+from .exceptions import DecodeError
+
+FILE_HEADER = b"KCAP\x01"
+"""Magic bytes and version at the start of a capture file."""
+
+RECORD_HEADER = struct.Struct("<dBBB")
+"""Timestamp, length of the address, plaintext and encoded message of a record."""
+
+PathOrFile = Union[str, os.PathLike, BinaryIO]
+
+
+@dataclass(frozen=True)
+class CaptureRecord:
+    """Dataclass to hold a captured message."""
+
+    timestamp: float
+    """The time the message was written, as returned by `time.monotonic`."""
+    address: str
+    """The address of the device."""
+    plaintext: bytes
+    """The plaintext message."""
+    encoded: bytes
+    """The encoded message as it was sent over the air."""
+
+    @property
+    def frame(self) -> message.Frame:
+        """The message parsed with `aiokonstsmide.message.parse`."""
+        return message.parse(self.plaintext)
+
+
+class Capture:
+    """
+    Ring buffer of the most recently written messages.
+    Once it's full, the oldest messages are overwritten.
+    """
+
+    def __init__(self, size: int = 1024):
+        """
+        Initializes a Capture instance.
+
+        :param size: The maximum number of messages kept
+        """
+        if size < 1:
+            raise ValueError(f"Size must be at least 1, got {size}")
+
+        self.__records: Deque[CaptureRecord] = deque(maxlen=size)
+        self.overwritten = 0
+        """The number of messages which were overwritten because the buffer was full."""
+
+    def __len__(self) -> int:
+        return len(self.__records)
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        return iter(list(self.__records))
+
+    @property
+    def records(self) -> List[CaptureRecord]:
+        """The captured messages, oldest first."""
+        return list(self.__records)
+
+    def record(self, address: str, plaintext: bytes, encoded: bytes):
+        """
+        Captures a message, this is called by the devices.
+
+        :param address: The address of the device
+        :param plaintext: The plaintext message
+        :param encoded: The encoded message
+        """
+        if len(self.__records) == self.__records.maxlen:
+            self.overwritten += 1
+        self.__records.append(
+            CaptureRecord(time.monotonic(), address, bytes(plaintext), bytes(encoded))
+        )
+
+    def clear(self):
+        """Removes all captured messages."""
+        self.__records.clear()
+        self.overwritten = 0
+
+    def dump(self, file: PathOrFile) -> int:
+        """
+        Writes the captured messages to a capture file.
+
+        :param file: A path or a file opened in binary mode
+
+        :return: The number of messages written
+        """
+        return write_capture(file, self.records)
+
+
+def write_capture(file: PathOrFile, records: Iterable[CaptureRecord]) -> int:
+    """
+    Writes messages to a capture file.
+
+    :param file: A path or a file opened in binary mode
+    :param records: The messages
+
+    :return: The number of messages written
+    """
+    if not hasattr(file, "write"):
+        with open(file, "wb") as f:
+            return write_capture(f, records)
+
+    file.write(FILE_HEADER)
+    count = 0
+    for record in records:
+        address = record.address.encode("ascii")
+        file.write(
+            RECORD_HEADER.pack(
+                record.timestamp,
+                len(address),
+                len(record.plaintext),
+                len(record.encoded),
+            )
+        )
+        file.write(address)
+        file.write(record.plaintext)
+        file.write(record.encoded)
+        count += 1
+    return count
+
+
+def read_capture(file: PathOrFile) -> Iterator[CaptureRecord]:
+    """
+    Reads the messages of a capture file one by one,
+    so large files don't have to be loaded completely.
+
+    :param file: A path or a file opened in binary mode
+
+    :return: An iterator over the messages
+    """
+    if not hasattr(file, "read"):
+        with open(file, "rb") as f:
+            yield from read_capture(f)
+        return
+
+    if file.read(len(FILE_HEADER)) != FILE_HEADER:
+        raise DecodeError("Not a capture file or unsupported version.")
+
+    while True:
+        header = file.read(RECORD_HEADER.size)
+        if not header:
+            return
+        if len(header) < RECORD_HEADER.size:
+            raise DecodeError("Incomplete record at the end of the capture file.")
+        timestamp, address_len, plaintext_len, encoded_len = RECORD_HEADER.unpack(
+            header
+        )
+        encoded_start = address_len + plaintext_len
+        body = file.read(encoded_start + encoded_len)
+        if len(body) < encoded_start + encoded_len:
+            raise DecodeError("Incomplete record at the end of the capture file.")
+        yield CaptureRecord(
+            timestamp,
+            body[:address_len].decode("ascii"),
+            body[address_len:encoded_start],
+            body[encoded_start:],
+        )
@@ -2,50 +2,99 @@
 Communication with the device is encoded using a simple XOR algorithm.
 """
 
-from random import randint
-from typing import List, Union
+from random import getrandbits
+from typing import Iterable, List, Optional, Union
 
 from .exceptions import DecodeError, EncodeError
 
+MAGIC_BYTE = 0x54
 
-def encode(data: Union[List[int], bytes]) -> bytes:
-    """Encodes a plaintext message to be sent to the device."""
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Translation tables to XOR a whole message with a key in one call
+_XOR_TABLES = [bytes(x ^ key for x in range(256)) for key in range(256)]
+
+
+def encode(data: Union[List[int], Buffer], key: Optional[int] = None) -> bytes:
+    """
+    Encodes a plaintext message to be sent to the device.
+
+    :param data: The plaintext message
+    :param key: The key in the range 0 - 255 or `None` for a random key,
+        a fixed key always results in the same encoded message which allows caching it
+
+    :return: The encoded message
+    """
     if not data or len(data) == 0:
         raise EncodeError(
             "Invalid length, message to encode must be at least 1 byte long"
         )
+    if key is None:
+        key = getrandbits(8)
+    elif not (0 <= key <= 255):
+        raise EncodeError(f"Key must be between 0 and 255, got {key}")
 
-    magic_byte = 0x54
-    length = (len(data) + 1) ^ magic_byte
-    key = randint(0, 255)
-    enc = [magic_byte, length, key ^ magic_byte]
-
-    for x in data:
-        enc.append(x ^ key)
+    header = bytes((MAGIC_BYTE, (len(data) + 1) ^ MAGIC_BYTE, key ^ MAGIC_BYTE))
+    return header + _translate(data, _XOR_TABLES[key])
 
-    return bytes(enc)
 
-
-def decode(data: Union[List[int], bytes]) -> bytes:
+def decode(data: Union[List[int], Buffer]) -> bytes:
     """Decodes an encoded message from the device."""
     if not data or len(data) < 4:
         raise DecodeError(
             "Invalid length, message to decode must be at least 4 bytes long."
         )
 
-    if data[0] != 0x54:
+    if data[0] != MAGIC_BYTE:
         raise DecodeError("Invalid magic byte in encoded message.")
 
-    dec_len = data[1] ^ data[0]
+    dec_len = data[1] ^ MAGIC_BYTE
     if len(data) != dec_len + 2:
         raise DecodeError(
-            f"Invalid length of encoded message, expected {dec_len + 3} bytes, but found {len(data)} bytes."
+            f"Invalid length of encoded message, expected {dec_len + 2} bytes, but found {len(data)} bytes."
         )
 
-    dec = []
-    key = data[2] ^ data[0]
+    key = data[2] ^ MAGIC_BYTE
+    return _translate(data[3:], _XOR_TABLES[key])
+
+
+def encode_many(
+    frames: Iterable[Union[List[int], Buffer]], key: Optional[int] = None
+) -> bytes:
+    """
+    Encodes multiple plaintext messages into one buffer of concatenated encoded messages.
+
+    :param frames: The plaintext messages
+    :param key: The key used for all messages, see `encode`
+
+    :return: The encoded messages
+    """
+    return b"".join(encode(frame, key) for frame in frames)
+
+
+def decode_many(data: Buffer) -> List[bytes]:
+    """
+    Decodes a buffer of concatenated encoded messages.
+
+    :param data: The encoded messages
+
+    :return: The plaintext messages
+    """
+    view = memoryview(data)
+    frames = []
+    pos = 0
+    while pos < len(view):
+        if len(view) - pos < 2:
+            raise DecodeError("Incomplete encoded message at the end of the buffer.")
+        end = pos + (view[pos + 1] ^ MAGIC_BYTE) + 2
+        if end > len(view):
+            raise DecodeError("Incomplete encoded message at the end of the buffer.")
+        frames.append(decode(view[pos:end]))
+        pos = end
+    return frames
 
-    for x in data[3:]:
-        dec.append(x ^ key)
 
-    return bytes(dec)
+def _translate(data: Union[List[int], Buffer], table: bytes) -> bytes:
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data.translate(table))
+    return bytes(data).translate(table)
@@ -0,0 +1,281 @@
+"""Module for queueing the commands written to a Konstsmide Bluetooth device by priority."""
+
+import asyncio
+import heapq
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from typing import Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from . import message
+from .exceptions import QueueFullError
+
+
+class Priority(Enum):
+    """The priority of a command, commands with a lower value are written first."""
+
+    Interactive = 1
+    """On/off and password commands, which users expect to take effect immediately."""
+    Control = 2
+    """Control commands."""
+    Maintenance = 3
+    """Timer, RTC and set password commands."""
+    Background = 4
+    """Commands which can wait for everything else, e.g. periodic time synchronization."""
+
+
+class OverflowPolicy(Enum):
+    """Defines what happens when a command is submitted to a full queue."""
+
+    Block = 1
+    """Wait until there is room in the queue."""
+    Reject = 2
+    """Raise a `aiokonstsmide.exceptions.QueueFullError`."""
+    DropLowest = 3
+    """Drop the oldest command with the lowest priority, unless the new command has
+    a lower priority, which is rejected then. The dropped command raises a
+    `aiokonstsmide.exceptions.QueueFullError`."""
+
+
+PRIORITIES = {
+    message.Command.OnOff.value: Priority.Interactive,
+    message.Command.PasswordInput.value: Priority.Interactive,
+    message.Command.Control.value: Priority.Control,
+    message.Command.Timer.value: Priority.Maintenance,
+    message.Command.Rtc.value: Priority.Maintenance,
+    message.Command.SetPassword.value: Priority.Maintenance,
+}
+"""The default priority of each command."""
+
+# Commands which change the same state keep their order, regardless of their priority
+_STATUS_COMMANDS = {message.Command.OnOff.value, message.Command.Control.value}
+
+
+@dataclass
+class QueueStats:
+    """Dataclass to hold the statistics of a command queue."""
+
+    submitted: int = 0
+    """Number of commands submitted."""
+    written: int = 0
+    """Number of commands written."""
+    superseded: int = 0
+    """Number of queued commands which were replaced by a newer command of the same kind."""
+    dropped: int = 0
+    """Number of queued commands dropped because the queue was full."""
+    rejected: int = 0
+    """Number of commands rejected because the queue was full."""
+    max_depth: int = 0
+    """Maximum number of commands queued at the same time."""
+    total_wait: float = 0.0
+    """Sum of the time in seconds commands waited in the queue before being written."""
+    max_wait: float = 0.0
+    """Maximum time in seconds a command waited in the queue before being written."""
+
+    @property
+    def avg_wait(self) -> float:
+        """Average time in seconds commands waited in the queue before being written."""
+        return self.total_wait / self.written if self.written else 0.0
+
+
+@dataclass(eq=False)
+class _Entry:
+    priority: int
+    seq: int
+    slot: Optional[Hashable]
+    status: bool
+    write: Callable[[], Awaitable[bool]]
+    future: asyncio.Future
+    queued: float = field(default_factory=time.monotonic)
+    removed: bool = False
+
+    def __lt__(self, other: "_Entry") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class CommandQueue:
+    """
+    Queue which writes the commands of a device one at a time by priority.
+
+    A queued command is superseded by a newer command of the same kind, e.g. a newer
+    control command or the same timer, since only the latest one matters. The
+    superseded command isn't written and `submit` returns `False` for it.
+    On/off and control commands keep their order, so turning off the device can't
+    be overtaken by an earlier control command, which would turn it on again.
+
+    Each device needs its own queue.
+    """
+
+    def __init__(
+        self, max_depth: int = 64, overflow: OverflowPolicy = OverflowPolicy.Block
+    ):
+        """
+        Initializes a CommandQueue instance.
+
+        :param max_depth: The maximum number of queued commands
+        :param overflow: What happens when a command is submitted to a full queue
+        """
+        if max_depth < 1:
+            raise ValueError(f"Max depth must be at least 1, got {max_depth}")
+
+        self.__max_depth = max_depth
+        self.__overflow = overflow
+        self.__heap: List[_Entry] = []
+        self.__slots: Dict[Hashable, _Entry] = {}
+        self.__status: List[_Entry] = []
+        self.__depth = 0
+        self.__seq = 0
+        self.__space: Deque[asyncio.Future] = deque()
+        self.__worker: Optional[asyncio.Task] = None
+        self.__stats = QueueStats()
+
+    @property
+    def depth(self) -> int:
+        """The number of queued commands."""
+        return self.__depth
+
+    def depth_by_priority(self) -> Dict[Priority, int]:
+        """Returns the number of queued commands per priority."""
+        depths = {priority: 0 for priority in Priority}
+        for entry in self.__heap:
+            if not entry.removed:
+                depths[Priority(entry.priority)] += 1
+        return depths
+
+    @property
+    def stats(self) -> QueueStats:
+        """A snapshot of the queue statistics."""
+        return replace(self.__stats)
+
+    async def submit(
+        self,
+        data: bytes,
+        write: Callable[[], Awaitable[bool]],
+        priority: Optional[Priority] = None,
+    ) -> bool:
+        """
+        Queues a command and waits until it was written.
+
+        :param data: The plaintext message of the command
+        :param write: Writes the command, returns `True` if it was written
+        :param priority: The priority, defaults to the priority of the command in `PRIORITIES`
+
+        :return: The result of `write` or `False` if the command was superseded
+        """
+        command = data[1]
+        priority = priority or PRIORITIES.get(command, Priority.Background)
+        if command == message.Command.Timer.value:
+            slot: Optional[Hashable] = (command, data[2])
+        elif command == message.Command.PasswordInput.value:
+            slot = None
+        else:
+            slot = command
+        self.__stats.submitted += 1
+
+        while True:
+            if slot is not None and slot in self.__slots:
+                superseded = self.__slots[slot]
+                self.__remove(superseded)
+                superseded.future.set_result(False)
+                self.__stats.superseded += 1
+            if self.__depth < self.__max_depth:
+                break
+            await self.__overflow_handler(priority)
+
+        value = priority.value
+        status = command in _STATUS_COMMANDS
+        if status and self.__status:
+            value = max(value, max(entry.priority for entry in self.__status))
+        self.__seq += 1
+        entry = _Entry(
+            value,
+            self.__seq,
+            slot,
+            status,
+            write,
+            asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self.__heap, entry)
+        if slot is not None:
+            self.__slots[slot] = entry
+        if status:
+            self.__status.append(entry)
+        self.__depth += 1
+        self.__stats.max_depth = max(self.__stats.max_depth, self.__depth)
+
+        if not self.__worker or self.__worker.done():
+            self.__worker = asyncio.create_task(self.__run())
+
+        try:
+            return await entry.future
+        except asyncio.CancelledError:
+            self.__remove(entry)
+            raise
+
+    async def __overflow_handler(self, priority: Priority):
+        """Makes room for a command of the given priority or raises if that's not possible."""
+        if self.__overflow == OverflowPolicy.Block:
+            waiter = asyncio.get_running_loop().create_future()
+            self.__space.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self.__space:
+                    self.__space.remove(waiter)
+            return
+
+        if self.__overflow == OverflowPolicy.DropLowest:
+            victim = min(
+                (entry for entry in self.__heap if not entry.removed),
+                key=lambda entry: (-entry.priority, entry.seq),
+            )
+            if victim.priority >= priority.value:
+                self.__remove(victim)
+                victim.future.set_exception(
+                    QueueFullError("Command was dropped, the queue is full")
+                )
+                self.__stats.dropped += 1
+                return
+
+        self.__stats.rejected += 1
+        raise QueueFullError("Command was rejected, the queue is full")
+
+    def __remove(self, entry: _Entry):
+        """Removes a queued entry, it's skipped once it's popped from the heap."""
+        if entry.removed:
+            return
+        entry.removed = True
+        self.__depth -= 1
+        if entry.slot is not None and self.__slots.get(entry.slot) is entry:
+            del self.__slots[entry.slot]
+        if entry.status:
+            self.__status.remove(entry)
+        while self.__space:
+            waiter = self.__space.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    async def __run(self):
+        """Writes the queued commands until the queue is empty."""
+        while self.__heap:
+            entry = heapq.heappop(self.__heap)
+            if entry.removed:
+                continue
+            self.__remove(entry)
+            if entry.future.done():
+                continue
+
+            wait = time.monotonic() - entry.queued
+            self.__stats.total_wait += wait
+            self.__stats.max_wait = max(self.__stats.max_wait, wait)
+            try:
+                result = await entry.write()
+            except Exception as exc:
+                if not entry.future.done():
+                    entry.future.set_exception(exc)
+            else:
+                self.__stats.written += 1
+                if not entry.future.done():
+                    entry.future.set_result(result)
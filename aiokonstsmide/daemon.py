@@ -0,0 +1,320 @@
+"""
+Module for a long-running daemon which keeps Konstsmide Bluetooth devices connected.
+
+Scanning, connecting and authenticating takes several seconds, which dominates short
+scripts that only switch a device. The daemon keeps the devices connected and accepts
+commands over a Unix domain socket, so a command only takes as long as the write.
+
+Start the daemon with `python -m aiokonstsmide daemon` and send commands with
+`python -m aiokonstsmide on <address>` or from Python:
+
+```python
+status = await request("control", address=address, function="Twinkle", brightness=50)
+```
+
+The protocol is line-delimited JSON. Each request is an object with a `command`, an optional
+`id` and the parameters of the command, e.g. `{"id": 1, "command": "off", "address": "..."}`.
+Each response echoes the `id` and contains either `"ok": true` and the `result`
+or `"ok": false` and the `error`. Requests on the same connection are handled
+concurrently, so responses might arrive out of order.
+
+| Command     | Parameters                                          | Result                  |
+|-------------|-----------------------------------------------------|-------------------------|
+| `ping`      |                                                     | `"pong"`                |
+| `stats`     |                                                     | The pool statistics     |
+| `status`    | `address`                                           | The status of the device |
+| `on`        | `address`                                           | The status of the device |
+| `off`       | `address`                                           | The status of the device |
+| `toggle`    | `address`                                           | The status of the device |
+| `control`   | `address`, `function`, `brightness`, `flash_speed`  | The status of the device |
+| `sync_time` | `address`                                           | The status of the device |
+| `disconnect`| `address`                                           | `true` if disconnected  |
+
+All device commands accept an optional `password`.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+from dataclasses import asdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from . import message
+from .device import Device
+from .exceptions import DaemonError
+from .pool import ConnectionPool
+
+DEFAULT_SOCKET = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "aiokonstsmide.sock"
+)
+"""The default path of the socket, in the runtime directory of the user if there is one."""
+
+DEVICE_COMMANDS: Dict[
+    str, Optional[Callable[[Device, Dict[str, Any]], Awaitable[None]]]
+] = {
+    "status": None,
+    "on": lambda dev, params: dev.on(),
+    "off": lambda dev, params: dev.off(),
+    "toggle": lambda dev, params: dev.toggle(),
+    "control": lambda dev, params: dev.control(
+        message.Function[params["function"]] if params.get("function") else None,
+        params.get("brightness"),
+        params.get("flash_speed"),
+    ),
+    "sync_time": lambda dev, params: dev.sync_time(),
+}
+"""The commands which are executed on a device, see the module documentation."""
+
+
+class Daemon:
+    """
+    Serves commands for Konstsmide Bluetooth devices on a Unix domain socket.
+
+    The devices are connected on first use and kept connected in a
+    `aiokonstsmide.pool.ConnectionPool`. By default, the devices coalesce writes,
+    so concurrent requests for the same device are batched into a single write
+    of the latest status.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_SOCKET,
+        max_connections: int = 4,
+        idle_timeout: Optional[float] = None,
+        password: Optional[str] = None,
+        timeout: float = 5.0,
+        **kwargs,
+    ):
+        """
+        Initializes a Daemon instance.
+
+        :param path: The path of the socket
+        :param max_connections: The maximum number of simultaneously connected devices
+        :param idle_timeout: Time in seconds after which an unused device is disconnected
+            or `None` to keep devices connected until room is needed
+        :param password: The default password of the devices
+        :param timeout: The timeout in seconds for connecting a device
+        :param kwargs: Further arguments passed to `aiokonstsmide.device.Device`
+        """
+        kwargs.setdefault("coalesce", True)
+        self.__logger = logging.getLogger(__name__)
+        self.__path = path
+        self.__timeout = timeout
+        self.__pool = ConnectionPool(max_connections, idle_timeout, password, **kwargs)
+        self.__server: Optional[asyncio.AbstractServer] = None
+        self.__handlers: Set[asyncio.Task] = set()
+
+    @property
+    def path(self) -> str:
+        """The path of the socket."""
+        return self.__path
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """The pool holding the connected devices."""
+        return self.__pool
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, _exc_type, _exc_val, _exc_tb):
+        await self.close()
+
+    async def start(self):
+        """Starts listening on the socket."""
+        if os.path.exists(self.__path):
+            try:
+                _, writer = await asyncio.open_unix_connection(self.__path)
+            except OSError:
+                # Left behind by a daemon which didn't exit cleanly
+                os.unlink(self.__path)
+            else:
+                await _close(writer)
+                raise DaemonError(f"Another daemon is listening on {self.__path}")
+
+        self.__server = await asyncio.start_unix_server(
+            self.__handle, sock=_bind(self.__path)
+        )
+        self.__logger.info(f"Listening on {self.__path}")
+
+    async def serve_forever(self):
+        """Starts listening on the socket if needed and serves until cancelled."""
+        if not self.__server:
+            await self.start()
+        await self.__server.serve_forever()
+
+    async def close(self):
+        """Stops listening and disconnects all devices."""
+        if self.__server:
+            self.__server.close()
+            # Closing the server doesn't close the client connections
+            for handler in self.__handlers:
+                handler.cancel()
+            await asyncio.gather(*self.__handlers, return_exceptions=True)
+            await self.__server.wait_closed()
+            self.__server = None
+            try:
+                os.unlink(self.__path)
+            except FileNotFoundError:
+                pass
+        await self.__pool.close()
+
+    async def execute(self, request: Dict[str, Any]) -> Any:
+        """
+        Executes a single request, see the module documentation for the commands.
+
+        :param request: The request
+
+        :return: The result of the command
+        """
+        command = request.get("command")
+        if command == "ping":
+            return "pong"
+        if command == "stats":
+            return asdict(self.__pool.stats)
+
+        address = request.get("address")
+        if not isinstance(address, str):
+            raise ValueError("Missing address")
+        address = address.upper()
+        if command == "disconnect":
+            return await self.__pool.evict(address)
+
+        if command not in DEVICE_COMMANDS:
+            raise ValueError(f"Unknown command {command!r}")
+        operation = DEVICE_COMMANDS[command]
+        async with self.__pool.device(
+            address, request.get("password"), self.__timeout
+        ) as dev:
+            if operation is not None:
+                await operation(dev, request)
+            return _status(dev)
+
+    async def __handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Handles the requests of a client connection concurrently."""
+        handler = asyncio.current_task()
+        self.__handlers.add(handler)
+        tasks: Set[asyncio.Task] = set()
+        # Concurrent drains of the same writer fail on Python < 3.10
+        lock = asyncio.Lock()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.create_task(self.__respond(line, writer, lock))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            # Answer the pending requests before closing the connection
+            await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as exc:
+            self.__logger.debug(f"Client connection failed: {exc!r}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+            self.__handlers.discard(handler)
+
+    async def __respond(
+        self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock
+    ):
+        """Executes a request and writes the response."""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            request_id = request.get("id")
+            response = {
+                "id": request_id,
+                "ok": True,
+                "result": await self.execute(request),
+            }
+        except Exception as exc:
+            self.__logger.debug(f"Request failed: {exc!r}")
+            response = {"id": request_id, "ok": False, "error": _describe(exc)}
+
+        async with lock:
+            if not writer.is_closing():
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+
+async def request(command: str, path: str = DEFAULT_SOCKET, **params) -> Any:
+    """
+    Sends a single request to a running daemon.
+
+    :param command: The command, see the module documentation
+    :param path: The path of the socket of the daemon
+    :param params: The parameters of the command
+
+    :return: The result of the command
+    """
+    try:
+        reader, writer = await asyncio.open_unix_connection(path)
+    except OSError as exc:
+        raise DaemonError(f"No daemon is listening on {path}") from exc
+    try:
+        writer.write(
+            json.dumps({"id": 1, "command": command, **params}).encode() + b"\n"
+        )
+        await writer.drain()
+        line = await reader.readline()
+    finally:
+        await _close(writer)
+
+    if not line:
+        raise DaemonError("The daemon closed the connection")
+    response = json.loads(line)
+    if not response.get("ok"):
+        raise DaemonError(response.get("error", "Unknown error"))
+    return response.get("result")
+
+
+def _bind(path: str) -> socket.socket:
+    """Binds a socket which only the user running the daemon may connect to."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Restricted while binding, so there's no time in which others can connect
+    umask = os.umask(0o177)
+    try:
+        sock.bind(path)
+    except BaseException:
+        sock.close()
+        raise
+    finally:
+        os.umask(umask)
+    return sock
+
+
+async def _close(writer: asyncio.StreamWriter):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+
+def _status(dev: Device) -> Dict[str, Any]:
+    return {
+        "address": dev.address,
+        "connected": dev.is_connected,
+        "on": dev.is_on,
+        "function": dev.function.name,
+        "brightness": dev.brightness,
+        "flash_speed": dev.flash_speed,
+    }
+
+
+def _describe(exc: BaseException) -> str:
+    if isinstance(exc, KeyError):
+        # Unknown function names
+        return f"Invalid value {exc}"
+    text = str(exc)
+    return f"{type(exc).__name__}: {text}" if text else type(exc).__name__
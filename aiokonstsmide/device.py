@@ -2,27 +2,67 @@
 
 import asyncio
 import logging
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, replace
 from datetime import datetime
-from typing import List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
 
 from bleak import BleakClient
+from bleak.backends.device import BLEDevice
 
 from . import codec, message
+from .capture import Capture
+from .commands import CommandQueue, Priority
 from .exceptions import DeviceNotFoundError
-from .scanner import check_address
+from .metrics import DeviceMetrics, Metric
+from .pacer import Pacer
+from .reconnect import ReconnectState, ReconnectSupervisor, default_supervisor
+from .scanner import adapter_kwargs, find_device, on_adapter, scan_cache
+from .store import DeviceState, StateStore
 
 CHARACTERISTIC = "00001001-0000-1000-8000-00805f9b34fb"
 
+ACKNOWLEDGED_COMMANDS = {
+    message.Command.PasswordInput,
+    message.Command.SetPassword,
+    message.Command.Timer,
+    message.Command.Rtc,
+}
+"""Commands which are written with response in write without response mode,
+so the device acknowledges them and a lost write raises instead of going unnoticed."""
+
+_PERSISTED_COMMANDS = {
+    message.Command.OnOff.value,
+    message.Command.Control.value,
+    message.Command.Rtc.value,
+}
+
+RTC_JUMP_TOLERANCE = 2.0
+"""Difference in seconds between the elapsed wall clock and monotonic time, which is considered a clock jump."""
+
 
 async def connect(
-    address: str,
+    address: Union[str, BLEDevice],
     password: Optional[str] = None,
     on: bool = True,
     function: message.Function = message.Function.Steady,
     brightness: int = 100,
     flash_speed: int = 50,
     timeout: float = 5.0,
+    *,
+    coalesce: bool = False,
+    max_rate: Optional[float] = None,
+    suppress_noop: bool = False,
+    supervisor: Optional[ReconnectSupervisor] = None,
+    write_without_response: bool = False,
+    pacer: Optional[Pacer] = None,
+    rtc_interval: Optional[float] = None,
+    rtc_resync: Optional[float] = None,
+    client_factory: Optional[Callable[..., BleakClient]] = None,
+    capture: Optional[Capture] = None,
+    store: Optional[StateStore] = None,
+    queue: Optional[CommandQueue] = None,
+    adapter: Optional[str] = None,
 ) -> "Device":
     """
     Connects to the device with the given address.
@@ -31,17 +71,50 @@ async def connect(
     otherwise it will not be possible to connect to the device anymore
     unless the power is cut.
 
-    :param address: The address of the device to connect to
+    :param address: The address of the device to connect to or an already discovered device
     :param password: The password of the device
     :param on: If the device should be turned on or off after connecting
     :param function: The function to set after connecting
     :param brightness: The brightness to set after connecting, in the range 0 (dim) - 100 (bright)
     :param flash_speed: The flash speed to set after connecting, in the range 0 (slow) - 100 (fast)
     :param timeout: Timeout in seconds
+    :param coalesce: If pending on/off and control commands should be coalesced, see `Device`
+    :param max_rate: The maximum number of coalesced writes per second or `None` for no limit
+    :param suppress_noop: If writes which don't change the status should be skipped, see `Device`
+    :param supervisor: The supervisor which reconnects the device after the connection was lost
+    :param write_without_response: If the write type should be chosen per message, see `Device`
+    :param pacer: The pacer for writes without response
+    :param rtc_interval: Minimum time in seconds between time synchronizations, see `Device`
+    :param rtc_resync: Interval in seconds to synchronize the time in the background
+    :param client_factory: Creates the client instead of `BleakClient`, see `Device`
+    :param capture: Captures the written messages, see `aiokonstsmide.capture`
+    :param store: Persists the state of the device, see `Device`
+    :param queue: Writes the commands one at a time by priority, see `Device`
+    :param adapter: The Bluetooth adapter to connect with, e.g. `hci1`, or `None` for the default adapter
 
     :return: A Device instance connected to the device with the given address
     """
-    device = Device(address, password, on, function, brightness, flash_speed)
+    device = Device(
+        address,
+        password,
+        on,
+        function,
+        brightness,
+        flash_speed,
+        coalesce=coalesce,
+        max_rate=max_rate,
+        suppress_noop=suppress_noop,
+        supervisor=supervisor,
+        write_without_response=write_without_response,
+        pacer=pacer,
+        rtc_interval=rtc_interval,
+        rtc_resync=rtc_resync,
+        client_factory=client_factory,
+        capture=capture,
+        store=store,
+        queue=queue,
+        adapter=adapter,
+    )
     await device.connect(timeout)
     return device
 
@@ -56,6 +129,37 @@ class Status:
     flash_speed: int
 
 
+def status_fields(frame: message.Frame) -> Dict[str, Any]:
+    """
+    Returns the `Status` fields changed by the given frame,
+    to pass them to `Device._send` along with the frame.
+
+    :param frame: The frame
+    """
+    if isinstance(frame, message.OnOff):
+        return {"on": frame.on}
+    if isinstance(frame, message.Control):
+        return {
+            "on": True,
+            "function": frame.function,
+            "brightness": frame.brightness,
+            "flash_speed": frame.flash_speed,
+        }
+    return {}
+
+
+@dataclass
+class TimerSetting:
+    """Dataclass to hold the setting of a timer, see `Device.timer` for a description of the fields."""
+
+    turn_on: bool
+    hour: int
+    minute: int
+    function: message.Function = message.Function.Keep
+    repeat: Union[message.Repeat, List[message.Repeat]] = message.Repeat.Everyday
+    active: bool = True
+
+
 class Device:
     """
     Represents a Konstsmide Bluetooth device.
@@ -63,29 +167,130 @@ class Device:
 
     def __init__(
         self,
-        address: str,
+        address: Union[str, BLEDevice],
         password: Optional[str] = None,
         on: bool = True,
         function: message.Function = message.Function.Steady,
         brightness: int = 100,
         flash_speed: int = 50,
+        *,
+        coalesce: bool = False,
+        max_rate: Optional[float] = None,
+        suppress_noop: bool = False,
+        supervisor: Optional[ReconnectSupervisor] = None,
+        write_without_response: bool = False,
+        pacer: Optional[Pacer] = None,
+        rtc_interval: Optional[float] = None,
+        rtc_resync: Optional[float] = None,
+        client_factory: Optional[Callable[..., BleakClient]] = None,
+        capture: Optional[Capture] = None,
+        store: Optional[StateStore] = None,
+        queue: Optional[CommandQueue] = None,
+        adapter: Optional[str] = None,
     ):
         """
         Initializes a Device instance.
 
-        :param address: The address of the device to connect to
+        If coalescing is enabled, on/off and control commands which are issued while
+        a write is pending are collapsed, only the latest desired status is sent
+        once the device is ready. This keeps the device responsive if it's controlled
+        faster than it can be written to, e.g. by a brightness slider.
+
+        If no-op suppression is enabled, on/off and control commands which wouldn't
+        change the status are not sent, unless `force` is given. Since the status
+        can't be read from the device, this relies on the status which was last
+        synchronized when connecting.
+
+        By default, all messages are written with the default write type of bleak,
+        which is without response for the supported bleak version, so no write is
+        acknowledged by the device. If write without response is enabled, the write
+        type is chosen explicitly per message: the password, timer and RTC messages
+        are written with response, so a lost write raises instead of going unnoticed,
+        see `ACKNOWLEDGED_COMMANDS`. All other messages are written without response
+        and paced to not overrun the Bluetooth controller, e.g. for animations
+        or fast toggles.
+
+        If an RTC interval is given, the time is only synchronized when connecting or
+        changing timers if the interval has passed since the last synchronization,
+        or if the host clock jumped in the meantime. After the connection was lost
+        unexpectedly, the time is always synchronized again, since the device might
+        have lost power.
+
+        If a state store is given, the status, programmed timers and last time
+        synchronization are persisted, see `aiokonstsmide.store`. When connecting
+        for the first time, the status isn't synchronized if the stored status
+        equals the desired one and `set_timers` only writes timers which differ
+        from the stored ones.
+
+        If a command queue is given, the commands are written one at a time by
+        priority, so e.g. turning off the device doesn't wait for timers being
+        programmed, and queued commands are superseded by newer ones of the same
+        kind, see `aiokonstsmide.commands.CommandQueue`.
+
+        :param address: The address of the device to connect to or an already discovered device
         :param password: The password of the device
         :param on: If the device should be turned on or off after connecting
         :param function: The function to set after connecting
         :param brightness: The brightness to set after connecting, in the range 0 (dim) - 100 (bright)
         :param flash_speed: The flash speed to set after connecting, in the range 0 (slow) - 100 (fast)
+        :param coalesce: If pending on/off and control commands should be coalesced
+        :param max_rate: The maximum number of coalesced writes per second or `None` for no limit
+        :param suppress_noop: If writes which don't change the status should be skipped
+        :param supervisor: The supervisor which reconnects the device after the connection was lost,
+            defaults to `aiokonstsmide.reconnect.default_supervisor` which is shared by all devices
+        :param write_without_response: If the password, timer and RTC messages should be written
+            with response and all other messages paced without response
+        :param pacer: The pacer for writes without response, defaults to `aiokonstsmide.pacer.Pacer()`
+        :param rtc_interval: Minimum time in seconds between time synchronizations or `None` to always synchronize
+        :param rtc_resync: Interval in seconds to synchronize the time in the background while connected
+        :param client_factory: Creates the client instead of `BleakClient`, called with the same arguments,
+            e.g. `aiokonstsmide.simulator.SimulatedAdapter.client` to use simulated devices
+        :param capture: Captures the written messages, see `aiokonstsmide.capture`
+        :param store: Persists the state of the device, e.g. a `aiokonstsmide.store.FileStateStore`
+        :param queue: Writes the commands one at a time by priority, each device needs its own queue
+        :param adapter: The Bluetooth adapter to connect with, e.g. `hci1`, or `None` for the default adapter
         """
+        if rtc_resync is not None and rtc_resync <= 0:
+            raise ValueError(f"RTC resync must be greater than 0, got {rtc_resync}")
+
+        if max_rate is not None and max_rate <= 0:
+            raise ValueError(f"Max rate must be greater than 0, got {max_rate}")
+
+        if isinstance(address, BLEDevice):
+            self.__ble_device: Optional[BLEDevice] = address
+            address = address.address
+        else:
+            self.__ble_device = None
         self.__logger = logging.getLogger(f"{__package__}({address})")
         self.__address = address
         self.__password = password or "123456"
         self.__status = Status(on, function, brightness, flash_speed)
         self.__client: BleakClient = None
+        self.__scanned = False
         self.__reconnect = True
+        self.__coalesce = coalesce
+        self.__min_interval = 1 / max_rate if max_rate else 0.0
+        self.__dirty: Set[message.Command] = set()
+        self.__waiters: List[asyncio.Future] = []
+        self.__flusher: Optional[asyncio.Task] = None
+        self.__last_flush = 0.0
+        self.__suppress_noop = suppress_noop
+        self.__synced = False
+        self.__supervisor = supervisor or default_supervisor
+        self.__write_without_response = write_without_response
+        self.__pacer = pacer or Pacer()
+        self.__timers: List[Optional[message.Timer]] = [None] * 8
+        self.__rtc_interval = rtc_interval
+        self.__rtc_resync = rtc_resync
+        self.__rtc_synced: Optional[Tuple[float, float]] = None
+        self.__rtc_task: Optional[asyncio.Task] = None
+        self.__client_factory = client_factory or BleakClient
+        self.__metrics = DeviceMetrics(address)
+        self.__capture = capture
+        self.__store = store
+        self.__restored = False
+        self.__queue = queue
+        self.__adapter = adapter
 
     async def connect(self, timeout: float = 5.0):
         """
@@ -94,33 +299,128 @@ class Device:
         :param timeout: The timeout in seconds
         """
         if not self.__client:
-            if not await check_address(self.__address):
-                raise DeviceNotFoundError
-
-            def on_disconnect(client: BleakClient):
-                if self.__reconnect:
-                    self.__logger.debug("Device disconnected, trying to reconnect")
-                    asyncio.create_task(self.connect(timeout))
-
-            self.__client = BleakClient(
-                self.__address,
-                disconnected_callback=on_disconnect,
-                timeout=timeout,
-            )
+            await self.__create_client(timeout, scan=False)
 
         self.__reconnect = True
         if not self.__client.is_connected:
-            await self.__client.connect()
+            start = time.perf_counter()
+            try:
+                await self.__client.connect()
+            except Exception:
+                if self.__scanned:
+                    raise
+                # The known device might be stale, try again after scanning for it
+                self.__logger.debug("Failed to connect to known device, scanning")
+                scan_cache.remove(self.__address)
+                await self.__create_client(timeout, scan=True)
+                start = time.perf_counter()
+                await self.__client.connect()
+
             if self.__client.is_connected:
+                start = self.__record(Metric.Link, start)
+                self.__synced = False
                 self.__logger.debug("Device connected, sending password")
                 await self.__write(message.password_input(self.__password))
-                self.__logger.debug("Synchronizing status")
-                await self.__sync_status()
+                start = self.__record(Metric.Password, start)
+                if self.__restore():
+                    self.__logger.debug("Stored status is up to date")
+                else:
+                    self.__logger.debug("Synchronizing status")
+                    await self.__sync_status()
+                self.__synced = True
+                start = self.__record(Metric.StatusSync, start)
                 self.__logger.debug("Synchronizing time")
                 await self.sync_time()
+                self.__record(Metric.TimeSync, start)
+                if self.__rtc_resync and (
+                    not self.__rtc_task or self.__rtc_task.done()
+                ):
+                    self.__rtc_task = asyncio.create_task(self.__resync_time())
             else:
                 self.__logger.error("Failed to connect to device")
 
+    def __restore(self) -> bool:
+        """
+        Restores the timers and time synchronization from the store once.
+
+        :return: `True` if the stored status equals the desired status
+        """
+        if not self.__store or self.__restored:
+            return False
+        self.__restored = True
+        state = self.__store.load(self.__address)
+        if state is None:
+            return False
+
+        self.__timers = list(state.timers)
+        if state.rtc is not None:
+            # Translate the wall clock time to the monotonic clock of this process
+            self.__rtc_synced = (
+                time.monotonic() - (time.time() - state.rtc),
+                state.rtc,
+            )
+        return (
+            state.on,
+            state.function,
+            state.brightness,
+            state.flash_speed,
+        ) == (
+            self.__status.on,
+            self.__status.function,
+            self.__status.brightness,
+            self.__status.flash_speed,
+        )
+
+    def __persist(self):
+        """Saves the current state to the store."""
+        if self.__store:
+            self.__store.save(
+                self.__address,
+                DeviceState(
+                    self.__status.on,
+                    self.__status.function,
+                    self.__status.brightness,
+                    self.__status.flash_speed,
+                    tuple(self.__timers),
+                    self.__rtc_synced[1] if self.__rtc_synced else None,
+                ),
+            )
+
+    async def __create_client(self, timeout: float, scan: bool):
+        """
+        Creates the client for the device.
+        Unless `scan` is set, an already discovered or recently seen device is used
+        to avoid scanning for the device.
+        """
+        device = None if scan else self.__ble_device or scan_cache.get(self.__address)
+        if device is not None and not on_adapter(device, self.__adapter):
+            # Discovered by another adapter, which can't be used to connect
+            device = None
+        self.__scanned = device is None
+        if device is None:
+            self.__logger.debug("Scanning for device")
+            start = time.perf_counter()
+            device = await find_device(self.__address, timeout, self.__adapter)
+            self.__record(Metric.Scan, start)
+            if device is None:
+                raise DeviceNotFoundError
+        self.__ble_device = device
+
+        def on_disconnect(client: BleakClient):
+            self.__synced = False
+            if self.__reconnect:
+                # The device might have lost power, which resets its clock
+                self.__rtc_synced = None
+                self.__logger.debug("Device disconnected, trying to reconnect")
+                self.__supervisor.schedule(self, timeout)
+
+        self.__client = self.__client_factory(
+            device,
+            disconnected_callback=on_disconnect,
+            timeout=timeout,
+            **adapter_kwargs(self.__adapter),
+        )
+
     async def __sync_status(self):
         """
         Synchronizes the status of the device.
@@ -133,19 +433,40 @@ class Device:
             function=self.__status.function,
             brightness=self.__status.brightness,
             flash_speed=self.__status.flash_speed,
+            force=True,
         )
 
         if init_state:
-            await self.on()
+            await self.on(force=True)
         else:
-            await self.off()
+            await self.off(force=True)
 
     async def disconnect(self):
         """Disconnects from the device."""
         self.__reconnect = False
+        self.__synced = False
+        self.__supervisor.cancel(self)
+        if self.__rtc_task:
+            self.__rtc_task.cancel()
+            self.__rtc_task = None
         if self.__client and self.__client.is_connected:
             await self.__client.disconnect()
 
+    async def move(self, adapter: Optional[str], timeout: float = 5.0):
+        """
+        Moves the device to another Bluetooth adapter.
+        If the device is connected, it's reconnected using the new adapter.
+
+        :param adapter: The new adapter, e.g. `hci1`, or `None` for the default adapter
+        :param timeout: The timeout in seconds for reconnecting
+        """
+        connected = self.is_connected
+        await self.disconnect()
+        self.__adapter = adapter
+        self.__client = None
+        if connected:
+            await self.connect(timeout)
+
     async def __aenter__(self):
         await self.connect()
         return self
@@ -153,6 +474,36 @@ class Device:
     async def __aexit__(self, _exc_type, _exc_val, _exc_tb):
         await self.disconnect()
 
+    @property
+    def address(self) -> str:
+        """The address of the device."""
+        return self.__address
+
+    @property
+    def queue(self) -> Optional[CommandQueue]:
+        """The command queue of the device or `None` if commands aren't queued."""
+        return self.__queue
+
+    @property
+    def metrics(self) -> DeviceMetrics:
+        """The metrics of the device, see `aiokonstsmide.metrics`."""
+        return self.__metrics
+
+    @property
+    def adapter(self) -> Optional[str]:
+        """The Bluetooth adapter used to connect or `None` for the default adapter."""
+        return self.__adapter
+
+    @property
+    def is_connected(self) -> bool:
+        """`True` if the device is currently connected, else `False`."""
+        return bool(self.__client and self.__client.is_connected)
+
+    @property
+    def reconnect_state(self) -> ReconnectState:
+        """The state of reconnecting to the device after the connection was lost."""
+        return self.__supervisor.state(self.__address)
+
     @property
     def is_on(self) -> bool:
         """`True` if the device is currently on, else `False`."""
@@ -173,17 +524,23 @@ class Device:
         """The current function of the device."""
         return self.__status.function
 
-    async def on(self):
-        """Turn on the device."""
+    async def on(self, force: bool = False):
+        """
+        Turn on the device.
+
+        :param force: Send the command even if no-op suppression is enabled
+        """
         self.__logger.debug("Turning on")
-        self.__status.on = True
-        await self.__write(message.on_off(self.__status.on))
+        await self._send(message.on_off(True), force=force, on=True)
+
+    async def off(self, force: bool = False):
+        """
+        Turn off the device.
 
-    async def off(self):
-        """Turn off the device."""
+        :param force: Send the command even if no-op suppression is enabled
+        """
         self.__logger.debug("Turning off")
-        self.__status.on = False
-        await self.__write(message.on_off(self.__status.on))
+        await self._send(message.on_off(False), force=force, on=False)
 
     async def toggle(self):
         """Toggle between on and off."""
@@ -197,6 +554,7 @@ class Device:
         function: Optional[message.Function] = None,
         brightness: Optional[int] = None,
         flash_speed: Optional[int] = None,
+        force: bool = False,
     ):
         """
         Control the devices function, brightness and flash speed.
@@ -205,26 +563,23 @@ class Device:
         :param function: The function to set
         :param brightness: The brightness to set, in the range 0 (dim) - 100 (bright)
         :param flash_speed: The flash speed to set, in the range 0 (slow) - 100 (fast)
+        :param force: Send the command even if no-op suppression is enabled
         """
-        if function:
-            self.__status.function = function
-        if brightness:
-            self.__status.brightness = brightness
-        if flash_speed:
-            self.__status.flash_speed = flash_speed
-
-        # Control turns on the device automatically
-        self.__status.on = True
+        function = function or self.__status.function
+        brightness = brightness or self.__status.brightness
+        flash_speed = flash_speed or self.__status.flash_speed
 
         self.__logger.debug(
-            f"Setting function {self.__status.function.name} with brightness {self.__status.brightness} and flash speed {self.__status.flash_speed}"
+            f"Setting function {function.name} with brightness {brightness} and flash speed {flash_speed}"
         )
-        await self.__write(
-            message.control(
-                self.__status.function,
-                self.__status.brightness,
-                self.__status.flash_speed,
-            ),
+        # Control turns on the device automatically
+        await self._send(
+            message.control(function, brightness, flash_speed),
+            force=force,
+            on=True,
+            function=function,
+            brightness=brightness,
+            flash_speed=flash_speed,
         )
 
     async def deactivate_timer(self, num: Optional[int] = None):
@@ -245,18 +600,7 @@ class Device:
             )
         else:
             for i in range(8):
-                await self.__write(
-                    message.timer(
-                        i,
-                        False,
-                        False,
-                        0,
-                        0,
-                        message.Function.Steady,
-                        [],
-                        self.__status.brightness,
-                    )
-                )
+                await self.__write_timer(self.__deactivated_timer(i))
 
     async def timer(
         self,
@@ -280,43 +624,311 @@ class Device:
         :param function: The function to set when the timer is triggered
         :param repeat: On which weekdays the timer triggers
         """
+        # Create timer
+        if isinstance(repeat, message.Repeat):
+            repeat = [repeat]
+        frame = message.Timer(
+            num,
+            active,
+            turn_on,
+            hour,
+            minute,
+            function,
+            tuple(repeat or ()),
+            self.__status.brightness,
+        )
 
         # Make sure time is synchronized
         await self.sync_time()
 
-        # Create timer
-        if isinstance(repeat, message.Repeat):
-            repeat = [repeat]
+        await self.__write_timer(frame)
 
-        await self.__write(
-            message.timer(
-                num,
-                active,
-                turn_on,
-                hour,
-                minute,
-                function,
-                repeat,
-                self.__status.brightness,
-            )
+    async def set_timers(
+        self, timers: Sequence[Optional["TimerSetting"]], force: bool = False
+    ) -> List[int]:
+        """
+        Configures all 8 timers of the device at once.
+
+        Only the timers which differ from what was last programmed by this instance
+        or restored from the state store are written and the time is synchronized
+        once, if any timer is written.
+
+        :param timers: The setting of each timer, timers which are `None` or missing are deactivated
+        :param force: Write all timers, even if they didn't change
+
+        :return: The numbers of the timers which were written
+        """
+        if len(timers) > 8:
+            raise ValueError(f"The device has 8 timers, got {len(timers)}")
+
+        frames = []
+        for num in range(8):
+            setting = timers[num] if num < len(timers) else None
+            if setting is None:
+                frame = self.__deactivated_timer(num)
+            else:
+                repeat = setting.repeat
+                if isinstance(repeat, message.Repeat):
+                    repeat = [repeat]
+                frame = message.Timer(
+                    num,
+                    setting.active,
+                    setting.turn_on,
+                    setting.hour,
+                    setting.minute,
+                    setting.function,
+                    tuple(repeat or ()),
+                    self.__status.brightness,
+                )
+            # The brightness isn't used by the device, so it's ignored for the comparison.
+            # The messages are compared, since the same repeat days can be given in any order.
+            programmed = self.__timers[num]
+            if (
+                force
+                or programmed is None
+                or replace(programmed, brightness=frame.brightness).data != frame.data
+            ):
+                frames.append(frame)
+
+        if frames:
+            await self.sync_time()
+            for frame in frames:
+                await self.__write_timer(frame)
+        return [frame.num for frame in frames]
+
+    def __deactivated_timer(self, num: int) -> message.Timer:
+        return message.Timer(
+            num,
+            False,
+            False,
+            0,
+            0,
+            message.Function.Steady,
+            (),
+            self.__status.brightness,
         )
 
-    async def sync_time(self):
+    async def __write_timer(self, frame: message.Timer):
+        """Writes the given timer and remembers it as programmed."""
+        if await self.__write(frame.data):
+            self.__timers[frame.num] = frame
+            self.__persist()
+
+    async def sync_time(self, force: bool = False):
         """
         Sends an RTC message to the device to synchronize the time.
         This is needed for timers to work correctly.
 
         Time is synchronized implicitly when connecting to the device or changing a timer.
+
+        :param force: Synchronize the time even if the RTC interval hasn't passed yet
         """
+        if not force and self.__rtc_interval is not None and self.__rtc_synced:
+            monotonic, wall = self.__rtc_synced
+            elapsed = time.monotonic() - monotonic
+            jumped = abs(time.time() - wall - elapsed) > RTC_JUMP_TOLERANCE
+            if elapsed < self.__rtc_interval and not jumped:
+                self.__logger.debug("Time was synchronized recently, skipping")
+                return
+
         await self.__write(message.rtc(datetime.now()))
 
-    async def __write(self, message: bytes):
-        """Writes the given message to the device."""
+    async def __resync_time(self):
+        """Synchronizes the time periodically in the background."""
+        while True:
+            await asyncio.sleep(self.__rtc_resync)
+            if not self.is_connected:
+                continue
+            try:
+                await self.__write(
+                    message.rtc(datetime.now()), priority=Priority.Background
+                )
+            except Exception as exc:
+                # Tried again at the next interval, e.g. after reconnecting
+                self.__logger.warning(f"Failed to synchronize time: {exc!r}")
+
+    async def _send(
+        self,
+        frame: Union[bytes, message.Frame],
+        encoded: Optional[bytes] = None,
+        force: bool = False,
+        response: Optional[bool] = None,
+        priority: Optional[Priority] = None,
+        **status,
+    ) -> bool:
+        """
+        Updates the internal status and writes the given frame to the device.
+
+        This is used internally and by `aiokonstsmide.group.DeviceGroup`
+        to share frames which were built and encoded once between devices.
+
+        :param frame: The plaintext frame or a `aiokonstsmide.message.Frame` to send
+        :param encoded: The already encoded frame or `None` to encode it
+        :param force: Send the frame even if it doesn't change the status
+        :param response: Overrides if the frame is written with response
+        :param priority: Overrides the priority of the frame if a command queue is used
+        :param status: The `Status` fields changed by the frame
+
+        :return: `False` if the frame was dropped because the device is disconnected, else `True`
+        """
+        if (
+            self.__suppress_noop
+            and not force
+            and self.__synced
+            and status
+            and all(getattr(self.__status, f) == v for f, v in status.items())
+        ):
+            self.__logger.debug("Status unchanged, skipping message")
+            return True
+
+        for field, value in status.items():
+            setattr(self.__status, field, value)
+
+        frame = bytes(frame)
+        if self.__coalesce and frame[1] in (
+            message.Command.OnOff.value,
+            message.Command.Control.value,
+        ):
+            return await self.__write_coalesced(message.Command(frame[1]))
+        written = await self.__write(frame, encoded, response, priority)
+        # A frame superseded in the command queue wasn't written either, but isn't lost
+        return written or self.is_connected
+
+    async def __write_coalesced(self, command: message.Command) -> bool:
+        """
+        Waits until the current status has been written by the flusher.
+
+        :return: `False` if the status was dropped because the device is disconnected
+        """
+        self.__dirty.add(command)
+        waiter = asyncio.get_running_loop().create_future()
+        self.__waiters.append(waiter)
+        if not self.__flusher or self.__flusher.done():
+            self.__flusher = asyncio.create_task(self.__flush())
+        return await waiter
+
+    async def __flush(self):
+        """Writes the latest status as long as there are commands waiting."""
+        while self.__waiters:
+            delay = self.__last_flush + self.__min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            waiters, self.__waiters = self.__waiters, []
+            written = True
+            try:
+                for frame in self.__coalesced_frames():
+                    written = await self.__write(frame) and written
+            except Exception as exc:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(exc)
+            else:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(written or self.is_connected)
+            self.__last_flush = time.monotonic()
+
+    def __coalesced_frames(self) -> List[bytes]:
+        """Returns the frames needed to bring the device to the current status."""
+        if self.__status.on:
+            if message.Command.Control in self.__dirty:
+                # Control turns on the device as well
+                self.__dirty.clear()
+                return [
+                    message.control(
+                        self.__status.function,
+                        self.__status.brightness,
+                        self.__status.flash_speed,
+                    )
+                ]
+            if message.Command.OnOff in self.__dirty:
+                self.__dirty.discard(message.Command.OnOff)
+                return [message.on_off(True)]
+        elif message.Command.OnOff in self.__dirty:
+            # Pending control changes are kept until the device is turned on again
+            self.__dirty.discard(message.Command.OnOff)
+            return [message.on_off(False)]
+        return []
+
+    async def __write(
+        self,
+        data: bytes,
+        encoded: Optional[bytes] = None,
+        response: Optional[bool] = None,
+        priority: Optional[Priority] = None,
+    ) -> bool:
+        """
+        Writes the given message to the device, through the command queue if there is one.
+
+        :return: `True` if the message was written, `False` if the device is disconnected
+            or the message was superseded in the queue
+        """
+        if self.__queue is None:
+            return await self.__write_now(data, encoded, response)
+        return await self.__queue.submit(
+            data, lambda: self.__write_now(data, encoded, response), priority
+        )
+
+    async def __write_now(
+        self,
+        data: bytes,
+        encoded: Optional[bytes] = None,
+        response: Optional[bool] = None,
+    ) -> bool:
+        """
+        Writes the given message to the device.
+
+        Unless `response` is given, the default write type of bleak is used.
+        In write without response mode the messages in `ACKNOWLEDGED_COMMANDS`
+        are written with response and all others paced without response.
+
+        :return: `True` if the message was written, `False` if the device is disconnected
+        """
         if self.__client and self.__client.is_connected:
-            self.__logger.debug(f"Sending message to device: {message.hex()}")
-            enc_msg = codec.encode(message)
-            await self.__client.write_gatt_char(CHARACTERISTIC, enc_msg)
+            if self.__logger.isEnabledFor(logging.DEBUG):
+                self.__logger.debug(f"Sending message to device: {data.hex()}")
+            enc_msg = encoded or codec.encode(data)
+            if self.__capture is not None:
+                self.__capture.record(self.__address, data, enc_msg)
+            if response is None and self.__write_without_response:
+                response = message.Command(data[1]) in ACKNOWLEDGED_COMMANDS
+
+            try:
+                if response is None:
+                    start = time.perf_counter()
+                    await self.__client.write_gatt_char(CHARACTERISTIC, enc_msg)
+                elif response:
+                    start = time.perf_counter()
+                    await self.__client.write_gatt_char(
+                        CHARACTERISTIC, enc_msg, response=True
+                    )
+                else:
+                    async with self.__pacer:
+                        start = time.perf_counter()
+                        await self.__client.write_gatt_char(
+                            CHARACTERISTIC, enc_msg, response=False
+                        )
+            except Exception:
+                self.__metrics.record(Metric.WriteError)
+                raise
+            self.__record(Metric.Write, start)
+
+            if data[1] == message.Command.Rtc.value:
+                self.__rtc_synced = (time.monotonic(), time.time())
+            if self.__store and data[1] in _PERSISTED_COMMANDS:
+                self.__persist()
+            return True
         else:
+            self.__synced = False
+            self.__metrics.record(Metric.DroppedWrite)
             self.__logger.error(
                 "Tried to send message to device, but it's disconnected!"
             )
+            return False
+
+    def __record(self, metric: Metric, start: float) -> float:
+        """Records the duration since `start` and returns the current time."""
+        now = time.perf_counter()
+        self.__metrics.record(metric, now - start)
+        return now
@@ -17,3 +17,29 @@ class DecodeError(AioKonstmideError):
 
 class DeviceNotFoundError(AioKonstmideError):
     """The device couldn't be found or is not a valid Konstsmide Bluetooth device."""
+
+
+class NotConnectedError(AioKonstmideError):
+    """The device is disconnected, so the message wasn't written."""
+
+
+class GroupError(AioKonstmideError):
+    """An operation failed for at least one device of a group."""
+
+    def __init__(self, results):
+        failed = [result.address for result in results if not result.ok]
+        super().__init__(f"Operation failed for {len(failed)} device(s): {failed}")
+        self.results = results
+        """The results of all devices in the group."""
+
+
+class QueueFullError(AioKonstmideError):
+    """A command was rejected or dropped, because the command queue of the device is full."""
+
+
+class AdapterError(AioKonstmideError):
+    """No Bluetooth adapter is available to connect to the device."""
+
+
+class DaemonError(AioKonstmideError):
+    """The daemon couldn't be reached or reported an error for a request."""
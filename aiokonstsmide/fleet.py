@@ -0,0 +1,338 @@
+"""
+Module for spreading many Konstsmide Bluetooth devices across multiple Bluetooth adapters.
+
+A Bluetooth adapter can only hold a limited number of simultaneous connections.
+A `Fleet` assigns each device to one of the local adapters, balanced by the number
+of connections and the signal strength each adapter observed for the device.
+
+```python
+fleet = Fleet(["hci0", "hci1"], max_connections=7)
+await fleet.scan()
+for address in addresses:
+    await fleet.connect(address)
+group = DeviceGroup(fleet.devices.values())
+```
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional
+
+from bleak.exc import BleakError
+
+from .device import Device
+from .exceptions import AdapterError
+from .scanner import stream_devices
+
+UNKNOWN_RSSI = -127
+"""The signal strength assumed if an adapter didn't observe a device."""
+
+
+@dataclass
+class AdapterStatus:
+    """Dataclass to hold the status of an adapter of a fleet."""
+
+    name: str
+    """The name of the adapter, e.g. `hci1`."""
+    connections: int = 0
+    """Number of devices assigned to the adapter."""
+    failures: int = 0
+    """Number of consecutive failed connection attempts."""
+    healthy: bool = True
+    """`False` if the adapter failed and isn't used for new connections."""
+
+
+class Fleet:
+    """
+    Manages devices spread across multiple Bluetooth adapters.
+
+    A device is assigned to the adapter with the fewest connections among the adapters
+    whose signal strength for the device is within `rssi_margin` of the best one.
+    Saturated adapters aren't assigned any further devices.
+    If connecting fails repeatedly because of Bluetooth errors, the adapter is considered
+    failed and its devices are migrated to the other adapters. Devices which can't be
+    found don't count against the adapter, since they're most likely powered off.
+    `rebalance` migrates the devices left on failed adapters.
+    """
+
+    def __init__(
+        self,
+        adapters: Iterable[str],
+        max_connections: int = 7,
+        rssi_margin: float = 10.0,
+        max_failures: int = 3,
+        password: Optional[str] = None,
+        **kwargs,
+    ):
+        """
+        Initializes a Fleet instance.
+
+        :param adapters: The names of the adapters to use, e.g. `["hci0", "hci1"]`
+        :param max_connections: The maximum number of devices per adapter
+        :param rssi_margin: Adapters whose signal strength for a device is at most this many dBm
+            worse than the best one are considered equally good
+        :param max_failures: Number of consecutive connection attempts failed with a Bluetooth error
+            after which an adapter is considered failed
+        :param password: The password of the devices
+        :param kwargs: Further arguments passed to `aiokonstsmide.device.Device`
+        """
+        if max_connections < 1:
+            raise ValueError(
+                f"Max connections must be at least 1, got {max_connections}"
+            )
+        if max_failures < 1:
+            raise ValueError(f"Max failures must be at least 1, got {max_failures}")
+
+        self.__logger = logging.getLogger(__name__)
+        self.__adapters: Dict[str, AdapterStatus] = {
+            name: AdapterStatus(name) for name in adapters
+        }
+        if not self.__adapters:
+            raise ValueError("At least one adapter is needed")
+        self.__max_connections = max_connections
+        self.__rssi_margin = rssi_margin
+        self.__max_failures = max_failures
+        self.__password = password
+        self.__kwargs = kwargs
+        self.__rssi: Dict[str, Dict[str, int]] = {}
+        self.__devices: Dict[str, Device] = {}
+        self.__lock: Optional[asyncio.Lock] = None
+
+    @property
+    def adapters(self) -> Dict[str, AdapterStatus]:
+        """The status of each adapter by name."""
+        return {name: replace(status) for name, status in self.__adapters.items()}
+
+    @property
+    def devices(self) -> Dict[str, Device]:
+        """The managed devices by address."""
+        return dict(self.__devices)
+
+    def observe(self, address: str, adapter: str, rssi: int):
+        """
+        Records the signal strength an adapter observed for a device.
+        This is called by `scan`, but can also be fed from another scanner.
+
+        :param address: The address of the device
+        :param adapter: The name of the adapter
+        :param rssi: The signal strength in dBm
+        """
+        self.__rssi.setdefault(address.upper(), {})[adapter] = rssi
+
+    def rssi(self, address: str, adapter: str) -> int:
+        """
+        Returns the signal strength the adapter observed for the device.
+
+        :param address: The address of the device
+        :param adapter: The name of the adapter
+
+        :return: The signal strength in dBm or `UNKNOWN_RSSI`
+        """
+        return self.__rssi.get(address.upper(), {}).get(adapter, UNKNOWN_RSSI)
+
+    async def scan(
+        self, timeout: float = 5.0, addresses: Optional[Iterable[str]] = None
+    ):
+        """
+        Scans with all healthy adapters at the same time to observe the signal strength of the devices.
+
+        :param timeout: Time in seconds to scan
+        :param addresses: Only observe these devices and stop once all were found by each adapter
+        """
+        addresses = list(addresses) if addresses is not None else None
+
+        async def scan(adapter: str):
+            try:
+                async for discovery in stream_devices(
+                    timeout, addresses=addresses, adapter=adapter
+                ):
+                    self.observe(discovery.address, adapter, discovery.rssi)
+            except Exception as exc:
+                self.__logger.warning(f"Scanning with {adapter} failed: {exc!r}")
+
+        await asyncio.gather(
+            *(scan(name) for name, status in self.__adapters.items() if status.healthy)
+        )
+
+    async def connect(self, address: str, timeout: float = 5.0) -> Device:
+        """
+        Connects to a device using the best adapter.
+        If connecting fails, the next best adapter is tried.
+
+        :param address: The address of the device
+        :param timeout: The timeout in seconds per attempt
+
+        :return: The connected device
+        """
+        dev = self.__devices.get(address.upper())
+        if dev is not None:
+            if dev.is_connected:
+                return dev
+            # Reassigned below, the adapter might have failed in the meantime
+            del self.__devices[address.upper()]
+            self.__release(dev.adapter)
+
+        excluded: List[str] = []
+        while True:
+            async with self.__get_lock():
+                adapter = self.__choose(address, excluded)
+                self.__adapters[adapter].connections += 1
+
+            try:
+                if dev is None:
+                    dev = Device(
+                        address, self.__password, adapter=adapter, **self.__kwargs
+                    )
+                elif dev.adapter != adapter:
+                    await dev.move(adapter)
+                await dev.connect(timeout)
+            except Exception as exc:
+                self.__release(adapter)
+                await dev.disconnect()
+                excluded.append(adapter)
+                # A device which can't be found is most likely powered off,
+                # only errors of the Bluetooth stack count against the adapter
+                if isinstance(exc, BleakError):
+                    await self.__failed(adapter)
+                if not self.__candidates(excluded):
+                    raise
+                self.__logger.debug(f"Connecting {address} with {adapter} failed")
+                continue
+
+            self.__adapters[adapter].failures = 0
+            self.__devices[address.upper()] = dev
+            return dev
+
+    async def disconnect(self, address: str):
+        """
+        Disconnects a device and removes it from the fleet.
+
+        :param address: The address of the device
+        """
+        dev = self.__devices.pop(address.upper(), None)
+        if dev is not None:
+            self.__release(dev.adapter)
+            await dev.disconnect()
+
+    async def close(self):
+        """Disconnects all devices."""
+        devices = list(self.__devices.values())
+        self.__devices.clear()
+        for status in self.__adapters.values():
+            status.connections = 0
+        await asyncio.gather(
+            *(dev.disconnect() for dev in devices), return_exceptions=True
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, _exc_type, _exc_val, _exc_tb):
+        await self.close()
+
+    async def fail_adapter(self, adapter: str):
+        """
+        Marks an adapter as failed and migrates its devices to the other adapters.
+
+        :param adapter: The name of the adapter
+        """
+        self.__adapters[adapter].healthy = False
+        await self.rebalance()
+
+    def restore_adapter(self, adapter: str):
+        """
+        Marks a failed adapter as healthy again, so it's used for new connections.
+        Call `rebalance` to move devices back to it.
+
+        :param adapter: The name of the adapter
+        """
+        status = self.__adapters[adapter]
+        status.healthy = True
+        status.failures = 0
+
+    async def rebalance(self, timeout: float = 5.0) -> Dict[str, str]:
+        """
+        Migrates devices from failed adapters to the best other adapter,
+        e.g. devices which couldn't be migrated when the adapter failed.
+        Devices with the weakest signal are migrated first.
+
+        :param timeout: The timeout in seconds per device for reconnecting
+
+        :return: The new adapter of each migrated device by address
+        """
+        migrated: Dict[str, str] = {}
+        for name, status in self.__adapters.items():
+            if status.healthy:
+                continue
+            on_adapter = sorted(
+                (dev for dev in self.__devices.values() if dev.adapter == name),
+                key=lambda dev: self.rssi(dev.address, name),
+            )
+            for dev in on_adapter:
+                async with self.__get_lock():
+                    try:
+                        target = self.__choose(dev.address, [name])
+                    except AdapterError:
+                        self.__logger.warning(f"No adapter to migrate {dev.address} to")
+                        continue
+                    self.__release(name)
+                    self.__adapters[target].connections += 1
+                self.__logger.debug(f"Migrating {dev.address} from {name} to {target}")
+                try:
+                    await dev.move(target, timeout)
+                except Exception as exc:
+                    self.__logger.warning(
+                        f"Migrating {dev.address} to {target} failed: {exc!r}"
+                    )
+                    if isinstance(exc, BleakError):
+                        await self.__failed(target)
+                else:
+                    migrated[dev.address] = target
+        return migrated
+
+    def __candidates(self, excluded: Iterable[str]) -> List[AdapterStatus]:
+        """Returns the healthy adapters with a free connection slot."""
+        return [
+            status
+            for name, status in self.__adapters.items()
+            if status.healthy
+            and name not in excluded
+            and status.connections < self.__max_connections
+        ]
+
+    def __choose(self, address: str, excluded: Iterable[str]) -> str:
+        """Returns the best adapter for the device or raises if none is available."""
+        candidates = self.__candidates(excluded)
+        if not candidates:
+            raise AdapterError(f"No adapter available for {address}")
+
+        best = max(self.rssi(address, status.name) for status in candidates)
+        return min(
+            (
+                status
+                for status in candidates
+                if self.rssi(address, status.name) >= best - self.__rssi_margin
+            ),
+            key=lambda status: (status.connections, -self.rssi(address, status.name)),
+        ).name
+
+    def __release(self, adapter: Optional[str]):
+        """Releases a connection slot of the adapter."""
+        status = self.__adapters.get(adapter)
+        if status and status.connections > 0:
+            status.connections -= 1
+
+    async def __failed(self, adapter: str):
+        """Counts a failed attempt and migrates the devices once the adapter is considered failed."""
+        status = self.__adapters[adapter]
+        status.failures += 1
+        if status.healthy and status.failures >= self.__max_failures:
+            self.__logger.warning(f"Adapter {adapter} failed, migrating its devices")
+            await self.fail_adapter(adapter)
+
+    def __get_lock(self) -> asyncio.Lock:
+        # Created lazily to bind it to the running event loop
+        if not self.__lock:
+            self.__lock = asyncio.Lock()
+        return self.__lock
@@ -0,0 +1,389 @@
+"""Module for controlling multiple Konstsmide Bluetooth devices concurrently."""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from . import codec, message
+from .commands import Priority
+from .device import Device, TimerSetting, status_fields
+from .exceptions import GroupError, NotConnectedError
+
+
+class FailurePolicy(Enum):
+    """Defines how a group operation handles devices which failed."""
+
+    Continue = 1
+    """Run the operation for all devices and report failures in the results."""
+    Raise = 2
+    """Run the operation for all devices and raise a `GroupError` if any failed."""
+    Abort = 3
+    """Cancel the remaining devices on the first failure and raise a `GroupError`."""
+
+
+@dataclass
+class Result:
+    """Dataclass to hold the result of a group operation for a single device."""
+
+    address: str
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        """`True` if the operation succeeded for the device, else `False`."""
+        return self.error is None
+
+
+@dataclass
+class BroadcastResult:
+    """Dataclass to hold the outcome of a synchronized broadcast."""
+
+    results: List[Result]
+    """The result for each device."""
+    started: Dict[str, float] = field(default_factory=dict)
+    """The time in seconds after the release each write started by address."""
+    completed: Dict[str, float] = field(default_factory=dict)
+    """The time in seconds after the release each write completed by address."""
+
+    @property
+    def skew(self) -> float:
+        """The spread in seconds between the first and the last completed write."""
+        return _spread(self.completed.values())
+
+    @property
+    def start_skew(self) -> float:
+        """The spread in seconds between the first and the last started write."""
+        return _spread(self.started.values())
+
+    @property
+    def duration(self) -> float:
+        """The time in seconds from the release until the last write completed."""
+        return max(self.completed.values(), default=0.0)
+
+
+def _spread(values: Iterable[float]) -> float:
+    values = list(values)
+    return max(values) - min(values) if values else 0.0
+
+
+class DeviceGroup:
+    """
+    Represents a group of Konstsmide Bluetooth devices which are controlled concurrently.
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[Union[str, Device]],
+        password: Optional[str] = None,
+        max_concurrency: int = 4,
+        policy: FailurePolicy = FailurePolicy.Continue,
+    ):
+        """
+        Initializes a DeviceGroup instance.
+
+        :param devices: The addresses of the devices or `Device` instances
+        :param password: The password used for devices given by address
+        :param max_concurrency: The maximum number of devices accessed at the same time per
+            Bluetooth adapter, an adapter can only handle a limited number of simultaneous connections
+        :param policy: How to handle devices for which an operation failed
+        """
+        if max_concurrency < 1:
+            raise ValueError(
+                f"Max concurrency must be at least 1, got {max_concurrency}"
+            )
+
+        self.__devices = [
+            dev if isinstance(dev, Device) else Device(dev, password) for dev in devices
+        ]
+        self.__max_concurrency = max_concurrency
+        self.__semaphores: Dict[Optional[str], asyncio.Semaphore] = {}
+        self.__policy = policy
+
+    @property
+    def devices(self) -> List[Device]:
+        """The devices in the group."""
+        return list(self.__devices)
+
+    def __len__(self) -> int:
+        return len(self.__devices)
+
+    def __iter__(self) -> Iterator[Device]:
+        return iter(self.__devices)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, _exc_type, _exc_val, _exc_tb):
+        await self.disconnect()
+
+    async def connect(
+        self, timeout: float = 5.0, policy: Optional[FailurePolicy] = None
+    ) -> List[Result]:
+        """
+        Connects to all devices in the group.
+
+        :param timeout: The timeout in seconds per device
+        :param policy: Overrides the failure policy of the group
+
+        :return: The result for each device
+        """
+
+        async def connect(dev: Device) -> bool:
+            # The client can return from connecting without a link
+            await dev.connect(timeout)
+            return dev.is_connected
+
+        return await self.__run(connect, policy)
+
+    async def disconnect(self) -> List[Result]:
+        """
+        Disconnects from all devices in the group.
+        Failures are always only reported in the results.
+
+        :return: The result for each device
+        """
+        return await self.__run(lambda dev: dev.disconnect(), FailurePolicy.Continue)
+
+    async def on(self, policy: Optional[FailurePolicy] = None) -> List[Result]:
+        """
+        Turns on all devices in the group.
+
+        :param policy: Overrides the failure policy of the group
+
+        :return: The result for each device
+        """
+        return await self.__on_off(True, policy)
+
+    async def off(self, policy: Optional[FailurePolicy] = None) -> List[Result]:
+        """
+        Turns off all devices in the group.
+
+        :param policy: Overrides the failure policy of the group
+
+        :return: The result for each device
+        """
+        return await self.__on_off(False, policy)
+
+    async def __on_off(self, on: bool, policy: Optional[FailurePolicy]) -> List[Result]:
+        frame = message.OnOff(on)
+        encoded = codec.encode(frame.data)
+        return await self.__run(lambda dev: dev._send(frame, encoded, on=on), policy)
+
+    async def control(
+        self,
+        function: Optional[message.Function] = None,
+        brightness: Optional[int] = None,
+        flash_speed: Optional[int] = None,
+        policy: Optional[FailurePolicy] = None,
+    ) -> List[Result]:
+        """
+        Controls the function, brightness and flash speed of all devices in the group.
+        If a parameter is None, the current value of each device will be kept.
+
+        :param function: The function to set
+        :param brightness: The brightness to set, in the range 0 (dim) - 100 (bright)
+        :param flash_speed: The flash speed to set, in the range 0 (slow) - 100 (fast)
+        :param policy: Overrides the failure policy of the group
+
+        :return: The result for each device
+        """
+        encoded: Dict[message.Control, bytes] = {}
+
+        async def control(dev: Device):
+            frame = message.Control(
+                function or dev.function,
+                brightness or dev.brightness,
+                flash_speed or dev.flash_speed,
+            )
+            if frame not in encoded:
+                encoded[frame] = codec.encode(frame.data)
+            return await dev._send(
+                frame,
+                encoded[frame],
+                on=True,
+                function=frame.function,
+                brightness=frame.brightness,
+                flash_speed=frame.flash_speed,
+            )
+
+        return await self.__run(control, policy)
+
+    async def timer(
+        self,
+        num: int,
+        active: bool,
+        turn_on: bool,
+        hour: int,
+        minute: int,
+        function: message.Function,
+        repeat: Union[message.Repeat, List[message.Repeat]],
+        policy: Optional[FailurePolicy] = None,
+    ) -> List[Result]:
+        """
+        Configures a timer on all devices in the group.
+        See `aiokonstsmide.device.Device.timer` for a description of the parameters.
+
+        :param policy: Overrides the failure policy of the group
+
+        :return: The result for each device
+        """
+        return await self.__run(
+            lambda dev: dev.timer(num, active, turn_on, hour, minute, function, repeat),
+            policy,
+        )
+
+    async def set_timers(
+        self,
+        timers: Sequence[Optional[TimerSetting]],
+        force: bool = False,
+        policy: Optional[FailurePolicy] = None,
+    ) -> List[Result]:
+        """
+        Configures all 8 timers on all devices in the group.
+        See `aiokonstsmide.device.Device.set_timers` for a description of the parameters.
+
+        :param policy: Overrides the failure policy of the group
+
+        :return: The result for each device
+        """
+        return await self.__run(lambda dev: dev.set_timers(timers, force), policy)
+
+    async def sync_time(self, policy: Optional[FailurePolicy] = None) -> List[Result]:
+        """
+        Synchronizes the time of all devices in the group.
+
+        :param policy: Overrides the failure policy of the group
+
+        :return: The result for each device
+        """
+        frame = message.Rtc(datetime.now())
+        encoded = codec.encode(frame.data)
+        return await self.__run(lambda dev: dev._send(frame, encoded), policy)
+
+    async def broadcast(
+        self,
+        frame: message.Frame,
+        timeout: float = 5.0,
+        response: Optional[bool] = None,
+        policy: Optional[FailurePolicy] = None,
+    ) -> BroadcastResult:
+        """
+        Writes a frame to all devices in the group at the same instant,
+        e.g. to switch the function of all devices without visible ripple.
+
+        The frame is encoded once and all devices are connected first,
+        then the writes are released together, bypassing `max_concurrency`.
+        Writing without response gives the lowest skew, since no write waits
+        for an acknowledgement. Devices which coalesce writes or which have
+        a busy command queue delay their write and increase the skew.
+
+        :param frame: The frame to write, e.g. `aiokonstsmide.message.Control`
+        :param timeout: The timeout in seconds for connecting each device
+        :param response: Overrides if the frame is written with response
+        :param policy: Overrides the failure policy of the group,
+            with `FailurePolicy.Abort` nothing is written unless all devices are connected
+
+        :return: The result for each device and the measured skew
+        """
+        policy = policy or self.__policy
+        encoded = codec.encode(frame.data)
+        status = status_fields(frame)
+
+        connected = await self.connect(timeout, FailurePolicy.Continue)
+        if policy == FailurePolicy.Abort and not all(res.ok for res in connected):
+            raise GroupError(connected)
+
+        release = asyncio.Event()
+        started: Dict[str, float] = {}
+        completed: Dict[str, float] = {}
+        release_time = 0.0
+
+        async def write(dev: Device):
+            await release.wait()
+            started[dev.address] = time.perf_counter() - release_time
+            written = await dev._send(
+                frame,
+                encoded,
+                force=True,
+                response=response,
+                priority=Priority.Interactive,
+                **status,
+            )
+            if not written:
+                raise NotConnectedError(f"Device {dev.address} is disconnected")
+            completed[dev.address] = time.perf_counter() - release_time
+
+        tasks = {
+            dev: asyncio.ensure_future(write(dev))
+            for dev, res in zip(self.__devices, connected)
+            if res.ok
+        }
+        # Let all writers reach the barrier, so they're woken up together
+        await asyncio.sleep(0)
+        release_time = time.perf_counter()
+        release.set()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        results = [
+            Result(dev.address, tasks[dev].exception()) if dev in tasks else res
+            for dev, res in zip(self.__devices, connected)
+        ]
+        if policy != FailurePolicy.Continue and not all(res.ok for res in results):
+            raise GroupError(results)
+        return BroadcastResult(results, started, completed)
+
+    async def __run(
+        self,
+        operation: Callable[[Device], Awaitable[Optional[bool]]],
+        policy: Optional[FailurePolicy],
+    ) -> List[Result]:
+        """
+        Runs the given operation for all devices with bounded concurrency.
+        An operation returning `False` failed, since the device is disconnected.
+        """
+        policy = policy or self.__policy
+
+        async def run(dev: Device):
+            # Created lazily to bind them to the running event loop
+            semaphore = self.__semaphores.get(dev.adapter)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.__max_concurrency)
+                self.__semaphores[dev.adapter] = semaphore
+            async with semaphore:
+                if await operation(dev) is False:
+                    raise NotConnectedError(f"Device {dev.address} is disconnected")
+
+        tasks = [asyncio.ensure_future(run(dev)) for dev in self.__devices]
+        if not tasks:
+            return []
+
+        if policy == FailurePolicy.Abort:
+            _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in pending:
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = [
+            Result(
+                dev.address,
+                asyncio.CancelledError() if task.cancelled() else task.exception(),
+            )
+            for dev, task in zip(self.__devices, tasks)
+        ]
+        if policy != FailurePolicy.Continue and not all(res.ok for res in results):
+            raise GroupError(results)
+        return results
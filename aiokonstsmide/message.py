@@ -1,12 +1,22 @@
 """Defines messages to be sent to a device."""
 
+import struct
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from functools import reduce
-from typing import List
+from functools import lru_cache, reduce
+from typing import ClassVar, Dict, List, Tuple, Type
+
+from . import codec
+from .codec import Buffer
+from .exceptions import DecodeError
 
 MAGIC_BYTE = 0xBC
 
+FRAME_CACHE_SIZE = 1024
+"""Maximum number of frames cached per message builder."""
+
 
 class Command(Enum):
     """Commands which can be sent to the device."""
@@ -55,21 +65,10 @@ class Repeat(Enum):
 
 def on_off(on: bool) -> bytes:
     """Constructs a message to turn the device on or off."""
-    return bytes(
-        [
-            MAGIC_BYTE,
-            Command.OnOff.value,
-            int(on),
-            0,
-            0,
-            0,
-            0,
-            0,
-            0,
-        ]
-    )
+    return _ON_OFF[bool(on)]
 
 
+@lru_cache(maxsize=FRAME_CACHE_SIZE)
 def control(function: Function, brightness: int, flash_speed: int) -> bytes:
     """
     Constructs a message to control the function, brightness and flash speed of the device.
@@ -101,6 +100,7 @@ def control(function: Function, brightness: int, flash_speed: int) -> bytes:
     )
 
 
+@lru_cache(maxsize=16)
 def password_input(password: str) -> bytes:
     """
     Constructs a password input message.
@@ -127,6 +127,7 @@ def password_input(password: str) -> bytes:
     )
 
 
+@lru_cache(maxsize=16)
 def set_password(password: str) -> bytes:
     """
     Constructs a set password message.
@@ -167,6 +168,25 @@ def timer(
     NOTE: The FlashAlternating and FlashSynchronous functions can't be used.
     NOTE: The brightness value doesn't work, the device keeps the brightness set previously.
     """
+    if repeat is None or len(repeat) == 0:
+        mask = 0
+    else:
+        mask = reduce(lambda a, b: a ^ b, (rep.value for rep in repeat))
+
+    return _timer(num, active, turn_on, hour, minute, function, mask, brightness)
+
+
+@lru_cache(maxsize=FRAME_CACHE_SIZE)
+def _timer(
+    num: int,
+    active: bool,
+    turn_on: bool,
+    hour: int,
+    minute: int,
+    function: Function,
+    repeat: int,
+    brightness: int,
+) -> bytes:
     if not (0 <= num <= 7):
         raise ValueError(f"Timer number must be between 0 and 7, got {num}")
     if not (0 <= hour <= 23):
@@ -180,11 +200,6 @@ def timer(
     if brightness is None or not (0 <= brightness <= 100):
         raise ValueError(f"Brightness must be between 0 and 100, got {brightness}")
 
-    if repeat is None or len(repeat) == 0:
-        repeat = [0]
-    else:
-        repeat = [rep.value for rep in repeat]
-
     return bytes(
         [
             MAGIC_BYTE,
@@ -194,7 +209,7 @@ def timer(
             int(active),
             hour,
             minute,
-            reduce(lambda a, b: a ^ b, repeat),
+            repeat,
             function.value,
             brightness,
         ]
@@ -206,16 +221,280 @@ def rtc(date: datetime) -> bytes:
     Constructs an RTC message to synchronize the date and time of the device.
     This is necessary for the timers to work correctly.
     """
-    return bytes(
-        [
-            MAGIC_BYTE,
-            Command.Rtc.value,
-            date.second,
-            date.minute,
-            date.hour,
-            date.day,
-            date.month,
-            date.year & 0xFF,
-            (date.year >> 8) & 0xFF,
-        ]
+    return _RTC.pack(
+        MAGIC_BYTE,
+        Command.Rtc.value,
+        date.second,
+        date.minute,
+        date.hour,
+        date.day,
+        date.month,
+        date.year,
     )
+
+
+_ON_OFF = tuple(
+    bytes([MAGIC_BYTE, Command.OnOff.value, int(on), 0, 0, 0, 0, 0, 0])
+    for on in (False, True)
+)
+_RTC = struct.Struct("<7BH")
+
+
+@dataclass(frozen=True)
+class Frame(ABC):
+    """
+    Base class of immutable messages which keep the fields they were built from.
+
+    The fields are validated and the plaintext message is built once
+    when the frame is created, so it can be sent repeatedly without any overhead.
+    """
+
+    command: ClassVar[Command]
+    """The command of the message."""
+    data: bytes = field(init=False, repr=False, compare=False)
+    """The plaintext message."""
+
+    def __post_init__(self):
+        object.__setattr__(self, "data", self._build())
+
+    def __bytes__(self) -> bytes:
+        return self.data
+
+    @abstractmethod
+    def _build(self) -> bytes:
+        """Validates the fields and returns the plaintext message."""
+
+
+@dataclass(frozen=True)
+class OnOff(Frame):
+    """A message to turn the device on or off, see `on_off`."""
+
+    command: ClassVar[Command] = Command.OnOff
+    on: bool
+
+    def _build(self) -> bytes:
+        return on_off(self.on)
+
+
+@dataclass(frozen=True)
+class Control(Frame):
+    """A message to control the function, brightness and flash speed, see `control`."""
+
+    command: ClassVar[Command] = Command.Control
+    function: Function
+    brightness: int
+    flash_speed: int
+
+    def _build(self) -> bytes:
+        return control(self.function, self.brightness, self.flash_speed)
+
+
+@dataclass(frozen=True)
+class PasswordInput(Frame):
+    """A password input message, see `password_input`."""
+
+    command: ClassVar[Command] = Command.PasswordInput
+    password: str
+
+    def _build(self) -> bytes:
+        return password_input(self.password)
+
+
+@dataclass(frozen=True)
+class SetPassword(Frame):
+    """A set password message, see `set_password`."""
+
+    command: ClassVar[Command] = Command.SetPassword
+    password: str
+
+    def _build(self) -> bytes:
+        return set_password(self.password)
+
+
+@dataclass(frozen=True)
+class Timer(Frame):
+    """A timer message, see `timer`."""
+
+    command: ClassVar[Command] = Command.Timer
+    num: int
+    active: bool
+    turn_on: bool
+    hour: int
+    minute: int
+    function: Function
+    repeat: Tuple[Repeat, ...]
+    brightness: int
+
+    def _build(self) -> bytes:
+        return timer(
+            self.num,
+            self.active,
+            self.turn_on,
+            self.hour,
+            self.minute,
+            self.function,
+            list(self.repeat),
+            self.brightness,
+        )
+
+
+@dataclass(frozen=True)
+class Rtc(Frame):
+    """An RTC message, see `rtc`."""
+
+    command: ClassVar[Command] = Command.Rtc
+    date: datetime
+
+    def _build(self) -> bytes:
+        return rtc(self.date)
+
+
+_FRAME_TYPES: Dict[int, Type[Frame]] = {
+    frame.command.value: frame
+    for frame in (OnOff, Control, SetPassword, PasswordInput, Timer, Rtc)
+}
+_HEADER = struct.Struct("2B")
+_LENGTHS = {Command.Timer.value: 10}
+_PASSWORD = struct.Struct(">2xI")
+_CONTROL = struct.Struct("2x3B")
+_TIMER = struct.Struct("2x8B")
+
+
+def parse(data: Buffer) -> Frame:
+    """
+    Parses a plaintext message into the frame it was built from.
+    This is the inverse of the message builders, e.g. `parse(control(...))` returns a `Control` frame.
+
+    The `data` of the returned frame is the given message, even if building the frame
+    from its fields results in a slightly different message, e.g. because of the minimum flash speed.
+
+    :param data: The plaintext message, e.g. as returned by `aiokonstsmide.codec.decode`
+
+    :return: The frame
+    """
+    if len(data) < 9:
+        raise DecodeError(
+            f"Invalid length, message to parse must be at least 9 bytes long, got {len(data)}"
+        )
+    magic, command = _HEADER.unpack_from(data)
+    if magic != MAGIC_BYTE:
+        raise DecodeError("Invalid magic byte in message.")
+    frame_type = _FRAME_TYPES.get(command)
+    if frame_type is None:
+        raise DecodeError(f"Unknown command {command} in message.")
+    if len(data) < _LENGTHS.get(command, 9):
+        raise DecodeError(
+            f"Invalid length of {frame_type.command.name} message, got {len(data)} bytes"
+        )
+
+    try:
+        frame = _parse(frame_type, data)
+    except ValueError as exc:
+        raise DecodeError(f"Invalid {frame_type.command.name} message: {exc}") from exc
+    object.__setattr__(frame, "data", bytes(data))
+    return frame
+
+
+def _parse(frame_type: Type[Frame], data: Buffer) -> Frame:
+    if frame_type is OnOff:
+        return OnOff(bool(data[2]))
+    if frame_type is Control:
+        function, brightness, speed = _CONTROL.unpack_from(data)
+        return Control(Function(function), brightness, 100 - speed)
+    if frame_type is PasswordInput or frame_type is SetPassword:
+        (num,) = _PASSWORD.unpack_from(data)
+        return frame_type(str(num).zfill(6))
+    if frame_type is Timer:
+        num, off, active, hour, minute, mask, function, brightness = _TIMER.unpack_from(
+            data
+        )
+        return Timer(
+            num,
+            bool(active),
+            not off,
+            hour,
+            minute,
+            Function(function),
+            _repeat(mask),
+            brightness,
+        )
+    _, _, second, minute, hour, day, month, year = _RTC.unpack_from(data)
+    return Rtc(datetime(year, month, day, hour, minute, second))
+
+
+def _repeat(mask: int) -> Tuple[Repeat, ...]:
+    if mask == 0:
+        return ()
+    try:
+        return (Repeat(mask),)
+    except ValueError:
+        return tuple(day for day in Repeat if day.value & mask == day.value <= 64)
+
+
+def parse_many(data: Buffer) -> List[Frame]:
+    """
+    Decodes and parses a buffer of concatenated encoded messages, see `aiokonstsmide.codec.decode_many`.
+
+    :param data: The encoded messages
+
+    :return: The frames
+    """
+    return [parse(frame) for frame in codec.decode_many(data)]
+
+
+class FrameParser:
+    """
+    Streaming parser for encoded messages which arrive in chunks,
+    e.g. captured traffic which is read piece by piece.
+    Incomplete messages at the end of a chunk are kept until the rest arrives,
+    invalid messages are skipped and counted.
+
+    ```python
+    parser = FrameParser()
+    for chunk in chunks:
+        for frame in parser.feed(chunk):
+            print(frame)
+    ```
+    """
+
+    def __init__(self):
+        """Initializes a FrameParser instance."""
+        self.__buffer = bytearray()
+        self.invalid = 0
+        """The number of invalid messages which were skipped."""
+
+    @property
+    def pending(self) -> int:
+        """The number of buffered bytes of an incomplete message."""
+        return len(self.__buffer)
+
+    def feed(self, data: Buffer) -> List[Frame]:
+        """
+        Adds a chunk of encoded messages and parses all messages which are complete.
+
+        :param data: The next chunk of encoded messages
+
+        :return: The frames of the completed messages
+        """
+        self.__buffer += data
+        buffer = self.__buffer
+        frames = []
+        pos = 0
+        while len(buffer) - pos >= 2:
+            if buffer[pos] != codec.MAGIC_BYTE:
+                # Out of sync, skip to the next possible start of a message
+                self.invalid += 1
+                pos = buffer.find(codec.MAGIC_BYTE, pos + 1)
+                if pos < 0:
+                    pos = len(buffer)
+                continue
+            end = pos + (buffer[pos + 1] ^ codec.MAGIC_BYTE) + 2
+            if end > len(buffer):
+                break
+            try:
+                frames.append(parse(codec.decode(buffer[pos:end])))
+            except DecodeError:
+                self.invalid += 1
+            pos = end
+        del buffer[:pos]
+        return frames
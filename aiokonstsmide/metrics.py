@@ -0,0 +1,198 @@
+"""
+Module for collecting metrics of Konstsmide Bluetooth devices.
+
+Each `aiokonstsmide.device.Device` collects its metrics in `Device.metrics`.
+Recording a metric only increments counters, so it's cheap enough to always be enabled.
+Callbacks can be added to forward the metrics, e.g. to a monitoring system.
+
+```python
+def on_metric(address: str, metric: Metric, value: float):
+    print(address, metric.name, value)
+
+dev.metrics.add_callback(on_metric)
+```
+"""
+
+import logging
+from bisect import bisect_left
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Tuple
+
+BUCKETS: Tuple[float, ...] = tuple(0.0001 * 2**i for i in range(20))
+"""The upper bounds in seconds of the histogram buckets, from 0.1 ms to about 52 s."""
+
+
+class Metric(Enum):
+    """Metrics which are recorded for each device."""
+
+    Write = 1
+    """Latency of a GATT write in seconds."""
+    Scan = 2
+    """Duration of scanning for the device when connecting in seconds."""
+    Link = 3
+    """Duration of establishing the Bluetooth connection in seconds."""
+    Password = 4
+    """Duration of sending the password when connecting in seconds."""
+    StatusSync = 5
+    """Duration of synchronizing the status when connecting in seconds."""
+    TimeSync = 6
+    """Duration of synchronizing the time when connecting in seconds."""
+    WriteError = 7
+    """A GATT write failed."""
+    DroppedWrite = 8
+    """A write was dropped because the device is disconnected."""
+    ReconnectAttempt = 9
+    """An attempt to reconnect after the connection was lost."""
+
+
+TIMINGS = (
+    Metric.Write,
+    Metric.Scan,
+    Metric.Link,
+    Metric.Password,
+    Metric.StatusSync,
+    Metric.TimeSync,
+)
+"""Metrics which are durations, all others are counters."""
+
+
+class Histogram:
+    """Histogram of durations with fixed exponential buckets, see `BUCKETS`."""
+
+    def __init__(self):
+        """Initializes a Histogram instance."""
+        self.buckets: List[int] = [0] * (len(BUCKETS) + 1)
+        """The number of values per bucket, the last bucket counts values exceeding all bounds."""
+        self.count = 0
+        """The number of values."""
+        self.total = 0.0
+        """The sum of all values."""
+        self.min: Optional[float] = None
+        """The smallest value or `None` if there are no values."""
+        self.max: Optional[float] = None
+        """The largest value or `None` if there are no values."""
+
+    def observe(self, value: float):
+        """
+        Adds a value to the histogram.
+
+        :param value: The value in seconds
+        """
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> Optional[float]:
+        """The mean of the values or `None` if there are no values."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Returns an estimate of the given percentile,
+        which is the upper bound of the bucket it falls into.
+
+        :param percent: The percentile in the range 0 - 100
+
+        :return: The estimated value or `None` if there are no values
+        """
+        if not (0 <= percent <= 100):
+            raise ValueError(f"Percent must be between 0 and 100, got {percent}")
+        if not self.count:
+            return None
+
+        rank = percent / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                bound = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(max(bound, self.min), self.max)
+        return self.max
+
+
+class DeviceMetrics:
+    """Metrics of a single device."""
+
+    def __init__(self, address: str):
+        """
+        Initializes a DeviceMetrics instance.
+
+        :param address: The address of the device
+        """
+        self.__logger = logging.getLogger(__name__)
+        self.__address = address
+        self.__histograms: Dict[Metric, Histogram] = {
+            metric: Histogram() for metric in TIMINGS
+        }
+        self.__counters: Dict[Metric, int] = {
+            metric: 0 for metric in Metric if metric not in TIMINGS
+        }
+        self.__callbacks: List[Callable[[str, Metric, float], None]] = []
+
+    @property
+    def address(self) -> str:
+        """The address of the device."""
+        return self.__address
+
+    def histogram(self, metric: Metric) -> Histogram:
+        """
+        Returns the histogram of a duration metric.
+
+        :param metric: A metric in `TIMINGS`
+        """
+        return self.__histograms[metric]
+
+    def count(self, metric: Metric) -> int:
+        """
+        Returns how often the given metric was recorded.
+
+        :param metric: The metric
+        """
+        histogram = self.__histograms.get(metric)
+        return histogram.count if histogram else self.__counters[metric]
+
+    def record(self, metric: Metric, value: float = 1.0):
+        """
+        Records a metric and calls the callbacks.
+
+        :param metric: The metric
+        :param value: The duration in seconds for metrics in `TIMINGS`, ignored for counters
+        """
+        histogram = self.__histograms.get(metric)
+        if histogram:
+            histogram.observe(value)
+        else:
+            self.__counters[metric] += 1
+
+        for callback in list(self.__callbacks):
+            # Failing callbacks must not break writes
+            try:
+                callback(self.__address, metric, value)
+            except Exception:
+                self.__logger.exception("Error in metrics callback")
+
+    def add_callback(
+        self, callback: Callable[[str, Metric, float], None]
+    ) -> Callable[[], None]:
+        """
+        Adds a callback which is called with the device address, metric and value
+        whenever a metric is recorded.
+
+        :param callback: The callback
+
+        :return: A function which removes the callback again
+        """
+        self.__callbacks.append(callback)
+        return lambda: self.__callbacks.remove(callback)
+
+    def reset(self):
+        """Resets all metrics, the callbacks are kept."""
+        for metric in self.__histograms:
+            self.__histograms[metric] = Histogram()
+        for metric in self.__counters:
+            self.__counters[metric] = 0
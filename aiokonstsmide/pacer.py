@@ -0,0 +1,52 @@
+"""Module for pacing writes to Konstsmide Bluetooth devices."""
+
+import asyncio
+from typing import Optional
+
+
+class Pacer:
+    """
+    Limits the rate and the number of concurrent writes.
+
+    Writes without response aren't acknowledged by the device, so sending them
+    as fast as possible can overrun the Bluetooth controller and frames get lost.
+    Use it as an async context manager around each write.
+    """
+
+    def __init__(self, rate: Optional[float] = 50.0, window: int = 4):
+        """
+        Initializes a Pacer instance.
+
+        :param rate: The maximum number of writes per second or `None` for no limit
+        :param window: The maximum number of writes in flight at the same time
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError(f"Rate must be greater than 0, got {rate}")
+        if window < 1:
+            raise ValueError(f"Window must be at least 1, got {window}")
+
+        self.__interval = 1 / rate if rate else 0.0
+        self.__window = window
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+        self.__next = 0.0
+
+    async def __aenter__(self):
+        # Created lazily to bind it to the running event loop
+        if not self.__semaphore:
+            self.__semaphore = asyncio.Semaphore(self.__window)
+        await self.__semaphore.acquire()
+
+        try:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            slot = max(now, self.__next)
+            self.__next = slot + self.__interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+        except BaseException:
+            self.__semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, _exc_type, _exc_val, _exc_tb):
+        self.__semaphore.release()
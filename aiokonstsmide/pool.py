@@ -0,0 +1,262 @@
+"""Module for keeping connections to Konstsmide Bluetooth devices open between uses."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
+from typing import AsyncIterator, List, Optional
+
+from .device import Device
+
+
+@dataclass
+class PoolStats:
+    """Dataclass to hold the statistics of a connection pool."""
+
+    hits: int = 0
+    """Number of acquires served by an already connected device."""
+    misses: int = 0
+    """Number of acquires which had to connect to the device."""
+    evictions: int = 0
+    """Number of connections closed to make room or because they were idle."""
+    connect_time: float = 0.0
+    """Total time in seconds spent connecting to devices."""
+    connections: int = 0
+    """Number of devices currently held by the pool."""
+
+    @property
+    def avg_connect_time(self) -> float:
+        """Average time in seconds to connect to a device."""
+        return self.connect_time / self.misses if self.misses else 0.0
+
+
+@dataclass
+class _Entry:
+    device: Device
+    users: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class ConnectionPool:
+    """
+    A pool of connected and authenticated devices, keyed by address.
+
+    The number of simultaneous connections is limited, if the limit is reached
+    the least recently used idle device is disconnected to make room for a new one.
+    Devices which haven't been used for a while are disconnected as well.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 4,
+        idle_timeout: Optional[float] = 300.0,
+        password: Optional[str] = None,
+        **kwargs,
+    ):
+        """
+        Initializes a ConnectionPool instance.
+
+        :param max_connections: The maximum number of simultaneously connected devices
+        :param idle_timeout: Time in seconds after which an unused device is disconnected
+            or `None` to keep devices connected until room is needed
+        :param password: The default password of the devices
+        :param kwargs: Further arguments passed to `aiokonstsmide.device.Device`
+        """
+        if max_connections < 1:
+            raise ValueError(
+                f"Max connections must be at least 1, got {max_connections}"
+            )
+
+        self.__max_connections = max_connections
+        self.__idle_timeout = idle_timeout
+        self.__password = password
+        self.__kwargs = kwargs
+        self.__entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.__condition: Optional[asyncio.Condition] = None
+        self.__reaper: Optional[asyncio.Task] = None
+        self.__stats = PoolStats()
+
+    @property
+    def stats(self) -> PoolStats:
+        """A snapshot of the pool statistics."""
+        return replace(self.__stats, connections=len(self.__entries))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, _exc_type, _exc_val, _exc_tb):
+        await self.close()
+
+    async def acquire(
+        self, address: str, password: Optional[str] = None, timeout: float = 5.0
+    ) -> Device:
+        """
+        Returns a connected and authenticated device for the given address.
+        Waits until a connection is available if all connections are in use.
+
+        Call `ConnectionPool.release` once you're finished with the device,
+        or use `ConnectionPool.device` instead.
+
+        :param address: The address of the device
+        :param password: The password of the device, defaults to the pool password
+        :param timeout: Timeout in seconds for connecting to the device
+
+        :return: A connected Device instance
+        """
+        address = address.upper()
+        condition = self.__get_condition()
+        evicted: List[Device] = []
+        async with condition:
+            while (
+                address not in self.__entries
+                and len(self.__entries) >= self.__max_connections
+            ):
+                lru = next(
+                    (addr for addr, e in self.__entries.items() if e.users == 0), None
+                )
+                if lru is not None:
+                    evicted.append(self.__entries.pop(lru).device)
+                    self.__stats.evictions += 1
+                else:
+                    await condition.wait()
+
+            entry = self.__entries.get(address)
+            if entry is None:
+                entry = _Entry(
+                    Device(address, password or self.__password, **self.__kwargs)
+                )
+                self.__entries[address] = entry
+            entry.users += 1
+            self.__entries.move_to_end(address)
+
+        await self.__disconnect(evicted)
+        self.__start_reaper()
+
+        try:
+            async with entry.lock:
+                if entry.device.is_connected:
+                    self.__stats.hits += 1
+                else:
+                    self.__stats.misses += 1
+                    start = time.monotonic()
+                    try:
+                        await entry.device.connect(timeout)
+                    finally:
+                        self.__stats.connect_time += time.monotonic() - start
+        except BaseException:
+            async with condition:
+                entry.users -= 1
+                if entry.users == 0 and self.__entries.get(address) is entry:
+                    del self.__entries[address]
+                condition.notify_all()
+            raise
+
+        return entry.device
+
+    async def release(self, device: Device):
+        """
+        Returns a device acquired from the pool.
+        The device stays connected until it's evicted.
+
+        :param device: The device to return
+        """
+        address = device.address.upper()
+        condition = self.__get_condition()
+        async with condition:
+            entry = self.__entries.get(address)
+            if entry is not None and entry.device is device and entry.users > 0:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+                self.__entries.move_to_end(address)
+                condition.notify_all()
+
+    @asynccontextmanager
+    async def device(
+        self, address: str, password: Optional[str] = None, timeout: float = 5.0
+    ) -> AsyncIterator[Device]:
+        """
+        Acquires a device for the duration of the `async with` block.
+        See `ConnectionPool.acquire` for a description of the parameters.
+        """
+        dev = await self.acquire(address, password, timeout)
+        try:
+            yield dev
+        finally:
+            await self.release(dev)
+
+    async def evict(self, address: str) -> bool:
+        """
+        Disconnects the device with the given address, unless it's in use.
+
+        :param address: The address of the device
+
+        :return: `True` if the device was disconnected, `False` if it's in use or not in the pool
+        """
+        address = address.upper()
+        condition = self.__get_condition()
+        async with condition:
+            entry = self.__entries.get(address)
+            if entry is None or entry.users > 0:
+                return False
+            del self.__entries[address]
+            self.__stats.evictions += 1
+            condition.notify_all()
+
+        await self.__disconnect([entry.device])
+        return True
+
+    async def evict_idle(self):
+        """Disconnects all devices which have been idle for longer than the idle timeout."""
+        if self.__idle_timeout is None:
+            return
+
+        condition = self.__get_condition()
+        now = time.monotonic()
+        async with condition:
+            idle = [
+                addr
+                for addr, entry in self.__entries.items()
+                if entry.users == 0 and now - entry.last_used >= self.__idle_timeout
+            ]
+            evicted = [self.__entries.pop(addr).device for addr in idle]
+            self.__stats.evictions += len(evicted)
+            condition.notify_all()
+
+        await self.__disconnect(evicted)
+
+    async def close(self):
+        """Disconnects all devices and stops evicting idle devices."""
+        if self.__reaper:
+            self.__reaper.cancel()
+            self.__reaper = None
+
+        condition = self.__get_condition()
+        async with condition:
+            devices = [entry.device for entry in self.__entries.values()]
+            self.__entries.clear()
+            condition.notify_all()
+
+        await self.__disconnect(devices)
+
+    def __get_condition(self) -> asyncio.Condition:
+        # Created lazily to bind it to the running event loop
+        if not self.__condition:
+            self.__condition = asyncio.Condition()
+        return self.__condition
+
+    def __start_reaper(self):
+        if self.__idle_timeout is not None and not self.__reaper:
+            self.__reaper = asyncio.create_task(self.__reap())
+
+    async def __reap(self):
+        while True:
+            await asyncio.sleep(self.__idle_timeout / 2)
+            await self.evict_idle()
+
+    @staticmethod
+    async def __disconnect(devices: List[Device]):
+        await asyncio.gather(
+            *(dev.disconnect() for dev in devices), return_exceptions=True
+        )
@@ -0,0 +1,179 @@
+"""Module for reconnecting to Konstsmide Bluetooth devices after the connection was lost."""
+
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from .metrics import Metric
+
+if TYPE_CHECKING:
+    from .device import Device
+
+
+class ReconnectState(Enum):
+    """The reconnect state of a device."""
+
+    Idle = 1
+    """No reconnect in progress."""
+    Waiting = 2
+    """Waiting for the backoff delay before the next attempt."""
+    Connecting = 3
+    """Trying to connect to the device."""
+    Failed = 4
+    """Gave up after the maximum number of attempts."""
+
+
+@dataclass
+class Backoff:
+    """Dataclass to hold the parameters of the exponential backoff between attempts."""
+
+    initial: float = 0.5
+    """Delay in seconds before the first attempt."""
+    maximum: float = 60.0
+    """Maximum delay in seconds between attempts."""
+    factor: float = 2.0
+    """Factor by which the delay grows after each failed attempt."""
+    jitter: float = 0.5
+    """Fraction of the delay which is randomized, in the range 0 - 1."""
+    max_attempts: Optional[int] = None
+    """Maximum number of attempts or `None` to retry forever."""
+
+    def delay(self, attempt: int) -> float:
+        """
+        Returns the delay before the given attempt.
+
+        :param attempt: The number of failed attempts so far
+
+        :return: The delay in seconds
+        """
+        delay = min(self.maximum, self.initial * self.factor**attempt)
+        return delay * (1 - self.jitter * random.random())
+
+
+class ReconnectSupervisor:
+    """
+    Reconnects devices after their connection was lost.
+
+    There is at most one reconnect in progress per device and the number of
+    devices connecting at the same time is limited, so losing the connection
+    to many devices at once doesn't overwhelm the Bluetooth adapter.
+    """
+
+    def __init__(self, backoff: Optional[Backoff] = None, max_concurrent: int = 2):
+        """
+        Initializes a ReconnectSupervisor instance.
+
+        :param backoff: The backoff between attempts, defaults to `Backoff()`
+        :param max_concurrent: The maximum number of devices connecting at the same time
+        """
+        if max_concurrent < 1:
+            raise ValueError(f"Max concurrent must be at least 1, got {max_concurrent}")
+
+        self.__logger = logging.getLogger(__name__)
+        self.__backoff = backoff or Backoff()
+        self.__max_concurrent = max_concurrent
+        self.__semaphore: Optional[
+            Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]
+        ] = None
+        self.__tasks: Dict[str, asyncio.Task] = {}
+        self.__states: Dict[str, ReconnectState] = {}
+        self.__attempts: Dict[str, int] = {}
+
+    def state(self, address: str) -> ReconnectState:
+        """
+        Returns the reconnect state of the device with the given address.
+
+        :param address: The address of the device
+        """
+        return self.__states.get(address, ReconnectState.Idle)
+
+    def attempts(self, address: str) -> int:
+        """
+        Returns the number of attempts of the current or last reconnect of the device.
+
+        :param address: The address of the device
+        """
+        return self.__attempts.get(address, 0)
+
+    @property
+    def reconnecting(self) -> int:
+        """The number of devices with a reconnect in progress."""
+        return sum(1 for task in self.__tasks.values() if not task.done())
+
+    def schedule(self, device: "Device", timeout: float = 5.0) -> asyncio.Task:
+        """
+        Starts reconnecting the given device, unless a reconnect is already in progress.
+
+        :param device: The device to reconnect
+        :param timeout: Timeout in seconds per attempt
+
+        :return: The task of the reconnect, which results in `True` once connected
+            or `False` if the maximum number of attempts was reached
+        """
+        task = self.__tasks.get(device.address)
+        if task is None or task.done():
+            self.__states[device.address] = ReconnectState.Waiting
+            task = asyncio.create_task(self.__reconnect(device, timeout))
+            self.__tasks[device.address] = task
+        return task
+
+    def cancel(self, device: "Device"):
+        """
+        Stops reconnecting the given device.
+
+        :param device: The device to stop reconnecting
+        """
+        task = self.__tasks.pop(device.address, None)
+        if task and not task.done():
+            task.cancel()
+        self.__states.pop(device.address, None)
+
+    async def __reconnect(self, device: "Device", timeout: float) -> bool:
+        address = device.address
+        self.__attempts[address] = 0
+        try:
+            while not device.is_connected:
+                attempt = self.__attempts[address]
+                if (
+                    self.__backoff.max_attempts is not None
+                    and attempt >= self.__backoff.max_attempts
+                ):
+                    self.__logger.warning(
+                        f"Giving up reconnecting to {address} after {attempt} attempts"
+                    )
+                    self.__states[address] = ReconnectState.Failed
+                    return False
+
+                self.__states[address] = ReconnectState.Waiting
+                await asyncio.sleep(self.__backoff.delay(attempt))
+
+                async with self.__get_semaphore():
+                    self.__states[address] = ReconnectState.Connecting
+                    self.__attempts[address] = attempt + 1
+                    device.metrics.record(Metric.ReconnectAttempt)
+                    try:
+                        await device.connect(timeout)
+                    except Exception as exc:
+                        self.__logger.debug(
+                            f"Reconnect attempt {attempt + 1} to {address} failed: {exc!r}"
+                        )
+
+            self.__states[address] = ReconnectState.Idle
+            return True
+        except asyncio.CancelledError:
+            self.__states.pop(address, None)
+            raise
+
+    def __get_semaphore(self) -> asyncio.Semaphore:
+        # Bound to the running event loop, as the supervisor is shared
+        loop = asyncio.get_running_loop()
+        if not self.__semaphore or self.__semaphore[0] is not loop:
+            self.__semaphore = (loop, asyncio.Semaphore(self.__max_concurrent))
+        return self.__semaphore[1]
+
+
+default_supervisor = ReconnectSupervisor()
+"""The supervisor used by devices which don't specify one."""
@@ -0,0 +1,228 @@
+"""
+Module for replaying captured messages to Konstsmide Bluetooth devices.
+
+```python
+replay = Replay(read_capture("lights.kcap"), speed=2.0)
+stats = await replay.play([dev1, dev2])
+print(stats.throughput, stats.latency.percentile(99))
+```
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from bleak.exc import BleakError
+
+from . import message
+from .capture import CaptureRecord
+from .device import Device, status_fields
+from .exceptions import DecodeError, NotConnectedError
+from .metrics import Histogram
+
+DEFAULT_SKIP = (message.Command.PasswordInput, message.Command.SetPassword)
+"""Commands which aren't replayed by default, since connecting sends the password
+and replaying a password change could lock out the devices."""
+
+
+@dataclass
+class ReplayStats:
+    """Dataclass to hold the statistics of a replay."""
+
+    frames: int = 0
+    """Number of messages written."""
+    skipped: int = 0
+    """Number of messages skipped, because of their command or because no device was routed."""
+    failed: int = 0
+    """Number of messages which couldn't be written, e.g. because the device is disconnected."""
+    duration: float = 0.0
+    """Time in seconds it took to replay the messages."""
+    max_lateness: float = 0.0
+    """Maximum time in seconds a message was written after it was scheduled."""
+    total_lateness: float = 0.0
+    """Sum of the time in seconds messages were written after they were scheduled."""
+    latency: Histogram = field(default_factory=Histogram)
+    """The time in seconds each write took."""
+
+    @property
+    def throughput(self) -> float:
+        """The achieved number of messages written per second."""
+        return self.frames / self.duration if self.duration else 0.0
+
+    @property
+    def avg_lateness(self) -> float:
+        """Average time in seconds a message was written after it was scheduled."""
+        return self.total_lateness / self.frames if self.frames else 0.0
+
+
+class Replay:
+    """
+    Replays captured messages, see `aiokonstsmide.capture`.
+
+    Each message is routed to the device it was captured from, unless a route is given.
+    The messages are written in order per device, while different devices are written to
+    concurrently. Messages are scheduled against a monotonic clock relative to the
+    first message, so the original timing is kept even if single writes are delayed.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[CaptureRecord],
+        speed: Optional[float] = 1.0,
+        skip: Iterable[message.Command] = DEFAULT_SKIP,
+        window: int = 64,
+    ):
+        """
+        Initializes a Replay instance.
+
+        The records are read lazily while playing, so a replay of a generator
+        like `aiokonstsmide.capture.read_capture` can only be played once.
+
+        :param records: The captured messages, e.g. a `aiokonstsmide.capture.Capture`
+        :param speed: Factor to accelerate the original timing or `None` to write as fast as possible
+        :param skip: Commands which aren't replayed, defaults to `DEFAULT_SKIP`
+        :param window: The maximum number of messages queued per device
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError(f"Speed must be greater than 0, got {speed}")
+        if window < 1:
+            raise ValueError(f"Window must be at least 1, got {window}")
+
+        self.__logger = logging.getLogger(__name__)
+        self.__records = records
+        self.__speed = speed
+        self.__skip = {command.value for command in skip}
+        self.__window = window
+
+    async def play(
+        self,
+        devices: Union[Device, Iterable[Device]],
+        route: Optional[Dict[str, Union[Device, Iterable[Device]]]] = None,
+    ) -> ReplayStats:
+        """
+        Replays the messages to the given devices.
+
+        :param devices: A device or multiple devices, e.g. a `aiokonstsmide.group.DeviceGroup`
+        :param route: Maps captured addresses to the devices receiving their messages,
+            e.g. to replay a capture to other or simulated devices,
+            by default messages go to the device with the captured address
+
+        :return: The statistics of the replay
+        """
+        devices = [devices] if isinstance(devices, Device) else list(devices)
+        targets: Dict[str, List[Device]] = {
+            dev.address.upper(): [dev] for dev in devices
+        }
+        for address, routed in (route or {}).items():
+            targets[address.upper()] = (
+                [routed] if isinstance(routed, Device) else list(routed)
+            )
+
+        stats = ReplayStats()
+        loop = asyncio.get_running_loop()
+        queues: Dict[Device, asyncio.Queue] = {}
+        workers: Dict[Device, asyncio.Task] = {}
+        start = loop.time()
+        first: Optional[float] = None
+
+        try:
+            for record in self.__records:
+                frame = self.__frame(record)
+                routed = targets.get(record.address.upper())
+                if frame is None or not routed:
+                    stats.skipped += 1
+                    continue
+
+                if first is None:
+                    first = record.timestamp
+                scheduled = 0.0
+                if self.__speed is not None:
+                    scheduled = (record.timestamp - first) / self.__speed
+                    delay = start + scheduled - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                for dev in routed:
+                    queue = queues.get(dev)
+                    if queue is None:
+                        queue = queues[dev] = asyncio.Queue(self.__window)
+                        workers[dev] = asyncio.create_task(
+                            self.__worker(dev, queue, start, stats)
+                        )
+                    await _put(queue, (record, frame, scheduled), workers[dev])
+
+            for dev, queue in queues.items():
+                await _put(queue, None, workers[dev])
+            await asyncio.gather(*workers.values())
+        finally:
+            for worker in workers.values():
+                worker.cancel()
+
+        stats.duration = loop.time() - start
+        return stats
+
+    def __frame(self, record: CaptureRecord) -> Optional[message.Frame]:
+        """Parses the captured message or returns `None` if it isn't replayed."""
+        if len(record.plaintext) < 2 or record.plaintext[1] in self.__skip:
+            return None
+        try:
+            return record.frame
+        except DecodeError:
+            return None
+
+    async def __worker(
+        self,
+        dev: Device,
+        queue: asyncio.Queue,
+        start: float,
+        stats: ReplayStats,
+    ):
+        """Writes the queued messages to a device in order."""
+        loop = asyncio.get_running_loop()
+        while True:
+            item: Optional[
+                Tuple[CaptureRecord, message.Frame, float]
+            ] = await queue.get()
+            if item is None:
+                return
+            record, frame, scheduled = item
+
+            lateness = max(loop.time() - start - scheduled, 0.0)
+            write_start = time.perf_counter()
+            try:
+                written = await dev._send(
+                    frame,
+                    record.encoded,
+                    force=True,
+                    **status_fields(frame),
+                )
+            except (BleakError, NotConnectedError, asyncio.TimeoutError) as exc:
+                self.__logger.warning(
+                    f"Dropped {type(frame).__name__} message "
+                    f"{record.plaintext.hex()} for {dev.address}: {exc!r}"
+                )
+                written = False
+            if not written:
+                stats.failed += 1
+                continue
+            stats.latency.observe(time.perf_counter() - write_start)
+            stats.frames += 1
+            stats.total_lateness += lateness
+            stats.max_lateness = max(stats.max_lateness, lateness)
+
+
+async def _put(queue: asyncio.Queue, item, worker: asyncio.Task):
+    """Puts an item into the queue of a worker, raising the error of a failed worker."""
+    if not queue.full():
+        queue.put_nowait(item)
+        return
+    put = asyncio.ensure_future(queue.put(item))
+    try:
+        done, _ = await asyncio.wait({put, worker}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        put.cancel()
+    if put not in done:
+        # The worker failed and will never take the item
+        worker.result()
@@ -2,38 +2,398 @@
 Module for finding available Konstsmide Bluetooth devices.
 """
 
-from typing import AsyncGenerator
+import asyncio
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import AsyncGenerator, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from bleak import BleakScanner
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
 
 DEVICE_NAME = "konstsmide"
 
 
-async def find_devices(timeout: float = 5.0) -> AsyncGenerator[str, None]:
+class ScanCache:
+    """
+    Cache of recently seen Konstsmide Bluetooth devices.
+
+    Devices found by `find_devices` and `check_address` are added to the module wide
+    `scan_cache`, which allows connecting to them without scanning again.
+
+    Static devices never become stale and `find_device` returns them without scanning,
+    e.g. the simulated devices of `aiokonstsmide.simulator.SimulatedAdapter`.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        """
+        Initializes a ScanCache instance.
+
+        :param ttl: Time in seconds after which a device is considered stale
+        """
+        self.ttl = ttl
+        """Time in seconds after which a device is considered stale."""
+        self.__devices: Dict[str, Tuple[BLEDevice, float, bool]] = {}
+
+    def add(self, device: BLEDevice, static: bool = False):
+        """
+        Adds a device which was just seen.
+
+        :param device: The device to add
+        :param static: If the device never becomes stale
+        """
+        self.__devices[device.address.upper()] = (device, time.monotonic(), static)
+
+    def get(self, address: str) -> Optional[BLEDevice]:
+        """
+        Returns the device with the given address if it was seen recently.
+
+        :param address: The address of the device
+
+        :return: The device or `None` if it's unknown or stale
+        """
+        entry = self.__devices.get(address.upper())
+        if entry is None:
+            return None
+        if not entry[2] and time.monotonic() - entry[1] > self.ttl:
+            del self.__devices[address.upper()]
+            return None
+        return entry[0]
+
+    def get_static(self, address: str) -> Optional[BLEDevice]:
+        """
+        Returns the static device with the given address.
+
+        :param address: The address of the device
+
+        :return: The device or `None` if it's unknown or not static
+        """
+        entry = self.__devices.get(address.upper())
+        return entry[0] if entry is not None and entry[2] else None
+
+    def remove(self, address: str, static: bool = False):
+        """
+        Removes the device with the given address.
+
+        :param address: The address of the device
+        :param static: Remove the device even if it's static
+        """
+        entry = self.__devices.get(address.upper())
+        if entry is not None and (static or not entry[2]):
+            del self.__devices[address.upper()]
+
+    def clear(self):
+        """Removes all devices."""
+        self.__devices.clear()
+
+
+scan_cache = ScanCache()
+"""The cache of recently seen devices used by this library."""
+
+
+@dataclass
+class Discovery:
+    """Dataclass to hold a Konstsmide device found while scanning."""
+
+    device: BLEDevice
+    rssi: int
+    """The signal strength in dBm."""
+    advertisement: AdvertisementData
+    seen: float = field(default_factory=time.monotonic)
+    """Monotonic time at which the advertisement was received."""
+
+    @property
+    def address(self) -> str:
+        """The address of the device."""
+        return self.device.address
+
+
+def is_konstsmide(
+    device: Optional[BLEDevice], advertisement: Optional[AdvertisementData] = None
+) -> bool:
+    """
+    Checks if the given device is a Konstsmide device.
+
+    :param device: The device to check
+    :param advertisement: The advertisement data of the device, if available
+
+    :return: True if the device is a Konstsmide device, False otherwise
+    """
+    name = (advertisement and advertisement.local_name) or (device and device.name)
+    return bool(name and name.strip().lower() == DEVICE_NAME)
+
+
+async def find_devices(
+    timeout: float = 5.0, adapter: Optional[str] = None
+) -> AsyncGenerator[str, None]:
     """
     Scans for available Konstsmide Bluetooth devices.
 
     This function is an [asynchronous generator](https://peps.python.org/pep-0525/) and can be used with `async for`.
 
     :param timeout: Time in seconds to scan for devices
+    :param adapter: The Bluetooth adapter to scan with, e.g. `hci1`, or `None` for the default adapter
 
     :return: An asynchronous generator with addresses of found Konstsmide devices
     """
-    for device in await BleakScanner.discover(timeout=timeout, return_adv=False):
-        if device.name and device.name.strip().lower() == DEVICE_NAME:
+    for device in await BleakScanner.discover(
+        timeout=timeout, return_adv=False, **adapter_kwargs(adapter)
+    ):
+        if is_konstsmide(device):
+            scan_cache.add(device)
             yield device.address
 
 
-async def check_address(address: str, timeout: float = 5.0) -> bool:
+async def stream_devices(
+    timeout: float = 5.0,
+    max_devices: Optional[int] = None,
+    addresses: Optional[Iterable[str]] = None,
+    adapter: Optional[str] = None,
+) -> AsyncGenerator[Discovery, None]:
+    """
+    Scans for available Konstsmide Bluetooth devices and yields each device
+    as soon as its first advertisement is received.
+
+    This function is an [asynchronous generator](https://peps.python.org/pep-0525/) and can be used with `async for`.
+    Scanning stops when the timeout expires, the requested number of devices has been found,
+    all expected devices have been found or the generator is closed.
+
+    :param timeout: Maximum time in seconds to scan for devices
+    :param max_devices: Stop after this many devices have been found
+    :param addresses: Only yield the devices with these addresses and stop once all of them have been found
+    :param adapter: The Bluetooth adapter to scan with, e.g. `hci1`, or `None` for the default adapter
+
+    :return: An asynchronous generator with the found Konstsmide devices
+    """
+    expected = {address.upper() for address in addresses} if addresses else None
+    queue: "asyncio.Queue[Discovery]" = asyncio.Queue()
+    seen: Set[str] = set()
+
+    def on_detection(device: BLEDevice, advertisement: AdvertisementData):
+        address = device.address.upper()
+        if address in seen or not is_konstsmide(device, advertisement):
+            return
+        if expected is not None and address not in expected:
+            return
+        seen.add(address)
+        queue.put_nowait(Discovery(device, advertisement.rssi, advertisement))
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    found: Set[str] = set()
+    scanner = BleakScanner(detection_callback=on_detection, **adapter_kwargs(adapter))
+    await scanner.start()
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                discovery = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+            scan_cache.add(discovery.device)
+            found.add(discovery.address.upper())
+            yield discovery
+
+            if max_devices is not None and len(found) >= max_devices:
+                break
+            if expected is not None and expected <= found:
+                break
+    finally:
+        await scanner.stop()
+
+
+async def find_device(
+    address: str, timeout: float = 5.0, adapter: Optional[str] = None
+) -> Optional[BLEDevice]:
+    """
+    Scans for the Konstsmide device with the given address.
+
+    :param address: The address of the device to find
+    :param timeout: Timeout in seconds
+    :param adapter: The Bluetooth adapter to scan with, e.g. `hci1`, or `None` for the default adapter
+
+    :return: The device if it's a valid reachable Konstsmide device, None otherwise
+    """
+    device = scan_cache.get_static(address)
+    if device is not None:
+        return device
+    device = await BleakScanner.find_device_by_address(
+        address, timeout=timeout, **adapter_kwargs(adapter)
+    )
+    if is_konstsmide(device):
+        scan_cache.add(device)
+        return device
+    return None
+
+
+async def check_address(
+    address: str, timeout: float = 5.0, adapter: Optional[str] = None
+) -> bool:
     """
     Checks if the given address is a valid reachable Konstsmide device.
 
     :param address: The address of the device to check
     :param timeout: Timeout in seconds
+    :param adapter: The Bluetooth adapter to scan with, e.g. `hci1`, or `None` for the default adapter
 
     :return: True if the address is a valid device, False otherwise
     """
-    device = await BleakScanner.find_device_by_address(address, timeout=timeout)
-    if device and device.name and device.name.strip().lower() == DEVICE_NAME:
+    return await find_device(address, timeout, adapter) is not None
+
+
+def adapter_kwargs(adapter: Optional[str]) -> Dict[str, str]:
+    """Returns the arguments to pass to bleak to use the given adapter, if any."""
+    return {"adapter": adapter} if adapter else {}
+
+
+def on_adapter(device: BLEDevice, adapter: Optional[str]) -> bool:
+    """
+    Checks if the given device was discovered by the given adapter.
+    Only devices discovered by BlueZ are bound to an adapter.
+
+    :param device: The discovered device
+    :param adapter: The adapter, e.g. `hci1`, or `None` for any adapter
+    """
+    if adapter is None or not isinstance(device.details, dict):
         return True
-    return False
+    path = device.details.get("path", "")
+    return not path.startswith("/org/bluez/") or path.startswith(
+        f"/org/bluez/{adapter}/"
+    )
+
+
+class PresenceEvent(Enum):
+    """Events reported by the `PresenceScanner`."""
+
+    Appeared = 1
+    """A device was seen for the first time or again after it disappeared."""
+    Disappeared = 2
+    """A device wasn't seen for longer than the TTL."""
+
+
+class PresenceScanner:
+    """
+    Scans for Konstsmide Bluetooth devices in the background and keeps track of
+    which devices are currently reachable.
+
+    Seen devices are added to the `scan_cache` as well, so connecting
+    to them doesn't require another scan.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        cache: Optional[ScanCache] = scan_cache,
+        **kwargs,
+    ):
+        """
+        Initializes a PresenceScanner instance.
+
+        :param ttl: Time in seconds after which a device which wasn't seen is removed
+        :param cache: The cache to add seen devices to or `None`
+        :param kwargs: Further arguments passed to `BleakScanner`, e.g. `scanning_mode`
+        """
+        self.__ttl = ttl
+        self.__cache = cache
+        self.__kwargs = kwargs
+        self.__devices: Dict[str, Discovery] = {}
+        self.__callbacks: List[Callable[[PresenceEvent, Discovery], None]] = []
+        self.__scanner: Optional[BleakScanner] = None
+        self.__evictor: Optional[asyncio.Task] = None
+
+    @property
+    def devices(self) -> Dict[str, Discovery]:
+        """The currently reachable devices by address."""
+        return dict(self.__devices)
+
+    def get(self, address: str) -> Optional[Discovery]:
+        """
+        Returns the last advertisement of the device with the given address.
+
+        :param address: The address of the device
+
+        :return: The last advertisement or `None` if the device isn't reachable
+        """
+        return self.__devices.get(address.upper())
+
+    def __contains__(self, address: str) -> bool:
+        return address.upper() in self.__devices
+
+    def add_callback(
+        self, callback: Callable[[PresenceEvent, Discovery], None]
+    ) -> Callable[[], None]:
+        """
+        Registers a callback which is called when a device appears or disappears.
+
+        :param callback: The callback, called with the event and the last advertisement
+
+        :return: A function which removes the callback again
+        """
+        self.__callbacks.append(callback)
+        return lambda: self.__callbacks.remove(callback)
+
+    async def start(self):
+        """Starts scanning in the background."""
+        if self.__scanner:
+            return
+        self.__scanner = BleakScanner(
+            detection_callback=self.__on_detection, **self.__kwargs
+        )
+        await self.__scanner.start()
+        self.__evictor = asyncio.create_task(self.__evict_periodically())
+
+    async def stop(self):
+        """Stops scanning, the reachable devices are kept until the next start."""
+        if self.__evictor:
+            self.__evictor.cancel()
+            self.__evictor = None
+        if self.__scanner:
+            await self.__scanner.stop()
+            self.__scanner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, _exc_type, _exc_val, _exc_tb):
+        await self.stop()
+
+    def evict(self):
+        """Removes all devices which weren't seen for longer than the TTL."""
+        now = time.monotonic()
+        stale = [
+            address
+            for address, discovery in self.__devices.items()
+            if now - discovery.seen > self.__ttl
+        ]
+        for address in stale:
+            discovery = self.__devices.pop(address)
+            if self.__cache is not None:
+                self.__cache.remove(address)
+            self.__notify(PresenceEvent.Disappeared, discovery)
+
+    async def __evict_periodically(self):
+        while True:
+            await asyncio.sleep(self.__ttl / 2)
+            self.evict()
+
+    def __on_detection(self, device: BLEDevice, advertisement: AdvertisementData):
+        if not is_konstsmide(device, advertisement):
+            return
+
+        discovery = Discovery(device, advertisement.rssi, advertisement)
+        address = device.address.upper()
+        appeared = address not in self.__devices
+        self.__devices[address] = discovery
+        if self.__cache is not None:
+            self.__cache.add(device)
+        if appeared:
+            self.__notify(PresenceEvent.Appeared, discovery)
+
+    def __notify(self, event: PresenceEvent, discovery: Discovery):
+        for callback in list(self.__callbacks):
+            callback(event, discovery)
@@ -0,0 +1,177 @@
+"""Module for playing client-side scenes on Konstsmide Bluetooth devices."""
+
+import asyncio
+import math
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Union
+
+from . import codec, message
+from .device import Device
+
+
+@dataclass
+class Keyframe:
+    """Dataclass to hold a keyframe of a scene."""
+
+    function: message.Function
+    """The function set when the keyframe starts."""
+    brightness: int
+    """The brightness at the start of the keyframe, in the range 0 (dim) - 100 (bright)."""
+    duration: float
+    """Time in seconds until the next keyframe starts."""
+    flash_speed: int = 50
+    """The flash speed set when the keyframe starts, in the range 0 (slow) - 100 (fast)."""
+
+
+@dataclass
+class SceneStats:
+    """Dataclass to hold the statistics of a played scene."""
+
+    frames: int = 0
+    """Number of frames written."""
+    dropped: int = 0
+    """Number of frames dropped because writing fell behind."""
+    duration: float = 0.0
+    """Time in seconds it took to play the scene."""
+    max_lateness: float = 0.0
+    """Maximum time in seconds a frame was written after it was scheduled."""
+    total_lateness: float = 0.0
+    """Sum of the time in seconds frames were written after they were scheduled."""
+
+    @property
+    def frame_rate(self) -> float:
+        """The achieved number of frames written per second."""
+        return self.frames / self.duration if self.duration else 0.0
+
+    @property
+    def avg_lateness(self) -> float:
+        """Average time in seconds a frame was written after it was scheduled."""
+        return self.total_lateness / self.frames if self.frames else 0.0
+
+
+class Scene:
+    """
+    A timeline of keyframes which is played by writing frames to devices.
+
+    The brightness is interpolated linearly between keyframes, the function
+    and flash speed change when a keyframe starts. Frames are scheduled against
+    a monotonic clock, so delays of single writes don't add up over time.
+    If writing falls behind, the frames which are already due are dropped and
+    the scene continues with the current one.
+    """
+
+    def __init__(self, keyframes: Iterable[Keyframe], fps: float = 10.0):
+        """
+        Initializes a Scene instance.
+
+        :param keyframes: The keyframes of the scene
+        :param fps: The number of frames written per second
+        """
+        self.__keyframes: List[Keyframe] = list(keyframes)
+        if not self.__keyframes:
+            raise ValueError("A scene needs at least one keyframe")
+        for keyframe in self.__keyframes:
+            if keyframe.duration < 0:
+                raise ValueError(
+                    f"Keyframe duration must not be negative, got {keyframe.duration}"
+                )
+            # Validate once, the frames are built while playing
+            message.control(
+                keyframe.function, keyframe.brightness, keyframe.flash_speed
+            )
+        if fps <= 0:
+            raise ValueError(f"FPS must be greater than 0, got {fps}")
+
+        self.__interval = 1 / fps
+
+    @property
+    def duration(self) -> float:
+        """The duration of the scene in seconds."""
+        return sum(keyframe.duration for keyframe in self.__keyframes)
+
+    def frame_at(self, time: float) -> message.Control:
+        """
+        Returns the frame at the given time of the scene.
+
+        :param time: Time in seconds since the start of the scene
+
+        :return: The control frame at that time
+        """
+        start = 0.0
+        for i, keyframe in enumerate(self.__keyframes):
+            end = start + keyframe.duration
+            if time < end or i == len(self.__keyframes) - 1:
+                brightness = keyframe.brightness
+                if i + 1 < len(self.__keyframes) and keyframe.duration > 0:
+                    progress = min(max((time - start) / keyframe.duration, 0.0), 1.0)
+                    target = self.__keyframes[i + 1].brightness
+                    brightness = round(brightness + (target - brightness) * progress)
+                return message.Control(
+                    keyframe.function, brightness, keyframe.flash_speed
+                )
+            start = end
+
+    async def play(self, devices: Union[Device, Iterable[Device]]) -> SceneStats:
+        """
+        Plays the scene on the given devices.
+        All devices receive the same frames at the same time.
+
+        :param devices: A device or multiple devices, e.g. a `aiokonstsmide.group.DeviceGroup`
+
+        :return: The statistics of the played scene
+        """
+        devices = [devices] if isinstance(devices, Device) else list(devices)
+        loop = asyncio.get_running_loop()
+        stats = SceneStats()
+        duration = self.duration
+        last_tick = math.ceil(duration / self.__interval)
+        start = loop.time()
+        tick = 0
+        last: Optional[message.Control] = None
+
+        while True:
+            scheduled = min(tick * self.__interval, duration)
+            now = loop.time() - start
+            if scheduled > now:
+                await asyncio.sleep(scheduled - now)
+                now = loop.time() - start
+
+            frame = self.frame_at(scheduled)
+            if frame != last:
+                await self.__write(devices, frame)
+                last = frame
+                lateness = now - scheduled
+                stats.frames += 1
+                stats.total_lateness += lateness
+                stats.max_lateness = max(stats.max_lateness, lateness)
+
+            if tick >= last_tick:
+                break
+
+            # Skip the frames which are already due
+            due = min(int((loop.time() - start) / self.__interval), last_tick)
+            if due > tick + 1:
+                stats.dropped += due - tick - 1
+                tick = due
+            else:
+                tick += 1
+
+        stats.duration = loop.time() - start
+        return stats
+
+    @staticmethod
+    async def __write(devices: List[Device], frame: message.Control):
+        encoded = codec.encode(frame.data)
+        await asyncio.gather(
+            *(
+                dev._send(
+                    frame,
+                    encoded,
+                    on=True,
+                    function=frame.function,
+                    brightness=frame.brightness,
+                    flash_speed=frame.flash_speed,
+                )
+                for dev in devices
+            )
+        )
@@ -0,0 +1,297 @@
+"""
+Simulated Konstsmide Bluetooth devices, which can be used instead of real devices
+for testing and benchmarking without Bluetooth hardware.
+
+```python
+adapter = SimulatedAdapter()
+sim = adapter.add("11:22:33:44:55:66", latency=0.01)
+async with aiokonstsmide.Device(sim.ble_device, client_factory=adapter.client) as dev:
+    await dev.on()
+assert sim.state.on
+```
+"""
+
+import asyncio
+import random
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Union
+
+from bleak.backends.device import BLEDevice
+from bleak.exc import BleakError
+
+from . import codec, message
+from .exceptions import DecodeError
+from .scanner import scan_cache
+
+
+@dataclass
+class SimulatedState:
+    """Dataclass to hold the state of a simulated device."""
+
+    on: bool = False
+    function: message.Function = message.Function.Steady
+    brightness: int = 100
+    flash_speed: int = 50
+    password: str = "123456"
+    timers: Dict[int, bytes] = field(default_factory=dict)
+    """The plaintext timer messages by timer number."""
+    clock: Optional[datetime] = None
+    """The time which was last set by an RTC message."""
+
+
+@dataclass
+class SimulatorStats:
+    """Dataclass to hold the statistics of a simulated device."""
+
+    connects: int = 0
+    disconnects: int = 0
+    """Number of connections lost, excluding disconnects requested by the client."""
+    received: int = 0
+    """Number of messages which were received and interpreted."""
+    lost: int = 0
+    """Number of messages which were lost."""
+    rejected: int = 0
+    """Number of messages which were ignored, because they were invalid or not authenticated."""
+
+
+class Simulator:
+    """A simulated Konstsmide Bluetooth device."""
+
+    def __init__(
+        self,
+        address: str,
+        password: str = "123456",
+        latency: float = 0.0,
+        loss: float = 0.0,
+        disconnect_rate: float = 0.0,
+        connect_latency: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initializes a Simulator instance.
+
+        :param address: The address of the simulated device
+        :param password: The password of the simulated device
+        :param latency: Time in seconds each write takes
+        :param loss: Probability in the range 0 - 1 that a write is lost
+        :param disconnect_rate: Probability in the range 0 - 1 that the connection is lost on a write
+        :param connect_latency: Time in seconds connecting takes
+        :param seed: Seed for the random loss and disconnects
+        """
+        self.address = address
+        self.latency = latency
+        self.loss = loss
+        self.disconnect_rate = disconnect_rate
+        self.connect_latency = connect_latency
+        self.state = SimulatedState(password=password)
+        """The state of the simulated device."""
+        self.stats = SimulatorStats()
+        """The statistics of the simulated device."""
+        self.frames: List[bytes] = []
+        """The plaintext messages received, including lost and rejected ones."""
+        self.__random = random.Random(seed)
+        self.__client: Optional["SimulatedClient"] = None
+        self.__authenticated = False
+
+    @property
+    def ble_device(self) -> BLEDevice:
+        """A `BLEDevice` representing the simulated device."""
+        return BLEDevice(
+            self.address,
+            "Konstsmide",
+            {"path": f"/simulator/dev_{self.address.upper().replace(':', '_')}"},
+        )
+
+    @property
+    def is_connected(self) -> bool:
+        """`True` if a client is connected, else `False`."""
+        return self.__client is not None
+
+    def disconnect(self):
+        """Simulates losing the connection, e.g. because the device is out of range."""
+        client = self.__client
+        if client:
+            self.__client = None
+            self.__authenticated = False
+            self.stats.disconnects += 1
+            client._lost()
+
+    def power_cycle(self):
+        """Simulates cutting the power, which loses the connection and resets the clock."""
+        self.disconnect()
+        self.state.clock = None
+
+    async def _connect(self, client: "SimulatedClient"):
+        await asyncio.sleep(self.connect_latency)
+        if self.__client is not None and self.__client is not client:
+            raise BleakError(f"Device {self.address} is already connected")
+        self.__client = client
+        self.__authenticated = False
+        self.stats.connects += 1
+
+    def _disconnect(self, client: "SimulatedClient"):
+        if self.__client is client:
+            self.__client = None
+            self.__authenticated = False
+
+    async def _write(self, client: "SimulatedClient", data: bytes, response: bool):
+        if self.__client is not client:
+            raise BleakError("Not connected")
+
+        await asyncio.sleep(self.latency)
+        if self.__random.random() < self.disconnect_rate:
+            self.disconnect()
+            raise BleakError("Connection lost")
+        if self.__random.random() < self.loss:
+            self.stats.lost += 1
+            if response:
+                raise BleakError("Write not acknowledged")
+            return
+
+        try:
+            frame = codec.decode(data)
+        except DecodeError:
+            self.stats.rejected += 1
+            return
+        self.frames.append(frame)
+        if self.__interpret(frame):
+            self.stats.received += 1
+        else:
+            self.stats.rejected += 1
+
+    def __interpret(self, data: bytes) -> bool:
+        """Applies the given message to the state, returns `False` if it was ignored."""
+        try:
+            frame = message.parse(data)
+        except DecodeError:
+            return False
+
+        if isinstance(frame, message.PasswordInput):
+            self.__authenticated = frame.password == self.state.password
+            return self.__authenticated
+        if not self.__authenticated:
+            return False
+
+        if isinstance(frame, message.OnOff):
+            self.state.on = frame.on
+        elif isinstance(frame, message.Control):
+            self.state.on = True
+            self.state.function = frame.function
+            self.state.brightness = frame.brightness
+            self.state.flash_speed = frame.flash_speed
+        elif isinstance(frame, message.SetPassword):
+            self.state.password = frame.password
+        elif isinstance(frame, message.Timer):
+            self.state.timers[frame.num] = data
+        elif isinstance(frame, message.Rtc):
+            self.state.clock = frame.date
+        return True
+
+
+class SimulatedClient:
+    """
+    Stand-in for `BleakClient` which communicates with a `Simulator`.
+    Create it with `SimulatedAdapter.client`.
+    """
+
+    def __init__(
+        self,
+        simulator: Simulator,
+        disconnected_callback: Optional[Callable[["SimulatedClient"], None]] = None,
+        timeout: float = 10.0,
+    ):
+        self.__simulator = simulator
+        self.__disconnected_callback = disconnected_callback
+        self.__timeout = timeout
+        self.__connected = False
+
+    @property
+    def address(self) -> str:
+        return self.__simulator.address
+
+    @property
+    def is_connected(self) -> bool:
+        return self.__simulator.is_connected and self.__connected
+
+    async def connect(self, **kwargs) -> bool:
+        try:
+            await asyncio.wait_for(self.__simulator._connect(self), self.__timeout)
+        except asyncio.TimeoutError:
+            raise BleakError(f"Timeout connecting to {self.address}")
+        self.__connected = True
+        return True
+
+    async def disconnect(self) -> bool:
+        self.__connected = False
+        self.__simulator._disconnect(self)
+        return True
+
+    async def write_gatt_char(
+        self,
+        char_specifier,
+        data: Union[bytes, bytearray, memoryview],
+        response: bool = False,
+    ):
+        await self.__simulator._write(self, bytes(data), response)
+
+    def _lost(self):
+        self.__connected = False
+        if self.__disconnected_callback:
+            asyncio.get_running_loop().call_soon(self.__disconnected_callback, self)
+
+
+class SimulatedAdapter:
+    """A simulated Bluetooth adapter holding simulated devices."""
+
+    def __init__(self):
+        self.__simulators: Dict[str, Simulator] = {}
+
+    @property
+    def simulators(self) -> List[Simulator]:
+        """The simulated devices."""
+        return list(self.__simulators.values())
+
+    def add(self, address: str, **kwargs) -> Simulator:
+        """
+        Adds a simulated device and makes it known to the `aiokonstsmide.scanner.scan_cache`
+        as static device, so it can be connected by address without ever scanning.
+
+        :param address: The address of the simulated device
+        :param kwargs: Further arguments passed to `Simulator`
+
+        :return: The simulated device
+        """
+        simulator = Simulator(address, **kwargs)
+        self.__simulators[address.upper()] = simulator
+        scan_cache.add(simulator.ble_device, static=True)
+        return simulator
+
+    def get(self, address: str) -> Optional[Simulator]:
+        """
+        Returns the simulated device with the given address.
+
+        :param address: The address of the simulated device
+        """
+        return self.__simulators.get(address.upper())
+
+    def client(
+        self,
+        address_or_ble_device: Union[BLEDevice, str],
+        disconnected_callback: Optional[Callable[[SimulatedClient], None]] = None,
+        timeout: float = 10.0,
+        **kwargs,
+    ) -> SimulatedClient:
+        """
+        Creates a client for a simulated device, with the same arguments as `BleakClient`.
+        Pass this method as `client_factory` to `aiokonstsmide.device.Device`.
+        """
+        address = (
+            address_or_ble_device.address
+            if isinstance(address_or_ble_device, BLEDevice)
+            else address_or_ble_device
+        )
+        simulator = self.get(address)
+        if simulator is None:
+            raise BleakError(f"Device with address {address} was not found")
+        return SimulatedClient(simulator, disconnected_callback, timeout)
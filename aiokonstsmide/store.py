@@ -0,0 +1,270 @@
+"""
+Module for persisting the state of Konstsmide Bluetooth devices across restarts.
+
+Since the state can't be read from the devices, a device normally synchronizes its
+status when connecting and the timers have to be programmed again after a restart.
+With a state store, a device remembers the status, the programmed timers and the last
+time synchronization, so a restarted process can skip writes which wouldn't change anything.
+
+```python
+store = FileStateStore("devices.kst")
+async with aiokonstsmide.Device(address, store=store) as dev:
+    await dev.set_timers(timers)  # Only changed timers are written
+store.flush()
+```
+"""
+
+import asyncio
+import logging
+import math
+import os
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple, Union
+
+from . import message
+from .exceptions import DecodeError
+
+TIMER_SLOTS = 8
+
+FILE_HEADER = b"KSTA\x01"
+"""Magic bytes and version at the start of a state file."""
+
+RECORD_HEADER = struct.Struct("<B?BBBBd")
+"""Length of the address, on, function, brightness, flash speed,
+mask of the stored timers and the last time synchronization of a record."""
+
+TIMER_LENGTH = 10
+"""The length of a plaintext timer message."""
+
+
+@dataclass(frozen=True)
+class DeviceState:
+    """Dataclass to hold the stored state of a device."""
+
+    on: bool
+    function: message.Function
+    brightness: int
+    flash_speed: int
+    timers: Tuple[Optional[message.Timer], ...] = field(default=(None,) * TIMER_SLOTS)
+    """The programmed timers by timer number, `None` if unknown."""
+    rtc: Optional[float] = None
+    """The wall clock time of the last time synchronization or `None` if unknown."""
+
+
+class StateStore:
+    """
+    Stores the state of devices in memory.
+    Subclasses persist it by overriding `load` and `save`, see `FileStateStore`.
+    """
+
+    def __init__(self):
+        """Initializes a StateStore instance."""
+        self._states: Dict[str, DeviceState] = {}
+
+    def load(self, address: str) -> Optional[DeviceState]:
+        """
+        Returns the stored state of the device with the given address.
+
+        :param address: The address of the device
+
+        :return: The state or `None` if nothing is stored
+        """
+        return self._states.get(address.upper())
+
+    def save(self, address: str, state: DeviceState):
+        """
+        Stores the state of the device with the given address.
+        This is called by the device after each write which changed its state.
+
+        :param address: The address of the device
+        :param state: The state
+        """
+        self._states[address.upper()] = state
+
+    def remove(self, address: str):
+        """
+        Forgets the state of the device with the given address.
+
+        :param address: The address of the device
+        """
+        self._states.pop(address.upper(), None)
+
+
+class FileStateStore(StateStore):
+    """
+    Stores the state of devices in a file.
+
+    The file is read when the first state is loaded. Changes are written after a
+    short delay, so many changes in a row result in a single write. The file is
+    replaced atomically, so it's never corrupted, even if the process crashes.
+    Call `flush` before exiting to write pending changes.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], delay: float = 1.0):
+        """
+        Initializes a FileStateStore instance.
+
+        :param path: The path of the file
+        :param delay: Time in seconds changes are collected before they are written
+        """
+        if delay < 0:
+            raise ValueError(f"Delay must not be negative, got {delay}")
+
+        super().__init__()
+        self.__logger = logging.getLogger(__name__)
+        self.__path = os.fspath(path)
+        self.__delay = delay
+        self.__loaded = False
+        self.__dirty = False
+        self.__task: Optional[asyncio.Task] = None
+        self.__version = 0
+        self.__written = 0
+        self.__lock = threading.Lock()
+
+    def load(self, address: str) -> Optional[DeviceState]:
+        self.__load()
+        return super().load(address)
+
+    def save(self, address: str, state: DeviceState):
+        self.__load()
+        super().save(address, state)
+        self.__schedule()
+
+    def remove(self, address: str):
+        self.__load()
+        super().remove(address)
+        self.__schedule()
+
+    def flush(self):
+        """Writes pending changes to the file immediately."""
+        if self.__task:
+            self.__task.cancel()
+            self.__task = None
+        if self.__dirty:
+            self.__write(*self.__serialize())
+
+    def __load(self):
+        if self.__loaded:
+            return
+        self.__loaded = True
+        try:
+            with open(self.__path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        try:
+            self._states.update(_deserialize(data))
+        except (DecodeError, ValueError) as exc:
+            self.__logger.error(f"Ignoring invalid state file {self.__path}: {exc}")
+
+    def __schedule(self):
+        self.__dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if not self.__task or self.__task.done():
+            self.__task = loop.create_task(self.__flush_later())
+
+    async def __flush_later(self):
+        await asyncio.sleep(self.__delay)
+        try:
+            # Written in an executor to not block the event loop on slow disks
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.__write, *self.__serialize()
+            )
+        except OSError as exc:
+            # Kept pending, so the next change or flush writes them again
+            self.__dirty = True
+            self.__logger.error(f"Failed to write state file {self.__path}: {exc}")
+
+    def __serialize(self) -> Tuple[bytes, int]:
+        """Returns the content of the file and its version."""
+        self.__dirty = False
+        self.__version += 1
+        parts = [FILE_HEADER]
+        for address, state in self._states.items():
+            encoded = address.encode("ascii")
+            mask = sum(1 << num for num, timer in enumerate(state.timers) if timer)
+            parts.append(
+                RECORD_HEADER.pack(
+                    len(encoded),
+                    state.on,
+                    state.function.value,
+                    state.brightness,
+                    state.flash_speed,
+                    mask,
+                    math.nan if state.rtc is None else state.rtc,
+                )
+            )
+            parts.append(encoded)
+            parts.extend(timer.data for timer in state.timers if timer)
+        return b"".join(parts), self.__version
+
+    def __write(self, data: bytes, version: int):
+        with self.__lock:
+            # A newer version might have been written by flush in the meantime
+            if version <= self.__written:
+                return
+            directory = os.path.dirname(os.path.abspath(self.__path))
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-state-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.__path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            self.__written = version
+
+
+def _deserialize(data: bytes) -> Dict[str, DeviceState]:
+    if not data.startswith(FILE_HEADER):
+        raise DecodeError("Not a state file or unsupported version.")
+
+    states = {}
+    pos = len(FILE_HEADER)
+    while pos < len(data):
+        if len(data) - pos < RECORD_HEADER.size:
+            raise DecodeError("Incomplete record in state file.")
+        (
+            address_len,
+            on,
+            function,
+            brightness,
+            flash_speed,
+            mask,
+            rtc,
+        ) = RECORD_HEADER.unpack_from(data, pos)
+        pos += RECORD_HEADER.size
+        end = pos + address_len
+        address = data[pos:end].decode("ascii")
+        pos = end
+
+        timers = []
+        for num in range(TIMER_SLOTS):
+            if mask & (1 << num):
+                end = pos + TIMER_LENGTH
+                timer = message.parse(data[pos:end])
+                if not isinstance(timer, message.Timer):
+                    raise DecodeError("Invalid timer in state file.")
+                timers.append(timer)
+                pos = end
+            else:
+                timers.append(None)
+
+        states[address] = DeviceState(
+            on,
+            message.Function(function),
+            brightness,
+            flash_speed,
+            tuple(timers),
+            None if math.isnan(rtc) else rtc,
+        )
+    return states
@@ -0,0 +1,15 @@
+"""
+Microbenchmarks for the hot paths of aiokonstsmide.
+
+Run them from the repository root with:
+
+```console
+$ python -m benchmarks                  # run and print the results
+$ python -m benchmarks --compare        # compare against the stored baseline
+$ python -m benchmarks --save           # store the results as new baseline
+$ python -m benchmarks -k codec         # only run benchmarks matching a pattern
+```
+
+Device benchmarks use simulated devices without latency,
+so they measure the overhead of the library itself.
+"""
@@ -0,0 +1,90 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from .suite import Result, run
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def load_baseline(path: Path) -> Dict[str, dict]:
+    if not path.exists():
+        return {}
+    with path.open() as f:
+        return json.load(f)
+
+
+def save_baseline(path: Path, results: List[Result]):
+    baseline = load_baseline(path)
+    for result in results:
+        baseline[result.name] = {
+            "ops": round(result.ops, 1),
+            "peak_bytes": result.peak_bytes,
+        }
+    with path.open("w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def report(results: List[Result], baseline: Dict[str, dict], tolerance: float) -> int:
+    """Prints the results and returns the number of regressions."""
+    regressions = 0
+    print(f"{'benchmark':<28} {'ops/s':>12} {'peak bytes':>11} {'vs baseline':>12}")
+    for result in results:
+        peak = "-" if result.peak_bytes is None else str(result.peak_bytes)
+        line = f"{result.name:<28} {result.ops:>12,.0f} {peak:>11}"
+        base = baseline.get(result.name)
+        if base:
+            ratio = result.ops / base["ops"]
+            line += f" {ratio:>11.2f}x"
+            if ratio < 1 - tolerance:
+                line += "  REGRESSION"
+                regressions += 1
+            base_peak = base.get("peak_bytes")
+            if (
+                base_peak is not None
+                and result.peak_bytes is not None
+                and result.peak_bytes > base_peak * (1 + tolerance)
+            ):
+                line += f"  ALLOCATION REGRESSION (was {base_peak})"
+                regressions += 1
+        print(line)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Runs the microbenchmarks."
+    )
+    parser.add_argument("-k", "--pattern", default="", help="only run matching")
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="minimum seconds per benchmark"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as baseline"
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="exit with an error if a benchmark is slower or allocates more than the baseline",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown and allocation increase relative to the baseline, default 0.25",
+    )
+    args = parser.parse_args()
+
+    results = run(args.pattern, args.min_time)
+    regressions = report(results, load_baseline(args.baseline), args.tolerance)
+    if args.save:
+        save_baseline(args.baseline, results)
+    return 1 if args.compare and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Definitions of the benchmarks."""
+
+import asyncio
+import time
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from aiokonstsmide import Device, DeviceGroup, codec, message
+from aiokonstsmide.simulator import SimulatedAdapter
+
+
+@dataclass
+class Result:
+    """Dataclass to hold the result of a benchmark."""
+
+    name: str
+    ops: float
+    """Operations per second."""
+    peak_bytes: Optional[int]
+    """Peak memory allocated by a single operation or `None` if not measured."""
+
+
+Operation = Callable[[int], Awaitable[object]]
+
+
+@dataclass
+class AsyncBenchmark:
+    """Dataclass to hold a registered async benchmark."""
+
+    setup: Callable[[], Awaitable[Operation]]
+    """Prepares the benchmark and returns a single operation, which is called with its index."""
+    writes: int = 1
+    """Number of device writes per operation, the results are reported per write."""
+    concurrent: bool = False
+    """Run the timed operations concurrently instead of one after another."""
+
+
+SYNC_BENCHMARKS: Dict[str, Callable[[], object]] = {}
+ASYNC_BENCHMARKS: Dict[str, AsyncBenchmark] = {}
+
+
+def sync_benchmark(name: str):
+    """Registers a function which is called repeatedly."""
+
+    def decorator(func):
+        SYNC_BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def async_benchmark(name: str, writes: int = 1, concurrent: bool = False):
+    """Registers a coroutine which prepares the benchmark and returns a single operation."""
+
+    def decorator(func):
+        ASYNC_BENCHMARKS[name] = AsyncBenchmark(func, writes, concurrent)
+        return func
+
+    return decorator
+
+
+PLAIN = message.control(message.Function.Twinkle, 80, 40)
+ENCODED = codec.encode(PLAIN)
+PLAIN_BATCH = [message.on_off(True), PLAIN, message.rtc(datetime.now())] * 10
+ENCODED_BATCH = codec.encode_many(PLAIN_BATCH)
+NOW = datetime.now()
+
+
+@sync_benchmark("codec.encode")
+def bench_encode():
+    return codec.encode(PLAIN)
+
+
+@sync_benchmark("codec.encode[key]")
+def bench_encode_key():
+    return codec.encode(PLAIN, 0x42)
+
+
+@sync_benchmark("codec.decode")
+def bench_decode():
+    return codec.decode(ENCODED)
+
+
+@sync_benchmark("codec.encode_many[30]")
+def bench_encode_many():
+    return codec.encode_many(PLAIN_BATCH)
+
+
+@sync_benchmark("codec.decode_many[30]")
+def bench_decode_many():
+    return codec.decode_many(ENCODED_BATCH)
+
+
+@sync_benchmark("message.on_off")
+def bench_on_off():
+    return message.on_off(True)
+
+
+@sync_benchmark("message.control")
+def bench_control():
+    return message.control(message.Function.Twinkle, 80, 40)
+
+
+@sync_benchmark("message.timer")
+def bench_timer():
+    return message.timer(
+        3,
+        True,
+        True,
+        16,
+        30,
+        message.Function.Steady,
+        [message.Repeat.Weekend],
+        100,
+    )
+
+
+@sync_benchmark("message.rtc")
+def bench_rtc():
+    return message.rtc(NOW)
+
+
+@sync_benchmark("message.Control")
+def bench_control_frame():
+    return message.Control(message.Function.Twinkle, 80, 40)
+
+
+@sync_benchmark("message.parse")
+def bench_parse():
+    return message.parse(PLAIN)
+
+
+@sync_benchmark("message.parse_many[30]")
+def bench_parse_many():
+    return message.parse_many(ENCODED_BATCH)
+
+
+async def _connected_devices(count: int, **kwargs) -> List[Device]:
+    adapter = SimulatedAdapter()
+    devices = [
+        Device(
+            adapter.add(f"f8:dc:f0:2a:{i // 256:02x}:{i % 256:02x}").ble_device,
+            client_factory=adapter.client,
+            **kwargs,
+        )
+        for i in range(count)
+    ]
+    for dev in devices:
+        await dev.connect()
+    return devices
+
+
+@async_benchmark("Device.on")
+async def bench_device_on() -> Operation:
+    (dev,) = await _connected_devices(1)
+    return lambda i: dev.on()
+
+
+@async_benchmark("Device.control")
+async def bench_device_control() -> Operation:
+    (dev,) = await _connected_devices(1)
+    return lambda i: dev.control(brightness=i % 100 + 1)
+
+
+@async_benchmark("Device.control[coalesce]", concurrent=True)
+async def bench_device_control_coalesce() -> Operation:
+    (dev,) = await _connected_devices(1, coalesce=True)
+    return lambda i: dev.control(brightness=i % 100 + 1)
+
+
+def _group_benchmark(count: int):
+    async def bench() -> Operation:
+        group = DeviceGroup(await _connected_devices(count), max_concurrency=count)
+        return lambda i: group.control(brightness=i % 100 + 1)
+
+    return bench
+
+
+for _count in (10, 50):
+    async_benchmark(f"DeviceGroup.control[{_count}]", writes=_count)(
+        _group_benchmark(_count)
+    )
+
+
+def measure_sync(name: str, func: Callable[[], object], min_time: float) -> Result:
+    """Measures the operations per second and the peak memory of a single call."""
+    func()
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    while elapsed < min_time:
+        number *= 2
+        elapsed = timer.timeit(number)
+    return Result(name, number / elapsed, _peak_bytes(func))
+
+
+def measure_async(name: str, benchmark: AsyncBenchmark, min_time: float) -> Result:
+    """
+    Measures the device writes per second of an async benchmark
+    and the peak memory of a single operation, e.g. a fan-out to all devices of a group.
+    """
+
+    async def measure() -> Result:
+        operation = await benchmark.setup()
+        await operation(0)
+
+        tracemalloc.start()
+        try:
+            await operation(1)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        ops = max(100 // benchmark.writes, 1)
+        while True:
+            start = time.perf_counter()
+            if benchmark.concurrent:
+                await asyncio.gather(*(operation(i) for i in range(ops)))
+            else:
+                for i in range(ops):
+                    await operation(i)
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                return Result(name, ops * benchmark.writes / elapsed, peak)
+            ops *= 2
+
+    return asyncio.run(measure())
+
+
+def _peak_bytes(func: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(pattern: str = "", min_time: float = 0.2) -> List[Result]:
+    """
+    Runs all benchmarks whose name contains the given pattern.
+
+    :param pattern: Only run benchmarks containing this pattern
+    :param min_time: Minimum time in seconds each benchmark runs
+
+    :return: The results
+    """
+    results = [
+        measure_sync(name, func, min_time)
+        for name, func in SYNC_BENCHMARKS.items()
+        if pattern in name
+    ]
+    results += [
+        measure_async(name, func, min_time)
+        for name, func in ASYNC_BENCHMARKS.items()
+        if pattern in name
+    ]
+    return results
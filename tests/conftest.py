@@ -0,0 +1,13 @@
+"""Shared fixtures for the tests."""
+
+import pytest
+
+from aiokonstsmide import scanner
+
+
+@pytest.fixture(autouse=True)
+def clear_scan_cache():
+    """Makes sure devices seen by one test aren't known to other tests."""
+    scanner.scan_cache.clear()
+    yield
+    scanner.scan_cache.clear()
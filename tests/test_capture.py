@@ -0,0 +1,71 @@
+"""Tests for the capture module."""
+
+import io
+
+import pytest
+
+from aiokonstsmide import codec, device, message
+from aiokonstsmide.capture import Capture, CaptureRecord, read_capture, write_capture
+from aiokonstsmide.exceptions import DecodeError
+from aiokonstsmide.simulator import SimulatedAdapter
+
+
+def test_capture():
+    capture = Capture(size=3)
+    for brightness in range(5):
+        plaintext = message.control(message.Function.Steady, brightness, 50)
+        capture.record("f8:dc:f0:2a:d3:01", plaintext, codec.encode(plaintext))
+    assert len(capture) == 3
+    assert capture.overwritten == 2
+    assert [record.frame.brightness for record in capture] == [2, 3, 4]
+    assert capture.records[0].timestamp <= capture.records[-1].timestamp
+
+    capture.clear()
+    assert len(capture) == 0
+    assert capture.overwritten == 0
+
+    with pytest.raises(ValueError):
+        Capture(size=0)
+
+
+def test_capture_file(tmp_path):
+    records = [
+        CaptureRecord(1.5, "f8:dc:f0:2a:d3:01", message.on_off(True), b"\x01\x02"),
+        CaptureRecord(2.25, "AB-CD", b"", b""),
+        CaptureRecord(3.0, "", b"\xBC\x01", codec.encode(b"\xBC\x01", 0x10)),
+    ]
+    path = tmp_path / "test.kcap"
+    assert write_capture(path, records) == 3
+    assert list(read_capture(path)) == records
+    assert list(read_capture(str(path))) == records
+
+    # Streamed from a file object
+    data = path.read_bytes()
+    reader = read_capture(io.BytesIO(data))
+    assert next(reader) == records[0]
+
+    # Invalid files
+    with pytest.raises(DecodeError):
+        list(read_capture(io.BytesIO(b"KCAP\x02")))
+    with pytest.raises(DecodeError):
+        list(read_capture(io.BytesIO(data[:-1])))
+    with pytest.raises(DecodeError):
+        list(read_capture(io.BytesIO(data[:8])))
+
+
+@pytest.mark.asyncio
+async def test_device_capture(tmp_path):
+    adapter = SimulatedAdapter()
+    sim = adapter.add("f8:dc:f0:2a:d3:01")
+    capture = Capture()
+    async with device.Device(
+        sim.ble_device, client_factory=adapter.client, capture=capture
+    ) as dev:
+        await dev.control(message.Function.Chasing, 30, 40)
+    assert [record.plaintext for record in capture] == sim.frames
+    assert all(record.address == "f8:dc:f0:2a:d3:01" for record in capture)
+    assert all(codec.decode(record.encoded) == record.plaintext for record in capture)
+
+    path = tmp_path / "device.kcap"
+    assert capture.dump(path) == len(capture)
+    assert list(read_capture(path)) == capture.records
@@ -65,3 +65,36 @@ def test_encode():
     # Invalid empty message
     with pytest.raises(EncodeError):
         codec.encode(b"")
+
+    # Fixed key
+    msg = b"\xBC\x01\x01\x00\x00\x00\x00\x00\x00"
+    assert (
+        codec.encode(msg, 0xB4) == b"\x54\x5E\xE0\x08\xB5\xB5\xB4\xB4\xB4\xB4\xB4\xB4"
+    )
+    assert codec.encode(msg, 0x12) == codec.encode(msg, 0x12)
+    with pytest.raises(EncodeError):
+        codec.encode(msg, 256)
+
+    # Other buffer types
+    for data in (bytearray(msg), memoryview(msg), list(msg)):
+        assert codec.encode(data, 0xB4) == codec.encode(msg, 0xB4)
+        assert codec.decode(codec.encode(data)) == msg
+
+
+def test_encode_decode_many():
+    msgs = [
+        b"\xBC\x04\x00\x01\xE2\x40\x00\x00\x00",
+        b"\xBC\x05\x06\x00\x00\x09\x00\x7F\x01\x64",
+        b"\xBC\x01\x00\x00\x00\x00\x00\x00\x00",
+    ]
+    buffer = codec.encode_many(msgs)
+    assert len(buffer) == sum(len(msg) + 3 for msg in msgs)
+    assert codec.decode_many(buffer) == msgs
+    assert codec.decode_many(bytearray(buffer)) == msgs
+    assert codec.decode_many(b"") == []
+
+    # Incomplete message at the end
+    with pytest.raises(DecodeError):
+        codec.decode_many(buffer[:-1])
+    with pytest.raises(DecodeError):
+        codec.decode_many(buffer + b"\x54")
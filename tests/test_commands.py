@@ -0,0 +1,165 @@
+"""Tests for the commands module."""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from aiokonstsmide import QueueFullError, TimerSetting, device, message
+from aiokonstsmide.commands import CommandQueue, OverflowPolicy, Priority
+from aiokonstsmide.simulator import SimulatedAdapter
+
+
+class Writer:
+    """Records the written messages, the first write blocks until released."""
+
+    def __init__(self):
+        self.written = []
+        self.release = asyncio.Event()
+
+    def __call__(self, data: bytes):
+        async def write():
+            await self.release.wait()
+            self.written.append(data)
+            return True
+
+        return write
+
+
+def timer(num: int, hour: int = 12) -> bytes:
+    return message.timer(
+        num, True, True, hour, 0, message.Function.Keep, [message.Repeat.Everyday], 100
+    )
+
+
+@pytest.mark.asyncio
+async def test_command_queue_priority():
+    queue = CommandQueue()
+    writer = Writer()
+
+    def submit(data: bytes, priority=None):
+        return asyncio.create_task(queue.submit(data, writer(data), priority))
+
+    # The first command is written while the others are queued
+    tasks = [submit(message.rtc(datetime(2023, 1, 1)), Priority.Background)]
+    await asyncio.sleep(0)
+    tasks += [
+        submit(timer(0)),
+        submit(timer(1)),
+        submit(message.control(message.Function.Twinkle, 10, 50)),
+        submit(message.on_off(False)),
+        submit(message.on_off(True)),
+        submit(timer(0, 13)),
+    ]
+    await asyncio.sleep(0)
+    assert queue.depth == 4
+    assert queue.depth_by_priority() == {
+        Priority.Interactive: 0,
+        Priority.Control: 2,
+        Priority.Maintenance: 2,
+        Priority.Background: 0,
+    }
+
+    writer.release.set()
+    results = await asyncio.gather(*tasks)
+    assert results == [True, False, True, True, False, True, True]
+    assert writer.written == [
+        message.rtc(datetime(2023, 1, 1)),
+        # On/off stays behind the earlier control, the older off was superseded
+        message.control(message.Function.Twinkle, 10, 50),
+        message.on_off(True),
+        timer(1),
+        timer(0, 13),
+    ]
+    stats = queue.stats
+    assert stats.submitted == 7
+    assert stats.written == 5
+    assert stats.superseded == 2
+    assert stats.max_depth == 4
+    assert stats.max_wait > 0
+    assert queue.depth == 0
+
+
+@pytest.mark.asyncio
+async def test_command_queue_overflow():
+    writer = Writer()
+
+    # Reject
+    queue = CommandQueue(max_depth=2, overflow=OverflowPolicy.Reject)
+    first = asyncio.create_task(queue.submit(timer(0), writer(timer(0))))
+    await asyncio.sleep(0)
+    queued = [
+        asyncio.create_task(queue.submit(timer(i), writer(timer(i)))) for i in (1, 2)
+    ]
+    await asyncio.sleep(0)
+    with pytest.raises(QueueFullError):
+        await queue.submit(timer(3), writer(timer(3)))
+    assert queue.stats.rejected == 1
+
+    # Drop the lowest priority
+    queue = CommandQueue(max_depth=2, overflow=OverflowPolicy.DropLowest)
+    writer.release.clear()
+    lowest = [
+        asyncio.create_task(queue.submit(timer(i), writer(timer(i)))) for i in (4, 5, 6)
+    ]
+    await asyncio.sleep(0)
+    on = asyncio.create_task(
+        queue.submit(message.on_off(True), writer(message.on_off(True)))
+    )
+    await asyncio.sleep(0)
+    assert queue.stats.dropped == 1
+    with pytest.raises(QueueFullError):
+        await queue.submit(timer(7), writer(timer(7)), priority=Priority.Background)
+
+    # Block
+    blocking = CommandQueue(max_depth=1)
+    blocked = [
+        asyncio.create_task(blocking.submit(timer(i), writer(timer(i))))
+        for i in (0, 1, 2)
+    ]
+    await asyncio.sleep(0)
+    assert blocking.depth == 1
+    assert not any(task.done() for task in blocked)
+
+    writer.release.set()
+    await asyncio.gather(first, *queued, on, *blocked)
+    done, _ = await asyncio.wait(lowest)
+    assert sum(1 for task in done if task.exception()) == 1
+    assert blocking.stats.written == 3
+
+    with pytest.raises(ValueError):
+        CommandQueue(max_depth=0)
+
+
+@pytest.mark.asyncio
+async def test_command_queue_cancel():
+    queue = CommandQueue()
+    writer = Writer()
+    first = asyncio.create_task(queue.submit(timer(0), writer(timer(0))))
+    second = asyncio.create_task(queue.submit(timer(1), writer(timer(1))))
+    await asyncio.sleep(0)
+    second.cancel()
+    await asyncio.sleep(0)
+    assert queue.depth == 0
+    writer.release.set()
+    assert await first is True
+    assert writer.written == [timer(0)]
+
+
+@pytest.mark.asyncio
+async def test_device_queue():
+    adapter = SimulatedAdapter()
+    sim = adapter.add("f8:dc:f0:2a:d3:01", latency=0.005)
+    async with device.Device(
+        sim.ble_device, client_factory=adapter.client, queue=CommandQueue()
+    ) as dev:
+        timers = [TimerSetting(True, hour, 0) for hour in range(8)]
+        programming = asyncio.create_task(dev.set_timers(timers))
+        await asyncio.sleep(0.012)
+        await dev.off()
+        assert sim.state.on is False
+        assert len(sim.state.timers) < 8
+
+        assert await programming == list(range(8))
+        assert len(sim.state.timers) == 8
+        assert dev.queue.stats.written == dev.queue.stats.submitted
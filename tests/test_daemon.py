@@ -0,0 +1,129 @@
+"""Tests for the daemon module."""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from aiokonstsmide import DaemonError, Function, message
+from aiokonstsmide.__main__ import parse_args, run_client
+from aiokonstsmide.daemon import Daemon, request
+from aiokonstsmide.simulator import SimulatedAdapter
+
+ADDRESS = "F8:DC:F0:2A:D3:01"
+
+
+@pytest.fixture
+def adapter():
+    adapter = SimulatedAdapter()
+    adapter.add(ADDRESS, latency=0.01)
+    return adapter
+
+
+@pytest.mark.asyncio
+async def test_daemon(adapter, tmp_path):
+    path = str(tmp_path / "daemon.sock")
+    with pytest.raises(DaemonError):
+        await request("ping", path)
+
+    umask = os.umask(0o022)
+    async with Daemon(path, client_factory=adapter.client) as daemon:
+        assert os.stat(path).st_mode & 0o777 == 0o600
+        assert os.umask(umask) == 0o022
+        assert await request("ping", path) == "pong"
+
+        # Devices are connected once and stay connected
+        status = await request("on", path, address=ADDRESS.lower())
+        assert status == {
+            "address": ADDRESS,
+            "connected": True,
+            "on": True,
+            "function": "Steady",
+            "brightness": 100,
+            "flash_speed": 50,
+        }
+        status = await request(
+            "control", path, address=ADDRESS, function="Twinkle", brightness=30
+        )
+        assert status["function"] == "Twinkle" and status["brightness"] == 30
+        sim = adapter.get(ADDRESS)
+        assert sim.state.function == Function.Twinkle and sim.state.brightness == 30
+        assert (await request("status", path, address=ADDRESS))["on"]
+        stats = await request("stats", path)
+        assert stats["misses"] == 1 and stats["hits"] == 2
+
+        # Errors are reported
+        for params in (
+            {"command": "dance", "address": ADDRESS},
+            {"command": "on"},
+            {"command": "control", "address": ADDRESS, "function": "Disco"},
+        ):
+            with pytest.raises(DaemonError):
+                await request(path=path, **params)
+
+        # A second daemon can't use the same socket
+        with pytest.raises(DaemonError):
+            await Daemon(path).start()
+
+        assert await request("disconnect", path, address=ADDRESS)
+        assert not sim.is_connected
+        assert not await request("disconnect", path, address=ADDRESS)
+        assert daemon.pool.stats.connections == 0
+    assert not os.path.exists(path)
+
+
+@pytest.mark.asyncio
+async def test_daemon_batching(adapter, tmp_path):
+    path = str(tmp_path / "daemon.sock")
+    async with Daemon(path, client_factory=adapter.client):
+        await request("off", path, address=ADDRESS)
+        sim = adapter.get(ADDRESS)
+        sent = len(sim.frames)
+
+        # Concurrent requests for a device are batched into the latest status
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b"not json\n")
+        for brightness in range(10, 101, 10):
+            request_line = {
+                "id": brightness,
+                "command": "control",
+                "address": ADDRESS,
+                "brightness": brightness,
+            }
+            writer.write(json.dumps(request_line).encode() + b"\n")
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in range(11)]
+        writer.close()
+        await writer.wait_closed()
+
+        assert sorted(r["id"] for r in responses if r["ok"]) == list(range(10, 101, 10))
+        assert [r["id"] for r in responses if not r["ok"]] == [None]
+        assert sim.state.brightness == 100
+        assert len(sim.frames) - sent < 10
+        assert message.parse(sim.frames[-1]) == message.Control(
+            Function.Steady, 100, 50
+        )
+
+    # Stale socket files are replaced
+    with open(path, "w"):
+        pass
+    async with Daemon(path, client_factory=adapter.client):
+        assert await request("ping", path) == "pong"
+
+
+@pytest.mark.asyncio
+async def test_client(adapter, tmp_path, capsys):
+    path = str(tmp_path / "daemon.sock")
+    async with Daemon(path, client_factory=adapter.client):
+        args = parse_args(["--socket", path, "control", ADDRESS, "-f", "SloGlo"])
+        await run_client(args)
+        assert json.loads(capsys.readouterr().out)["function"] == "SloGlo"
+
+        await run_client(parse_args(["--socket", path, "sync-time", ADDRESS]))
+        assert adapter.get(ADDRESS).state.clock is not None
+
+    args = parse_args(["daemon", "--adapter", "hci1", "--idle-timeout", "60"])
+    assert args.adapter == "hci1" and args.idle_timeout == 60.0
+    with pytest.raises(SystemExit):
+        parse_args(["control", ADDRESS, "-f", "Keep"])
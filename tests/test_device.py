@@ -1,11 +1,22 @@
 """Tests for the scanner module."""
 
+import asyncio
+import time
 from unittest import mock
 
 import pytest
+from bleak import BleakError
 from bleak.backends.device import BLEDevice
 
-from aiokonstsmide import DeviceNotFoundError, Function, Repeat, device
+from aiokonstsmide import (
+    DeviceNotFoundError,
+    Function,
+    Repeat,
+    codec,
+    device,
+    message,
+    scanner,
+)
 
 
 @pytest.mark.asyncio
@@ -28,7 +39,11 @@ async def test_connect(
     def connect():
         mock_is_connected.return_value = True
 
-    mock_fdba.return_value = BLEDevice("f8:dc:f0:2a:d3:ff", "Konstsmide")
+    mock_fdba.return_value = BLEDevice(
+        "f8:dc:f0:2a:d3:ff",
+        "Konstsmide",
+        {"path": "/org/bluez/hci0/dev_F8_DC_F0_2A_D3_FF"},
+    )
     mock_connect.side_effect = connect
     mock_is_connected.return_value = False
 
@@ -63,7 +78,11 @@ async def test_device_async_context_manager(
     def connect():
         mock_is_connected.return_value = True
 
-    mock_fdba.return_value = BLEDevice("f8:dc:f0:2a:d3:ff", "Konstsmide")
+    mock_fdba.return_value = BLEDevice(
+        "f8:dc:f0:2a:d3:ff",
+        "Konstsmide",
+        {"path": "/org/bluez/hci0/dev_F8_DC_F0_2A_D3_FF"},
+    )
     mock_connect.side_effect = connect
     mock_is_connected.return_value = False
 
@@ -97,7 +116,11 @@ async def test_device_control_and_properties(
     def connect():
         mock_is_connected.return_value = True
 
-    mock_fdba.return_value = BLEDevice("f8:dc:f0:2a:d3:ff", "Konstsmide")
+    mock_fdba.return_value = BLEDevice(
+        "f8:dc:f0:2a:d3:ff",
+        "Konstsmide",
+        {"path": "/org/bluez/hci0/dev_F8_DC_F0_2A_D3_FF"},
+    )
     mock_connect.side_effect = connect
     mock_is_connected.return_value = False
 
@@ -184,3 +207,345 @@ async def test_device_control_and_properties(
         assert dev.function == Function.InWaves
         assert dev.brightness == 33
         assert dev.flash_speed == 99
+
+
+@pytest.mark.asyncio
+@mock.patch(
+    "aiokonstsmide.device.BleakClient.is_connected", new_callable=mock.PropertyMock
+)
+@mock.patch("aiokonstsmide.device.BleakClient.connect")
+@mock.patch("aiokonstsmide.device.BleakClient.write_gatt_char")
+@mock.patch("aiokonstsmide.device.BleakClient.disconnect")
+@mock.patch("bleak.BleakScanner.find_device_by_address")
+async def test_device_coalesce(
+    mock_fdba, mock_disconnect, mock_write_gatt_char, mock_connect, mock_is_connected
+):
+    def connect():
+        mock_is_connected.return_value = True
+
+    mock_fdba.return_value = BLEDevice(
+        "f8:dc:f0:2a:d3:ff",
+        "Konstsmide",
+        {"path": "/org/bluez/hci0/dev_F8_DC_F0_2A_D3_FF"},
+    )
+    mock_connect.side_effect = connect
+    mock_is_connected.return_value = False
+
+    async with device.Device("f8:dc:f0:2a:d3:ff", coalesce=True) as dev:
+        mock_write_gatt_char.reset_mock()
+
+        # Only the latest status is sent
+        await asyncio.gather(*(dev.control(brightness=b) for b in range(1, 21)))
+        mock_write_gatt_char.assert_called_once()
+        assert codec.decode(mock_write_gatt_char.call_args.args[1]) == message.control(
+            Function.Steady, 20, 50
+        )
+        assert dev.brightness == 20
+        mock_write_gatt_char.reset_mock()
+
+        # Control while turned off is deferred until turned on again
+        await asyncio.gather(dev.off(), dev.control(brightness=30), dev.off())
+        mock_write_gatt_char.assert_called_once()
+        assert codec.decode(mock_write_gatt_char.call_args.args[1]) == message.on_off(
+            False
+        )
+        mock_write_gatt_char.reset_mock()
+
+        await dev.on()
+        mock_write_gatt_char.assert_called_once()
+        assert codec.decode(mock_write_gatt_char.call_args.args[1]) == message.control(
+            Function.Steady, 30, 50
+        )
+
+    with pytest.raises(ValueError):
+        device.Device("f8:dc:f0:2a:d3:ff", max_rate=0)
+
+
+@pytest.mark.asyncio
+@mock.patch(
+    "aiokonstsmide.device.BleakClient.is_connected", new_callable=mock.PropertyMock
+)
+@mock.patch("aiokonstsmide.device.BleakClient.connect")
+@mock.patch("aiokonstsmide.device.BleakClient.write_gatt_char")
+@mock.patch("aiokonstsmide.device.BleakClient.disconnect")
+@mock.patch("bleak.BleakScanner.find_device_by_address")
+async def test_device_suppress_noop(
+    mock_fdba, mock_disconnect, mock_write_gatt_char, mock_connect, mock_is_connected
+):
+    def connect():
+        mock_is_connected.return_value = True
+
+    mock_fdba.return_value = BLEDevice(
+        "f8:dc:f0:2a:d3:ff",
+        "Konstsmide",
+        {"path": "/org/bluez/hci0/dev_F8_DC_F0_2A_D3_FF"},
+    )
+    mock_connect.side_effect = connect
+    mock_is_connected.return_value = False
+
+    async with device.Device("f8:dc:f0:2a:d3:ff", suppress_noop=True) as dev:
+        # Status is always sent when connecting
+        mock_write_gatt_char.assert_has_calls(
+            [mock.call(device.CHARACTERISTIC, mock.ANY)] * 4
+        )
+        mock_write_gatt_char.reset_mock()
+
+        # Unchanged status is not sent
+        await dev.on()
+        await dev.control(Function.Steady, 100, 50)
+        mock_write_gatt_char.assert_not_called()
+
+        # Changed status is sent
+        await dev.control(brightness=20)
+        await dev.off()
+        assert mock_write_gatt_char.call_count == 2
+        mock_write_gatt_char.reset_mock()
+
+        # Forced
+        await dev.off(force=True)
+        mock_write_gatt_char.assert_called_once()
+        mock_write_gatt_char.reset_mock()
+
+        # Status is unknown after connection loss
+        mock_is_connected.return_value = False
+        await dev.on()
+        mock_is_connected.return_value = True
+        await dev.on()
+        mock_write_gatt_char.assert_called_once()
+
+
+@pytest.mark.asyncio
+@mock.patch(
+    "aiokonstsmide.device.BleakClient.is_connected", new_callable=mock.PropertyMock
+)
+@mock.patch("aiokonstsmide.device.BleakClient.connect")
+@mock.patch("aiokonstsmide.device.BleakClient.write_gatt_char")
+@mock.patch("aiokonstsmide.device.BleakClient.disconnect")
+@mock.patch("bleak.BleakScanner.find_device_by_address")
+async def test_connect_known_device(
+    mock_fdba, mock_disconnect, mock_write_gatt_char, mock_connect, mock_is_connected
+):
+    ble_device = BLEDevice(
+        "f8:dc:f0:2a:d3:ff",
+        "Konstsmide",
+        {"path": "/org/bluez/hci0/dev_F8_DC_F0_2A_D3_FF"},
+    )
+
+    def connect():
+        mock_is_connected.return_value = True
+
+    mock_fdba.return_value = ble_device
+    mock_connect.side_effect = connect
+    mock_is_connected.return_value = False
+
+    # Already discovered device doesn't need a scan
+    dev = await device.connect(ble_device)
+    assert dev.address == "f8:dc:f0:2a:d3:ff"
+    mock_fdba.assert_not_called()
+    await dev.disconnect()
+
+    # Recently seen device doesn't need a scan
+    scanner.scan_cache.add(ble_device)
+    dev = await device.connect("f8:dc:f0:2a:d3:ff")
+    mock_fdba.assert_not_called()
+    await dev.disconnect()
+
+    # Stale device is scanned for after failing to connect
+    def connect_stale():
+        mock_connect.side_effect = connect
+        raise BleakError("Device not found")
+
+    mock_is_connected.return_value = False
+    mock_connect.reset_mock()
+    mock_connect.side_effect = connect_stale
+    scanner.scan_cache.add(ble_device)
+    dev = await device.connect("f8:dc:f0:2a:d3:ff")
+    mock_fdba.assert_called_once()
+    assert mock_connect.call_count == 2
+    assert dev.is_connected
+
+
+@pytest.mark.asyncio
+@mock.patch(
+    "aiokonstsmide.device.BleakClient.is_connected", new_callable=mock.PropertyMock
+)
+@mock.patch("aiokonstsmide.device.BleakClient.connect")
+@mock.patch("aiokonstsmide.device.BleakClient.write_gatt_char")
+@mock.patch("aiokonstsmide.device.BleakClient.disconnect")
+@mock.patch("bleak.BleakScanner.find_device_by_address")
+async def test_device_write_without_response(
+    mock_fdba, mock_disconnect, mock_write_gatt_char, mock_connect, mock_is_connected
+):
+    def connect():
+        mock_is_connected.return_value = True
+
+    mock_fdba.return_value = BLEDevice(
+        "f8:dc:f0:2a:d3:ff",
+        "Konstsmide",
+        {"path": "/org/bluez/hci0/dev_F8_DC_F0_2A_D3_FF"},
+    )
+    mock_connect.side_effect = connect
+    mock_is_connected.return_value = False
+
+    # By default the write type of bleak is used
+    async with device.Device("f8:dc:f0:2a:d3:ff") as dev:
+        assert all(
+            "response" not in c.kwargs for c in mock_write_gatt_char.call_args_list
+        )
+    mock_write_gatt_char.reset_mock()
+    mock_is_connected.return_value = False
+
+    async with device.Device("f8:dc:f0:2a:d3:ff", write_without_response=True) as dev:
+        # Password, status and time
+        assert [c.kwargs["response"] for c in mock_write_gatt_char.call_args_list] == [
+            True,
+            False,
+            False,
+            True,
+        ]
+        mock_write_gatt_char.reset_mock()
+
+        await dev.control(brightness=10)
+        mock_write_gatt_char.assert_called_once_with(
+            device.CHARACTERISTIC, mock.ANY, response=False
+        )
+        mock_write_gatt_char.reset_mock()
+
+        await dev.timer(0, True, True, 10, 10, Function.Chasing, Repeat.Weekend)
+        mock_write_gatt_char.assert_has_calls(
+            [mock.call(device.CHARACTERISTIC, mock.ANY, response=True)] * 2
+        )
+
+
+@pytest.mark.asyncio
+@mock.patch(
+    "aiokonstsmide.device.BleakClient.is_connected", new_callable=mock.PropertyMock
+)
+@mock.patch("aiokonstsmide.device.BleakClient.connect")
+@mock.patch("aiokonstsmide.device.BleakClient.write_gatt_char")
+@mock.patch("aiokonstsmide.device.BleakClient.disconnect")
+@mock.patch("bleak.BleakScanner.find_device_by_address")
+async def test_device_set_timers(
+    mock_fdba, mock_disconnect, mock_write_gatt_char, mock_connect, mock_is_connected
+):
+    def connect():
+        mock_is_connected.return_value = True
+
+    mock_fdba.return_value = BLEDevice(
+        "f8:dc:f0:2a:d3:ff",
+        "Konstsmide",
+        {"path": "/org/bluez/hci0/dev_F8_DC_F0_2A_D3_FF"},
+    )
+    mock_connect.side_effect = connect
+    mock_is_connected.return_value = False
+
+    async with device.Device("f8:dc:f0:2a:d3:ff") as dev:
+        mock_write_gatt_char.reset_mock()
+
+        # Unknown timers are all written, with a single time sync
+        timers = [
+            device.TimerSetting(True, 16, 0, Function.Steady),
+            device.TimerSetting(False, 23, 30, repeat=[Repeat.Monday, Repeat.Friday]),
+        ]
+        assert await dev.set_timers(timers) == list(range(8))
+        assert mock_write_gatt_char.call_count == 9
+        frames = [codec.decode(c.args[1]) for c in mock_write_gatt_char.call_args_list]
+        assert frames[0][1] == message.Command.Rtc.value
+        assert frames[1] == message.timer(
+            0, True, True, 16, 0, Function.Steady, [Repeat.Everyday], 100
+        )
+        mock_write_gatt_char.reset_mock()
+
+        # Unchanged timers aren't written, even if the brightness changed
+        await dev.control(brightness=50)
+        mock_write_gatt_char.reset_mock()
+        assert await dev.set_timers(timers) == []
+        mock_write_gatt_char.assert_not_called()
+
+        # Only changed timers are written
+        timers[1] = None
+        timers.append(device.TimerSetting(True, 7, 0))
+        assert await dev.set_timers(timers) == [1, 2]
+        assert mock_write_gatt_char.call_count == 3
+        mock_write_gatt_char.reset_mock()
+
+        # Single timers are remembered as well
+        await dev.deactivate_timer(2)
+        mock_write_gatt_char.reset_mock()
+        assert await dev.set_timers(timers[:2]) == []
+        assert await dev.set_timers(timers, force=True) == list(range(8))
+
+        with pytest.raises(ValueError):
+            await dev.set_timers([None] * 9)
+
+
+@pytest.mark.asyncio
+@mock.patch(
+    "aiokonstsmide.device.BleakClient.is_connected", new_callable=mock.PropertyMock
+)
+@mock.patch("aiokonstsmide.device.BleakClient.connect")
+@mock.patch("aiokonstsmide.device.BleakClient.write_gatt_char")
+@mock.patch("aiokonstsmide.device.BleakClient.disconnect")
+@mock.patch("bleak.BleakScanner.find_device_by_address")
+async def test_device_rtc_interval(
+    mock_fdba, mock_disconnect, mock_write_gatt_char, mock_connect, mock_is_connected
+):
+    def connect():
+        mock_is_connected.return_value = True
+
+    mock_fdba.return_value = BLEDevice(
+        "f8:dc:f0:2a:d3:ff",
+        "Konstsmide",
+        {"path": "/org/bluez/hci0/dev_F8_DC_F0_2A_D3_FF"},
+    )
+    mock_connect.side_effect = connect
+    mock_is_connected.return_value = False
+
+    async with device.Device("f8:dc:f0:2a:d3:ff", rtc_interval=60.0) as dev:
+        mock_write_gatt_char.reset_mock()
+
+        # Time was synchronized when connecting
+        await dev.sync_time()
+        await dev.timer(0, True, True, 10, 10, Function.Chasing, Repeat.Weekend)
+        mock_write_gatt_char.assert_called_once()
+        mock_write_gatt_char.reset_mock()
+
+        await dev.sync_time(force=True)
+        mock_write_gatt_char.assert_called_once()
+        mock_write_gatt_char.reset_mock()
+
+        # Interval passed
+        with mock.patch("time.monotonic", return_value=time.monotonic() + 61):
+            with mock.patch("time.time", return_value=time.time() + 61):
+                await dev.sync_time()
+        mock_write_gatt_char.assert_called_once()
+        mock_write_gatt_char.reset_mock()
+
+        # Host clock jumped
+        with mock.patch("time.time", return_value=time.time() + 3600):
+            await dev.sync_time()
+        mock_write_gatt_char.assert_called_once()
+        mock_write_gatt_char.reset_mock()
+
+    # Periodic synchronization in the background
+    mock_is_connected.return_value = False
+    async with device.Device("f8:dc:f0:2a:d3:ff", rtc_resync=0.01) as dev:
+        mock_write_gatt_char.reset_mock()
+        await asyncio.sleep(0.05)
+        assert mock_write_gatt_char.call_count >= 2
+        assert all(
+            codec.decode(c.args[1])[1] == message.Command.Rtc.value
+            for c in mock_write_gatt_char.call_args_list
+        )
+
+        # A failed write doesn't stop the periodic synchronization
+        mock_write_gatt_char.reset_mock()
+        mock_write_gatt_char.side_effect = [
+            BleakError("Write failed"),
+            None,
+            None,
+            None,
+        ]
+        await asyncio.sleep(0.05)
+        assert mock_write_gatt_char.call_count >= 3
+        mock_write_gatt_char.side_effect = None
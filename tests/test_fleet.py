@@ -0,0 +1,164 @@
+"""Tests for the fleet module."""
+
+from unittest import mock
+
+import pytest
+from bleak.exc import BleakError
+
+from aiokonstsmide import AdapterError, DeviceGroup, DeviceNotFoundError
+from aiokonstsmide.fleet import UNKNOWN_RSSI, Fleet
+from aiokonstsmide.scanner import Discovery
+from aiokonstsmide.simulator import SimulatedAdapter
+
+ADDRESSES = [f"f8:dc:f0:2a:d3:{i:02x}" for i in range(6)]
+
+
+@pytest.fixture
+def adapter():
+    adapter = SimulatedAdapter()
+    for address in ADDRESSES:
+        adapter.add(address)
+    return adapter
+
+
+def client_factory(adapter: SimulatedAdapter, broken: set):
+    """Creates simulated clients, which fail to connect on broken adapters."""
+
+    def factory(device, adapter=None, **kwargs):
+        client = sims.client(device, **kwargs)
+        if adapter in broken:
+            client.connect = mock.AsyncMock(side_effect=BleakError("Adapter down"))
+        return client
+
+    sims = adapter
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_fleet_balancing(adapter):
+    fleet = Fleet(
+        ["hci0", "hci1"],
+        max_connections=3,
+        client_factory=client_factory(adapter, set()),
+    )
+
+    # Balanced by connection count
+    for address in ADDRESSES[:4]:
+        dev = await fleet.connect(address)
+        assert dev.is_connected
+    assert [dev.adapter for dev in fleet.devices.values()] == [
+        "hci0",
+        "hci1",
+        "hci0",
+        "hci1",
+    ]
+    assert {name: s.connections for name, s in fleet.adapters.items()} == {
+        "hci0": 2,
+        "hci1": 2,
+    }
+    assert await fleet.connect(ADDRESSES[0]) is fleet.devices[ADDRESSES[0].upper()]
+
+    # Prefers the adapter with a clearly better signal
+    fleet.observe(ADDRESSES[4], "hci0", -90)
+    fleet.observe(ADDRESSES[4], "hci1", -60)
+    assert fleet.rssi(ADDRESSES[4], "hci1") == -60
+    assert fleet.rssi(ADDRESSES[5], "hci1") == UNKNOWN_RSSI
+    assert (await fleet.connect(ADDRESSES[4])).adapter == "hci1"
+    assert (await fleet.connect(ADDRESSES[5])).adapter == "hci0"
+
+    # All adapters saturated
+    adapter.add("f8:dc:f0:2a:d3:ff")
+    with pytest.raises(AdapterError):
+        await fleet.connect("f8:dc:f0:2a:d3:ff")
+
+    # Devices on a failed adapter are migrated as long as there is room
+    await fleet.disconnect(ADDRESSES[0])
+    assert not adapter.get(ADDRESSES[0]).is_connected
+    await fleet.fail_adapter("hci1")
+    assert fleet.adapters["hci1"].healthy is False
+    assert sum(1 for dev in fleet.devices.values() if dev.adapter == "hci0") == 3
+    assert all(dev.is_connected for dev in fleet.devices.values())
+
+    fleet.restore_adapter("hci1")
+    assert fleet.adapters["hci1"].healthy is True
+
+    async with fleet:
+        group = DeviceGroup(fleet.devices.values())
+        assert all(result.ok for result in await group.off())
+    assert not any(sim.is_connected for sim in adapter.simulators)
+    assert fleet.devices == {}
+
+
+@pytest.mark.asyncio
+@mock.patch("aiokonstsmide.device.find_device")
+async def test_fleet_failover(mock_find_device, adapter):
+    # A failed connection attempt scans for the device again
+    mock_find_device.side_effect = lambda address, *_: adapter.get(address).ble_device
+
+    broken = {"hci1"}
+    fleet = Fleet(
+        ["hci0", "hci1", "hci2"],
+        max_connections=2,
+        max_failures=2,
+        client_factory=client_factory(adapter, broken),
+    )
+    for address in ADDRESSES[:3]:
+        fleet.observe(address, "hci1", -40)
+
+    # Falls back to the next adapter and gives up on the broken one
+    devices = [await fleet.connect(address) for address in ADDRESSES[:3]]
+    assert [dev.adapter for dev in devices] == ["hci0", "hci2", "hci0"]
+    assert fleet.adapters["hci1"].healthy is False
+    assert fleet.adapters["hci1"].connections == 0
+
+    # Devices stay where they are as long as their adapters are healthy
+    broken.clear()
+    fleet.restore_adapter("hci1")
+    assert await fleet.rebalance() == {}
+
+    # Fails if no adapter can connect
+    broken.update({"hci0", "hci1", "hci2"})
+    with pytest.raises(BleakError):
+        await fleet.connect(ADDRESSES[3])
+    await fleet.close()
+
+    with pytest.raises(ValueError):
+        Fleet([])
+
+
+@pytest.mark.asyncio
+async def test_fleet_scan():
+    async def stream_devices(timeout, addresses=None, adapter=None):
+        for i, address in enumerate(ADDRESSES[:2]):
+            yield Discovery(
+                mock.Mock(address=address), -50 - i * (adapter == "hci0"), None
+            )
+        if adapter == "hci1":
+            raise BleakError("Scan failed")
+
+    fleet = Fleet(["hci0", "hci1"])
+    with mock.patch("aiokonstsmide.fleet.stream_devices", stream_devices):
+        await fleet.scan(1.0)
+    assert fleet.rssi(ADDRESSES[0], "hci0") == -50
+    assert fleet.rssi(ADDRESSES[1], "hci0") == -51
+    assert fleet.rssi(ADDRESSES[1], "hci1") == -50
+
+
+@pytest.mark.asyncio
+@mock.patch("aiokonstsmide.device.find_device", return_value=None)
+async def test_fleet_offline_device(_mock_find_device, adapter):
+    fleet = Fleet(
+        ["hci0", "hci1"], max_failures=1, client_factory=client_factory(adapter, set())
+    )
+
+    # Devices which are powered off don't count against the adapters
+    for _ in range(3):
+        with pytest.raises(DeviceNotFoundError):
+            await fleet.connect("f8:dc:f0:2a:d3:ff")
+    assert all(status.healthy for status in fleet.adapters.values())
+    assert all(status.failures == 0 for status in fleet.adapters.values())
+    assert all(status.connections == 0 for status in fleet.adapters.values())
+
+    dev = await fleet.connect(ADDRESSES[0])
+    assert dev.is_connected
+    await fleet.close()
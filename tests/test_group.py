@@ -0,0 +1,199 @@
+"""Tests for the group module."""
+
+from unittest import mock
+
+import pytest
+from bleak.backends.device import BLEDevice
+
+from aiokonstsmide import (
+    DeviceGroup,
+    FailurePolicy,
+    Function,
+    GroupError,
+    codec,
+    device,
+    message,
+)
+from aiokonstsmide.exceptions import DeviceNotFoundError, NotConnectedError
+from aiokonstsmide.group import BroadcastResult
+from aiokonstsmide.simulator import SimulatedAdapter
+
+ADDRESSES = ["f8:dc:f0:2a:d3:01", "f8:dc:f0:2a:d3:02", "f8:dc:f0:2a:d3:03"]
+
+
+@pytest.mark.asyncio
+@mock.patch(
+    "aiokonstsmide.device.BleakClient.is_connected", new_callable=mock.PropertyMock
+)
+@mock.patch("aiokonstsmide.device.BleakClient.connect")
+@mock.patch("aiokonstsmide.device.BleakClient.write_gatt_char")
+@mock.patch("aiokonstsmide.device.BleakClient.disconnect")
+@mock.patch("bleak.BleakScanner.find_device_by_address")
+async def test_group_control(
+    mock_fdba, mock_disconnect, mock_write_gatt_char, mock_connect, mock_is_connected
+):
+    def connect():
+        mock_is_connected.return_value = True
+
+    mock_fdba.return_value = BLEDevice(
+        "f8:dc:f0:2a:d3:ff",
+        "Konstsmide",
+        {"path": "/org/bluez/hci0/dev_F8_DC_F0_2A_D3_FF"},
+    )
+    mock_connect.side_effect = connect
+    mock_is_connected.return_value = False
+
+    async with DeviceGroup(ADDRESSES, max_concurrency=2) as group:
+        assert len(group) == 3
+        mock_write_gatt_char.reset_mock()
+
+        # The same encoded frame is sent to every device
+        results = await group.off()
+        assert [res.address for res in results] == ADDRESSES
+        assert all(res.ok for res in results)
+        assert mock_write_gatt_char.call_count == 3
+        frames = {call.args[1] for call in mock_write_gatt_char.call_args_list}
+        assert len(frames) == 1
+        assert codec.decode(frames.pop()) == message.on_off(False)
+        assert all(not dev.is_on for dev in group)
+        mock_write_gatt_char.reset_mock()
+
+        # Status is updated for every device
+        await group.control(Function.Twinkle, 42)
+        assert mock_write_gatt_char.call_count == 3
+        for dev in group:
+            assert dev.is_on is True
+            assert dev.function == Function.Twinkle
+            assert dev.brightness == 42
+            assert dev.flash_speed == 50
+        mock_write_gatt_char.reset_mock()
+
+        await group.sync_time()
+        assert mock_write_gatt_char.call_count == 3
+
+    assert mock_disconnect.call_count == 3
+
+
+@pytest.mark.asyncio
+@mock.patch("bleak.BleakScanner.find_device_by_address")
+async def test_group_failure_policy(mock_fdba):
+    # All devices fail to connect
+    mock_fdba.return_value = None
+
+    group = DeviceGroup(ADDRESSES)
+    results = await group.connect()
+    assert len(results) == 3
+    assert all(isinstance(res.error, device.DeviceNotFoundError) for res in results)
+
+    with pytest.raises(GroupError) as err:
+        await group.connect(policy=FailurePolicy.Raise)
+    assert len(err.value.results) == 3
+
+    with pytest.raises(GroupError):
+        await DeviceGroup(ADDRESSES, policy=FailurePolicy.Abort).connect()
+
+    with pytest.raises(ValueError):
+        DeviceGroup(ADDRESSES, max_concurrency=0)
+
+
+@pytest.mark.asyncio
+@mock.patch("aiokonstsmide.device.find_device", return_value=None)
+async def test_group_broadcast(_mock_find_device):
+    adapter = SimulatedAdapter()
+    sims = [adapter.add(address, latency=0.01) for address in ADDRESSES]
+    devices = [
+        device.Device(address, client_factory=adapter.client) for address in ADDRESSES
+    ]
+    missing = device.Device("f8:dc:f0:2a:d3:ff", client_factory=adapter.client)
+    frame = message.Control(Function.Twinkle, 80, 60)
+
+    # The links are readied and the writes released together
+    async with DeviceGroup(devices) as group:
+        res = await group.broadcast(frame, response=False)
+        assert all(r.ok for r in res.results)
+        assert set(res.completed) == set(res.started) == set(ADDRESSES)
+        assert 0.0 <= res.start_skew < 0.01
+        assert 0.0 <= res.skew <= res.duration
+        assert res.duration >= 0.01
+        for sim, dev in zip(sims, devices):
+            assert sim.frames[-1] == frame.data
+            assert sim.state.function == Function.Twinkle
+            assert dev.function == Function.Twinkle and dev.brightness == 80
+
+    # Devices which can't be connected are reported
+    group = DeviceGroup([*devices, missing])
+    res = await group.broadcast(message.OnOff(False))
+    assert [r.ok for r in res.results] == [True, True, True, False]
+    assert isinstance(res.results[3].error, DeviceNotFoundError)
+    assert all(not sim.state.on for sim in sims)
+
+    # Nothing is written unless all devices are connected
+    with pytest.raises(GroupError):
+        await group.broadcast(message.OnOff(True), policy=FailurePolicy.Abort)
+    assert all(not sim.state.on for sim in sims)
+    await group.disconnect()
+    assert BroadcastResult([]).skew == 0.0
+
+
+@pytest.mark.asyncio
+async def test_group_disconnected():
+    adapter = SimulatedAdapter()
+    sims = [adapter.add(address) for address in ADDRESSES[:2]]
+    connected, disconnected = [
+        device.Device(address, client_factory=adapter.client)
+        for address in ADDRESSES[:2]
+    ]
+    await connected.connect()
+    group = DeviceGroup([connected, disconnected], policy=FailurePolicy.Raise)
+
+    # Writes dropped because a device is disconnected are failures
+    with pytest.raises(GroupError) as exc_info:
+        await group.off()
+    results = exc_info.value.results
+    assert [res.ok for res in results] == [True, False]
+    assert isinstance(results[1].error, NotConnectedError)
+    assert sims[0].state.on is False
+    assert sims[1].frames == []
+
+    results = await group.control(brightness=30, policy=FailurePolicy.Continue)
+    assert [res.ok for res in results] == [True, False]
+    await connected.disconnect()
+
+    coalescing = device.Device(
+        ADDRESSES[1], client_factory=adapter.client, coalesce=True
+    )
+    assert not await coalescing._send(message.OnOff(True), on=True)
+    await coalescing.connect()
+    assert await coalescing._send(message.OnOff(True), on=True)
+    await coalescing.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_group_connect_without_link():
+    adapter = SimulatedAdapter()
+    sims = [adapter.add(address) for address in ADDRESSES[:2]]
+
+    def unlinked(*args, **kwargs):
+        client = adapter.client(*args, **kwargs)
+        client.connect = mock.AsyncMock(return_value=False)
+        return client
+
+    group = DeviceGroup(
+        [
+            device.Device(ADDRESSES[0], client_factory=adapter.client),
+            device.Device(ADDRESSES[1], client_factory=unlinked),
+        ],
+        policy=FailurePolicy.Continue,
+    )
+
+    # A connection attempt which returns without a link failed
+    results = await group.connect()
+    assert [res.ok for res in results] == [True, False]
+    assert isinstance(results[1].error, NotConnectedError)
+
+    # Nothing is written to any device if one of them isn't connected
+    with pytest.raises(GroupError) as exc_info:
+        await group.broadcast(message.OnOff(False), policy=FailurePolicy.Abort)
+    assert [res.ok for res in exc_info.value.results] == [True, False]
+    assert sims[0].state.on is True
+    await group.disconnect()
@@ -4,7 +4,8 @@ from datetime import datetime
 
 import pytest
 
-from aiokonstsmide import message
+from aiokonstsmide import codec, message
+from aiokonstsmide.exceptions import DecodeError
 
 
 def test_on_off():
@@ -230,3 +231,133 @@ def test_rtc():
         message.rtc(datetime(2048, 5, 24, 16, 43, 0))
         == b"\xBC\x06\x00\x2B\x10\x18\x05\x00\x08"
     )
+
+
+def test_frames():
+    frames = [
+        (message.OnOff(True), message.on_off(True)),
+        (
+            message.Control(message.Function.Twinkle, 0x37, 0x01),
+            message.control(message.Function.Twinkle, 0x37, 0x01),
+        ),
+        (message.PasswordInput("123456"), message.password_input("123456")),
+        (message.SetPassword("650238"), message.set_password("650238")),
+        (
+            message.Timer(
+                1,
+                False,
+                True,
+                16,
+                57,
+                message.Function.Sequential,
+                (message.Repeat.Monday, message.Repeat.Friday),
+                53,
+            ),
+            b"\xBC\x05\x01\x00\x00\x10\x39\x22\x03\x35",
+        ),
+        (
+            message.Rtc(datetime(2022, 11, 4, 9, 19, 27)),
+            message.rtc(datetime(2022, 11, 4, 9, 19, 27)),
+        ),
+    ]
+    for frame, data in frames:
+        assert frame.data == data
+        assert bytes(frame) == data
+        assert frame.command.value == data[1]
+
+    # Frames are immutable and hashable
+    frame = message.Control(message.Function.Steady, 10, 20)
+    assert frame == message.Control(message.Function.Steady, 10, 20)
+    assert {frame: True}[message.Control(message.Function.Steady, 10, 20)]
+    with pytest.raises(AttributeError):
+        frame.brightness = 30
+
+    # Fields are validated
+    with pytest.raises(ValueError):
+        message.Control(message.Function.Keep, 10, 20)
+    with pytest.raises(ValueError):
+        message.Timer(8, True, True, 1, 1, message.Function.Chasing, (), 100)
+    with pytest.raises(ValueError):
+        message.PasswordInput("12345")
+
+    # The base class is abstract
+    with pytest.raises(TypeError):
+        message.Frame()
+
+
+def test_parse():
+    frames = [
+        message.OnOff(True),
+        message.OnOff(False),
+        message.Control(message.Function.Twinkle, 0x37, 0x10),
+        message.PasswordInput("012345"),
+        message.SetPassword("650238"),
+        message.Timer(
+            1,
+            False,
+            True,
+            16,
+            57,
+            message.Function.Sequential,
+            (message.Repeat.Monday, message.Repeat.Friday),
+            53,
+        ),
+        message.Timer(
+            7, True, False, 6, 0, message.Function.Keep, (message.Repeat.Weekend,), 0
+        ),
+        message.Timer(0, True, True, 0, 0, message.Function.Steady, (), 100),
+        message.Rtc(datetime(2022, 11, 4, 9, 19, 27)),
+    ]
+    for frame in frames:
+        parsed = message.parse(frame.data)
+        assert parsed == frame
+        assert type(parsed) is type(frame)
+        assert parsed.data == frame.data
+
+    # The original message is kept
+    data = message.control(message.Function.Steady, 10, 0)[:4] + b"\x64" + bytes(4)
+    frame = message.parse(data)
+    assert frame == message.Control(message.Function.Steady, 10, 0)
+    assert frame.data == data
+
+    # Invalid messages
+    invalid = [
+        b"\xBC\x01\x01",
+        b"\xBD\x01\x01\x00\x00\x00\x00\x00\x00",
+        b"\xBC\x07\x01\x00\x00\x00\x00\x00\x00",
+        b"\xBC\x02\x00\x10\x10\x00\x00\x00\x00",
+        b"\xBC\x02\x08\x65\x10\x00\x00\x00\x00",
+        b"\xBC\x05\x01\x00\x00\x10\x39\x22\x03",
+        b"\xBC\x06\x00\x00\x00\x00\x00\xE6\x07",
+    ]
+    for data in invalid:
+        with pytest.raises(DecodeError):
+            message.parse(data)
+
+
+def test_parse_many():
+    frames = [
+        message.PasswordInput("123456"),
+        message.OnOff(True),
+        message.Control(message.Function.Chasing, 80, 50),
+    ]
+    encoded = codec.encode_many(frame.data for frame in frames)
+    assert message.parse_many(encoded) == frames
+
+    # Fed in chunks of any size
+    for size in (1, 5, 13, len(encoded)):
+        parser = message.FrameParser()
+        parsed = []
+        for start in range(0, len(encoded), size):
+            parsed += parser.feed(encoded[start:][:size])
+        assert parsed == frames
+        assert parser.pending == 0
+        assert parser.invalid == 0
+
+    # Invalid messages are skipped
+    parser = message.FrameParser()
+    garbage = codec.encode(b"\xBC\x09\x00\x00\x00\x00\x00\x00\x00")
+    assert parser.feed(b"\x00\x01" + garbage + encoded[:-3]) == frames[:2]
+    assert parser.invalid == 2
+    assert parser.pending == len(codec.encode(frames[2].data)) - 3
+    assert parser.feed(encoded[-3:]) == frames[2:]
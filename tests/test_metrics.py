@@ -0,0 +1,101 @@
+"""Tests for the metrics module."""
+
+from unittest import mock
+
+import pytest
+from bleak.exc import BleakError
+
+from aiokonstsmide import device
+from aiokonstsmide.metrics import BUCKETS, DeviceMetrics, Histogram, Metric
+from aiokonstsmide.simulator import SimulatedAdapter
+
+
+def test_histogram():
+    histogram = Histogram()
+    assert histogram.mean is None
+    assert histogram.percentile(50) is None
+
+    for value in [0.001] * 90 + [0.1] * 9 + [100.0]:
+        histogram.observe(value)
+    assert histogram.count == 100
+    assert histogram.min == 0.001
+    assert histogram.max == 100.0
+    assert histogram.mean == pytest.approx(1.0099)
+    assert histogram.buckets[-1] == 1
+    assert 0.001 <= histogram.percentile(0) <= 2 * 0.001
+    assert 0.001 <= histogram.percentile(50) <= 2 * 0.001
+    assert 0.1 <= histogram.percentile(95) <= 2 * 0.1
+    assert histogram.percentile(100) == 100.0
+    assert sum(histogram.buckets) == 100
+    assert len(histogram.buckets) == len(BUCKETS) + 1
+
+    with pytest.raises(ValueError):
+        histogram.percentile(101)
+
+
+def test_device_metrics():
+    metrics = DeviceMetrics("f8:dc:f0:2a:d3:01")
+    callback = mock.Mock(side_effect=[None, Exception("Broken"), None])
+    remove = metrics.add_callback(callback)
+
+    metrics.record(Metric.Write, 0.01)
+    metrics.record(Metric.DroppedWrite)
+    metrics.record(Metric.DroppedWrite)
+    assert metrics.count(Metric.Write) == 1
+    assert metrics.histogram(Metric.Write).total == 0.01
+    assert metrics.count(Metric.DroppedWrite) == 2
+    assert callback.call_args_list[0] == mock.call(
+        "f8:dc:f0:2a:d3:01", Metric.Write, 0.01
+    )
+    assert callback.call_count == 3
+
+    remove()
+    metrics.record(Metric.WriteError)
+    assert callback.call_count == 3
+
+    metrics.reset()
+    assert all(metrics.count(metric) == 0 for metric in Metric)
+
+
+@pytest.mark.asyncio
+async def test_device_instrumentation():
+    adapter = SimulatedAdapter()
+    sim = adapter.add("f8:dc:f0:2a:d3:01", latency=0.001, connect_latency=0.002)
+    dev = device.Device("f8:dc:f0:2a:d3:01", client_factory=adapter.client)
+    events = []
+    dev.metrics.add_callback(lambda *args: events.append(args[1]))
+
+    await dev.connect()
+    assert events == [
+        Metric.Link,
+        Metric.Write,
+        Metric.Password,
+        Metric.Write,
+        Metric.Write,
+        Metric.StatusSync,
+        Metric.Write,
+        Metric.TimeSync,
+    ]
+    assert dev.metrics.count(Metric.Scan) == 0
+    assert dev.metrics.histogram(Metric.Link).min >= 0.002
+    assert dev.metrics.histogram(Metric.Write).min >= 0.001
+
+    await dev.off()
+    assert dev.metrics.count(Metric.Write) == 5
+
+    # Dropped while disconnected
+    sim.disconnect()
+    await dev.on()
+    assert dev.metrics.count(Metric.DroppedWrite) == 1
+    await dev.disconnect()
+
+    # Failed writes
+    sim = adapter.add("f8:dc:f0:2a:d3:02", loss=1.0)
+    dev = device.Device(
+        sim.ble_device, client_factory=adapter.client, write_without_response=True
+    )
+    with pytest.raises(BleakError):
+        await dev.connect()
+    assert dev.metrics.count(Metric.WriteError) == 1
+    assert dev.metrics.count(Metric.Write) == 0
+    await dev.disconnect()
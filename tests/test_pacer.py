@@ -0,0 +1,44 @@
+"""Tests for the pacer module."""
+
+import asyncio
+
+import pytest
+
+from aiokonstsmide.pacer import Pacer
+
+
+@pytest.mark.asyncio
+async def test_pacer_rate():
+    pacer = Pacer(rate=100.0, window=10)
+    loop = asyncio.get_running_loop()
+    times = []
+
+    async def write():
+        async with pacer:
+            times.append(loop.time())
+
+    await asyncio.gather(*(write() for _ in range(5)))
+    assert times[-1] - times[0] >= 0.039
+
+
+@pytest.mark.asyncio
+async def test_pacer_window():
+    pacer = Pacer(rate=None, window=2)
+    active = 0
+    max_active = 0
+
+    async def write():
+        nonlocal active, max_active
+        async with pacer:
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(write() for _ in range(6)))
+    assert max_active == 2
+
+    with pytest.raises(ValueError):
+        Pacer(rate=0)
+    with pytest.raises(ValueError):
+        Pacer(window=0)
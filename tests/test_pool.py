@@ -0,0 +1,105 @@
+"""Tests for the pool module."""
+
+import asyncio
+from unittest import mock
+
+import pytest
+from bleak.backends.device import BLEDevice
+
+from aiokonstsmide import DeviceNotFoundError
+from aiokonstsmide.pool import ConnectionPool
+from aiokonstsmide.simulator import SimulatedAdapter
+
+
+@pytest.mark.asyncio
+@mock.patch(
+    "aiokonstsmide.device.BleakClient.is_connected", new_callable=mock.PropertyMock
+)
+@mock.patch("aiokonstsmide.device.BleakClient.connect")
+@mock.patch("aiokonstsmide.device.BleakClient.write_gatt_char")
+@mock.patch("aiokonstsmide.device.BleakClient.disconnect")
+@mock.patch("bleak.BleakScanner.find_device_by_address")
+async def test_pool(
+    mock_fdba, mock_disconnect, mock_write_gatt_char, mock_connect, mock_is_connected
+):
+    def connect():
+        mock_is_connected.return_value = True
+
+    mock_fdba.return_value = BLEDevice(
+        "f8:dc:f0:2a:d3:ff",
+        "Konstsmide",
+        {"path": "/org/bluez/hci0/dev_F8_DC_F0_2A_D3_FF"},
+    )
+    mock_connect.side_effect = connect
+    mock_is_connected.return_value = False
+
+    async with ConnectionPool(max_connections=2, idle_timeout=None) as pool:
+        # First acquire connects, second one reuses the connection
+        dev = await pool.acquire("f8:dc:f0:2a:d3:01")
+        assert dev.is_connected
+        await pool.release(dev)
+        async with pool.device("f8:dc:f0:2a:d3:01") as dev2:
+            assert dev2 is dev
+        assert pool.stats.hits == 1
+        assert pool.stats.misses == 1
+        assert pool.stats.connections == 1
+
+        # Addresses are case insensitive
+        async with pool.device("F8:DC:F0:2A:D3:01") as dev3:
+            assert dev3 is dev
+        assert pool.stats.hits == 2
+        assert pool.stats.connections == 1
+
+        # Least recently used idle device is evicted
+        async with pool.device("f8:dc:f0:2a:d3:02"):
+            async with pool.device("f8:dc:f0:2a:d3:03"):
+                assert pool.stats.evictions == 1
+                assert pool.stats.connections == 2
+                mock_disconnect.assert_called_once()
+
+                # All connections in use, acquire has to wait
+                task = asyncio.ensure_future(pool.acquire("f8:dc:f0:2a:d3:04"))
+                await asyncio.sleep(0)
+                assert not task.done()
+            dev4 = await asyncio.wait_for(task, 1.0)
+            await pool.release(dev4)
+
+        assert pool.stats.misses == 4
+        assert pool.stats.evictions == 2
+
+    assert pool.stats.connections == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_eviction_order():
+    adapter = SimulatedAdapter()
+    sims = [adapter.add(f"f8:dc:f0:2a:d3:0{i}") for i in range(3)]
+    async with ConnectionPool(
+        max_connections=2, idle_timeout=None, client_factory=adapter.client
+    ) as pool:
+        # Held for a long time and released last
+        held = await pool.acquire(sims[0].address)
+        async with pool.device(sims[1].address):
+            pass
+        await pool.release(held)
+
+        # The device which was used least recently is evicted
+        async with pool.device(sims[2].address):
+            assert sims[0].is_connected
+            assert not sims[1].is_connected
+
+
+@pytest.mark.asyncio
+@mock.patch("bleak.BleakScanner.find_device_by_address")
+async def test_pool_connect_failure(mock_fdba):
+    mock_fdba.return_value = None
+
+    pool = ConnectionPool(max_connections=1)
+    with pytest.raises(DeviceNotFoundError):
+        await pool.acquire("f8:dc:f0:2a:d3:01")
+    assert pool.stats.connections == 0
+    assert pool.stats.misses == 1
+    await pool.close()
+
+    with pytest.raises(ValueError):
+        ConnectionPool(max_connections=0)
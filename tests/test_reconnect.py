@@ -0,0 +1,96 @@
+"""Tests for the reconnect module."""
+
+import asyncio
+from unittest import mock
+
+import pytest
+
+from aiokonstsmide import device
+from aiokonstsmide.metrics import DeviceMetrics, Metric
+from aiokonstsmide.reconnect import Backoff, ReconnectState, ReconnectSupervisor
+
+
+class MockDevice:
+    """Device which connects after a number of failed attempts."""
+
+    active = 0
+    max_active = 0
+
+    def __init__(self, address: str, failures: int = 0):
+        self.address = address
+        self.is_connected = False
+        self.failures = failures
+        self.connect_calls = 0
+        self.metrics = DeviceMetrics(address)
+
+    async def connect(self, timeout: float = 5.0):
+        self.connect_calls += 1
+        MockDevice.active += 1
+        MockDevice.max_active = max(MockDevice.max_active, MockDevice.active)
+        await asyncio.sleep(0.01)
+        MockDevice.active -= 1
+        if self.connect_calls <= self.failures:
+            raise Exception("Connection failed")
+        self.is_connected = True
+
+
+def test_backoff():
+    backoff = Backoff(initial=1.0, maximum=10.0, factor=2.0, jitter=0.0)
+    assert [backoff.delay(i) for i in range(5)] == [1.0, 2.0, 4.0, 8.0, 10.0]
+
+    backoff = Backoff(initial=1.0, maximum=10.0, factor=2.0, jitter=0.5)
+    for _ in range(100):
+        assert 2.0 <= backoff.delay(2) <= 4.0
+
+
+@pytest.mark.asyncio
+async def test_reconnect_supervisor():
+    supervisor = ReconnectSupervisor(Backoff(initial=0.001, jitter=0.0), 2)
+
+    # Single reconnect per device
+    dev = MockDevice("f8:dc:f0:2a:d3:01", failures=2)
+    task = supervisor.schedule(dev)
+    assert supervisor.schedule(dev) is task
+    assert supervisor.reconnecting == 1
+    assert supervisor.state(dev.address) == ReconnectState.Waiting
+    assert await task is True
+    assert dev.connect_calls == 3
+    assert supervisor.attempts(dev.address) == 3
+    assert dev.metrics.count(Metric.ReconnectAttempt) == 3
+    assert supervisor.state(dev.address) == ReconnectState.Idle
+
+    # Limited number of concurrent attempts
+    MockDevice.max_active = 0
+    devices = [MockDevice(f"f8:dc:f0:2a:d3:{i:02}") for i in range(6)]
+    assert all(await asyncio.gather(*(supervisor.schedule(d) for d in devices)))
+    assert MockDevice.max_active == 2
+
+    # Give up after the maximum number of attempts
+    supervisor = ReconnectSupervisor(Backoff(initial=0.001, max_attempts=2))
+    dev = MockDevice("f8:dc:f0:2a:d3:01", failures=5)
+    assert await supervisor.schedule(dev) is False
+    assert dev.connect_calls == 2
+    assert supervisor.state(dev.address) == ReconnectState.Failed
+
+    # Cancel
+    supervisor = ReconnectSupervisor(Backoff(initial=10.0))
+    task = supervisor.schedule(dev)
+    await asyncio.sleep(0)
+    supervisor.cancel(dev)
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert supervisor.state(dev.address) == ReconnectState.Idle
+
+    with pytest.raises(ValueError):
+        ReconnectSupervisor(max_concurrent=0)
+
+
+@pytest.mark.asyncio
+async def test_device_reconnect():
+    supervisor = mock.Mock(ReconnectSupervisor)
+    supervisor.state.return_value = ReconnectState.Connecting
+
+    dev = device.Device("f8:dc:f0:2a:d3:ff", supervisor=supervisor)
+    assert dev.reconnect_state == ReconnectState.Connecting
+    await dev.disconnect()
+    supervisor.cancel.assert_called_once_with(dev)
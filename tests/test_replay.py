@@ -0,0 +1,87 @@
+"""Tests for the replay module."""
+
+import asyncio
+from unittest import mock
+
+import pytest
+
+from aiokonstsmide import codec, device, message
+from aiokonstsmide.capture import Capture, CaptureRecord, read_capture
+from aiokonstsmide.replay import Replay
+from aiokonstsmide.simulator import SimulatedAdapter
+
+
+@pytest.mark.asyncio
+async def test_replay(tmp_path):
+    adapter = SimulatedAdapter()
+    source = adapter.add("f8:dc:f0:2a:d3:01")
+    capture = Capture()
+    async with device.Device(
+        source.ble_device, client_factory=adapter.client, capture=capture
+    ) as dev:
+        for brightness in range(10, 60, 10):
+            await dev.control(message.Function.Twinkle, brightness, 20)
+        await dev.off()
+    capture.dump(tmp_path / "session.kcap")
+
+    # Routed to another device as fast as possible
+    target = adapter.add("f8:dc:f0:2a:d3:02")
+    async with device.Device(target.ble_device, client_factory=adapter.client) as dev:
+        connect_frames = len(target.frames)
+        stats = await Replay(read_capture(tmp_path / "session.kcap"), None).play(
+            dev, route={"F8:DC:F0:2A:D3:01": dev}
+        )
+        assert stats.frames == len(capture) - 1
+        assert stats.skipped == 1
+        assert stats.failed == 0
+        assert stats.latency.count == stats.frames
+        assert stats.throughput > 0
+        assert target.frames[connect_frames:] == source.frames[1:]
+        assert target.state == source.state
+        assert dev.is_on is False
+        assert dev.brightness == 50
+
+    # Original timing, accelerated
+    records = [
+        CaptureRecord(100.0 + i * 0.05, "f8:dc:f0:2a:d3:02", data, codec.encode(data))
+        for i, data in enumerate(
+            [message.on_off(True), message.on_off(False), message.on_off(True)]
+        )
+    ]
+    async with device.Device(target.ble_device, client_factory=adapter.client) as dev:
+        stats = await Replay(records, speed=2.0).play([dev])
+        assert stats.frames == 3
+        assert 0.05 <= stats.duration < 0.2
+        assert stats.max_lateness < 0.05
+        assert target.state.on is True
+
+        # Not routed
+        stats = await Replay(records, None).play([], route={})
+        assert stats.skipped == 3
+
+    # Disconnected
+    frames = len(target.frames)
+    stats = await Replay(records, None).play([dev])
+    assert stats.failed == 3
+    assert stats.frames == 0
+    assert stats.latency.count == 0
+    assert len(target.frames) == frames
+
+    with pytest.raises(ValueError):
+        Replay(records, speed=0)
+
+
+@pytest.mark.asyncio
+async def test_replay_worker_error():
+    adapter = SimulatedAdapter()
+    target = adapter.add("f8:dc:f0:2a:d3:01")
+    records = [
+        CaptureRecord(100.0 + i, target.address, data, codec.encode(data))
+        for i, data in enumerate([message.on_off(i % 2 == 0) for i in range(5)])
+    ]
+
+    # Errors which aren't caused by the connection aren't swallowed
+    dev = device.Device(target.ble_device, client_factory=adapter.client)
+    with mock.patch.object(dev, "_send", side_effect=RuntimeError("Bug")):
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(Replay(records, None, window=1).play(dev), 1.0)
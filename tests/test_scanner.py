@@ -1,9 +1,11 @@
 """Tests for the scanner module."""
 
+import asyncio
 from unittest import mock
 
 import pytest
 from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
 
 from aiokonstsmide import scanner
 
@@ -16,6 +18,14 @@ async def test_find_devices():
         assert [d async for d in scanner.find_devices()] == []
         mock_discover.assert_called_once_with(timeout=5.0, return_adv=mock.ANY)
 
+    # Scans with the given adapter
+    with mock.patch("bleak.BleakScanner.discover") as mock_discover:
+        mock_discover.return_value = []
+        assert [d async for d in scanner.find_devices(adapter="hci1")] == []
+        mock_discover.assert_called_once_with(
+            timeout=5.0, return_adv=mock.ANY, adapter="hci1"
+        )
+
     # No Konstsmide device
     with mock.patch("bleak.BleakScanner.discover") as mock_discover:
         mock_discover.return_value = [
@@ -71,3 +81,156 @@ async def test_check_address():
         mock_fdba.return_value = BLEDevice("77:89:90:c4:78:ef", "Konstsmide")
         assert await scanner.check_address("77:89:90:c4:78:ef", 5.0) is True
         mock_fdba.assert_called_once_with("77:89:90:c4:78:ef", timeout=5.0)
+
+
+def test_adapter():
+    assert scanner.adapter_kwargs(None) == {}
+    assert scanner.adapter_kwargs("hci1") == {"adapter": "hci1"}
+
+    bluez = BLEDevice("95:f9:2a:d0:e8:0c", None, {"path": "/org/bluez/hci1/dev_95"})
+    assert scanner.on_adapter(bluez, None)
+    assert scanner.on_adapter(bluez, "hci1")
+    assert not scanner.on_adapter(bluez, "hci0")
+    other = BLEDevice("95:f9:2a:d0:e8:0c", None, {"path": "/simulator/dev_95"})
+    assert scanner.on_adapter(other, "hci0")
+    assert scanner.on_adapter(BLEDevice("95:f9:2a:d0:e8:0c", None), "hci0")
+
+
+@pytest.mark.asyncio
+async def test_scan_cache():
+    cache = scanner.ScanCache(ttl=10.0)
+    device = BLEDevice("77:89:90:c4:78:ef", "Konstsmide")
+
+    with mock.patch("time.monotonic") as mock_monotonic:
+        mock_monotonic.return_value = 100.0
+        assert cache.get("77:89:90:c4:78:ef") is None
+        cache.add(device)
+        assert cache.get("77:89:90:C4:78:EF") is device
+
+        # Stale
+        mock_monotonic.return_value = 110.5
+        assert cache.get("77:89:90:c4:78:ef") is None
+
+        cache.add(device)
+        cache.remove("77:89:90:c4:78:ef")
+        assert cache.get("77:89:90:c4:78:ef") is None
+
+        # Static devices never become stale and are only removed explicitly
+        cache.add(device, static=True)
+        mock_monotonic.return_value = 1000.0
+        assert cache.get("77:89:90:c4:78:ef") is device
+        assert cache.get_static("77:89:90:C4:78:EF") is device
+        cache.remove("77:89:90:c4:78:ef")
+        assert cache.get("77:89:90:c4:78:ef") is device
+        cache.remove("77:89:90:c4:78:ef", static=True)
+        assert cache.get("77:89:90:c4:78:ef") is None
+        assert cache.get_static("77:89:90:c4:78:ef") is None
+
+    # Found devices are added to the module cache
+    with mock.patch("bleak.BleakScanner.find_device_by_address") as mock_fdba:
+        mock_fdba.return_value = device
+        assert await scanner.find_device("77:89:90:c4:78:ef") is device
+        assert scanner.scan_cache.get("77:89:90:c4:78:ef") is device
+
+    with mock.patch("bleak.BleakScanner.discover") as mock_discover:
+        mock_discover.return_value = [BLEDevice("95:f9:2a:d0:e8:0c", "Konstsmide")]
+        assert [d async for d in scanner.find_devices()] == ["95:f9:2a:d0:e8:0c"]
+        assert scanner.scan_cache.get("95:f9:2a:d0:e8:0c") is not None
+
+    # Static devices are found without scanning
+    static = BLEDevice("5e:f9:3a:e9:be:32", "Konstsmide")
+    scanner.scan_cache.add(static, static=True)
+    with mock.patch("bleak.BleakScanner.find_device_by_address") as mock_fdba:
+        assert await scanner.find_device("5e:f9:3a:e9:be:32") is static
+        mock_fdba.assert_not_called()
+
+
+class MockScanner:
+    """Stand-in for `BleakScanner` which reports advertisements once started."""
+
+    advertisements = []
+
+    def __init__(self, detection_callback):
+        self.detection_callback = detection_callback
+        self.stopped = False
+
+    async def start(self):
+        async def advertise():
+            for device, local_name, rssi in self.advertisements:
+                await asyncio.sleep(0.01)
+                adv = AdvertisementData(local_name, {}, {}, [], None, rssi, ())
+                self.detection_callback(device, adv)
+
+        asyncio.ensure_future(advertise())
+
+    async def stop(self):
+        self.stopped = True
+
+
+@pytest.mark.asyncio
+@mock.patch("aiokonstsmide.scanner.BleakScanner", MockScanner)
+async def test_stream_devices():
+    MockScanner.advertisements = [
+        (BLEDevice("95:f9:2a:d0:e8:0c", None), "Konstsmide", -40),
+        (BLEDevice("ed:65:02:9e:38:3c", "Test"), "Test", -50),
+        (BLEDevice("95:f9:2a:d0:e8:0c", None), "Konstsmide", -45),
+        (BLEDevice("ef:34:51:6a:06:9f", "Konstsmide"), None, -60),
+    ]
+
+    # Devices are yielded once, in the order they are found
+    found = [(d.address, d.rssi) async for d in scanner.stream_devices(0.2)]
+    assert found == [("95:f9:2a:d0:e8:0c", -40), ("ef:34:51:6a:06:9f", -60)]
+    assert scanner.scan_cache.get("ef:34:51:6a:06:9f") is not None
+
+    # Stop after the number of devices
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    found = [d.address async for d in scanner.stream_devices(5.0, max_devices=1)]
+    assert found == ["95:f9:2a:d0:e8:0c"]
+    assert loop.time() - start < 1.0
+
+    # Stop after finding the expected devices
+    found = [
+        d.address
+        async for d in scanner.stream_devices(5.0, addresses=["EF:34:51:6A:06:9F"])
+    ]
+    assert found == ["ef:34:51:6a:06:9f"]
+    assert loop.time() - start < 1.0
+
+
+@pytest.mark.asyncio
+@mock.patch("aiokonstsmide.scanner.BleakScanner", MockScanner)
+async def test_presence_scanner():
+    MockScanner.advertisements = [
+        (BLEDevice("95:f9:2a:d0:e8:0c", None), "Konstsmide", -40),
+        (BLEDevice("ed:65:02:9e:38:3c", "Test"), "Test", -50),
+        (BLEDevice("95:f9:2a:d0:e8:0c", None), "Konstsmide", -45),
+    ]
+    events = []
+
+    async with scanner.PresenceScanner(ttl=10.0) as presence:
+        remove_callback = presence.add_callback(
+            lambda event, discovery: events.append((event, discovery.address))
+        )
+        await asyncio.sleep(0.1)
+
+        # Registry holds the last advertisement of each device
+        assert list(presence.devices) == ["95:F9:2A:D0:E8:0C"]
+        assert "95:f9:2a:d0:e8:0c" in presence
+        assert "ed:65:02:9e:38:3c" not in presence
+        assert presence.get("95:f9:2a:d0:e8:0c").rssi == -45
+        assert scanner.scan_cache.get("95:f9:2a:d0:e8:0c") is not None
+        assert events == [(scanner.PresenceEvent.Appeared, "95:f9:2a:d0:e8:0c")]
+
+        # Devices not seen within the TTL disappear
+        presence.evict()
+        assert len(presence.devices) == 1
+        with mock.patch("time.monotonic") as mock_monotonic:
+            mock_monotonic.return_value = presence.get("95:f9:2a:d0:e8:0c").seen + 11
+            presence.evict()
+        assert len(presence.devices) == 0
+        assert scanner.scan_cache.get("95:f9:2a:d0:e8:0c") is None
+        assert events[-1] == (scanner.PresenceEvent.Disappeared, "95:f9:2a:d0:e8:0c")
+
+        remove_callback()
+        assert len(events) == 2
@@ -0,0 +1,70 @@
+"""Tests for the scene module."""
+
+import asyncio
+from unittest import mock
+
+import pytest
+
+from aiokonstsmide import Function, device
+from aiokonstsmide.scene import Keyframe, Scene
+
+
+def test_frame_at():
+    scene = Scene(
+        [
+            Keyframe(Function.Steady, 0, 1.0),
+            Keyframe(Function.Steady, 100, 0.5),
+            Keyframe(Function.Twinkle, 50, 1.0, 80),
+        ]
+    )
+    assert scene.duration == 2.5
+
+    # Brightness is interpolated
+    assert scene.frame_at(0.0).brightness == 0
+    assert scene.frame_at(0.25).brightness == 25
+    assert scene.frame_at(1.0).brightness == 100
+    assert scene.frame_at(1.25).brightness == 75
+
+    # Function changes with the keyframe, the last keyframe is held
+    assert scene.frame_at(1.49).function == Function.Steady
+    assert scene.frame_at(1.5).function == Function.Twinkle
+    assert scene.frame_at(1.5).flash_speed == 80
+    assert scene.frame_at(10.0).brightness == 50
+
+    with pytest.raises(ValueError):
+        Scene([])
+    with pytest.raises(ValueError):
+        Scene([Keyframe(Function.Keep, 0, 1.0)])
+    with pytest.raises(ValueError):
+        Scene([Keyframe(Function.Steady, 0, -1.0)])
+    with pytest.raises(ValueError):
+        Scene([Keyframe(Function.Steady, 0, 1.0)], fps=0)
+
+
+@pytest.mark.asyncio
+async def test_play():
+    dev = device.Device("f8:dc:f0:2a:d3:ff")
+    scene = Scene(
+        [Keyframe(Function.Steady, 0, 0.2), Keyframe(Function.Steady, 100, 0.0)],
+        fps=50,
+    )
+
+    # All frames are written
+    with mock.patch.object(dev, "_send") as mock_send:
+        stats = await scene.play(dev)
+    assert stats.frames == 11
+    assert stats.dropped == 0
+    assert mock_send.call_count == 11
+    assert mock_send.call_args.kwargs["brightness"] == 100
+
+    # Frames are dropped if writing falls behind
+    async def slow_send(*args, **kwargs):
+        await asyncio.sleep(0.05)
+
+    devices = [device.Device("f8:dc:f0:2a:d3:01"), device.Device("f8:dc:f0:2a:d3:02")]
+    with mock.patch.object(device.Device, "_send", side_effect=slow_send):
+        stats = await scene.play(devices)
+    assert stats.frames < 11
+    assert stats.dropped > 0
+    assert stats.max_lateness > 0
+    assert stats.duration < 0.4
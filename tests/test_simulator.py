@@ -0,0 +1,121 @@
+"""Tests for the simulator module."""
+
+import asyncio
+from datetime import datetime
+from unittest import mock
+
+import pytest
+from bleak.exc import BleakError
+
+from aiokonstsmide import Function, Repeat, device, message, scanner
+from aiokonstsmide.reconnect import Backoff, ReconnectSupervisor
+from aiokonstsmide.simulator import SimulatedAdapter
+
+
+@pytest.mark.asyncio
+async def test_simulator():
+    adapter = SimulatedAdapter()
+    sim = adapter.add("f8:dc:f0:2a:d3:ff", latency=0.001)
+
+    # Connected by address through the scan cache
+    async with device.Device(
+        "f8:dc:f0:2a:d3:ff",
+        on=False,
+        function=Function.Twinkle,
+        brightness=40,
+        client_factory=adapter.client,
+    ) as dev:
+        assert sim.is_connected
+        assert sim.state.on is False
+        assert sim.state.function == Function.Twinkle
+        assert sim.state.brightness == 40
+        assert sim.state.clock is not None
+
+        await dev.control(Function.Chasing, 70, 80)
+        assert sim.state.on is True
+        assert sim.state.function == Function.Chasing
+        assert sim.state.brightness == 70
+        assert sim.state.flash_speed == 80
+
+        await dev.timer(3, True, True, 12, 30, Function.Steady, Repeat.Weekend)
+        assert sim.state.timers[3] == message.timer(
+            3, True, True, 12, 30, Function.Steady, [Repeat.Weekend], 70
+        )
+        assert sim.stats.received == 7
+        assert sim.stats.rejected == 0
+
+    assert not sim.is_connected
+
+    # Messages are ignored with the wrong password
+    sim = adapter.add("f8:dc:f0:2a:d3:01", password="654321")
+    async with device.Device(sim.ble_device, client_factory=adapter.client):
+        assert sim.state.on is False
+        assert sim.stats.rejected == 4
+
+    # Unknown device
+    with pytest.raises(BleakError):
+        adapter.client("f8:dc:f0:2a:d3:02")
+
+
+@pytest.mark.asyncio
+@mock.patch("bleak.BleakScanner.find_device_by_address")
+async def test_simulator_never_scans(mock_fdba, monkeypatch):
+    mock_fdba.side_effect = AssertionError("Scanned for a simulated device")
+    monkeypatch.setattr(scanner.scan_cache, "ttl", 0.0)
+    adapter = SimulatedAdapter()
+    sim = adapter.add("f8:dc:f0:2a:d3:01")
+
+    # Neither an expired cache entry nor a failed connection attempt scans
+    connect = sim._connect
+    attempts = []
+
+    async def fail_once(client):
+        attempts.append(client)
+        if len(attempts) == 1:
+            raise BleakError("Connection failed")
+        await connect(client)
+
+    monkeypatch.setattr(sim, "_connect", fail_once)
+    await asyncio.sleep(0.001)
+    dev = device.Device("f8:dc:f0:2a:d3:01", client_factory=adapter.client)
+    await dev.connect()
+    assert len(attempts) == 2
+    assert dev.is_connected
+    await dev.disconnect()
+    mock_fdba.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_simulator_faults():
+    adapter = SimulatedAdapter()
+
+    # Lost writes, acknowledged writes fail
+    sim = adapter.add("f8:dc:f0:2a:d3:01", loss=1.0)
+    async with device.Device(sim.ble_device, client_factory=adapter.client):
+        assert sim.stats.lost == 4
+        assert sim.stats.received == 0
+    dev = device.Device(
+        sim.ble_device, client_factory=adapter.client, write_without_response=True
+    )
+    with pytest.raises(BleakError):
+        await dev.connect()
+    assert sim.stats.lost == 5
+    await dev.disconnect()
+
+    # Lost connection is reconnected
+    supervisor = ReconnectSupervisor(Backoff(initial=0.001))
+    sim = adapter.add("f8:dc:f0:2a:d3:02")
+    async with device.Device(
+        sim.ble_device, client_factory=adapter.client, supervisor=supervisor
+    ) as dev:
+        sim.state.clock = datetime(2000, 1, 1)
+        sim.power_cycle()
+        assert not dev.is_connected
+        for _ in range(100):
+            await asyncio.sleep(0.001)
+            if dev.is_connected and sim.state.clock:
+                break
+        assert dev.is_connected
+        assert sim.stats.connects == 2
+        assert sim.stats.disconnects == 1
+        assert sim.state.clock.year > 2000
@@ -0,0 +1,143 @@
+"""Tests for the store module."""
+
+import asyncio
+
+import pytest
+
+from aiokonstsmide import TimerSetting, device, message
+from aiokonstsmide.simulator import SimulatedAdapter
+from aiokonstsmide.store import DeviceState, FileStateStore, StateStore
+
+TIMER = message.Timer(
+    2, True, False, 22, 30, message.Function.Keep, (message.Repeat.Weekend,), 100
+)
+
+
+def test_state_store():
+    store = StateStore()
+    state = DeviceState(True, message.Function.Chasing, 30, 40)
+    store.save("f8:dc:f0:2a:d3:01", state)
+    assert store.load("F8:DC:F0:2A:D3:01") == state
+    store.remove("f8:dc:f0:2a:d3:01")
+    assert store.load("f8:dc:f0:2a:d3:01") is None
+
+
+def test_file_state_store(tmp_path):
+    path = tmp_path / "state.kst"
+    states = {
+        "F8:DC:F0:2A:D3:01": DeviceState(
+            False,
+            message.Function.Twinkle,
+            0,
+            100,
+            (None, None, TIMER) + (None,) * 5,
+            1700000000.5,
+        ),
+        "F8:DC:F0:2A:D3:02": DeviceState(True, message.Function.Steady, 100, 50),
+    }
+    store = FileStateStore(path)
+    assert store.load("f8:dc:f0:2a:d3:01") is None
+    for address, state in states.items():
+        # Written immediately without an event loop
+        store.save(address, state)
+    assert path.exists()
+
+    store = FileStateStore(path)
+    for address, state in states.items():
+        assert store.load(address) == state
+    assert not list(tmp_path.glob(".tmp-state-*"))
+
+    # Invalid files are ignored
+    path.write_bytes(path.read_bytes()[:-3])
+    assert FileStateStore(path).load("f8:dc:f0:2a:d3:02") is None
+    path.write_bytes(b"invalid")
+    assert FileStateStore(path).load("f8:dc:f0:2a:d3:02") is None
+
+    with pytest.raises(ValueError):
+        FileStateStore(path, delay=-1)
+
+
+@pytest.mark.asyncio
+async def test_file_state_store_delayed(tmp_path):
+    path = tmp_path / "state.kst"
+    store = FileStateStore(path, delay=0.01)
+    for brightness in range(10):
+        store.save(
+            "f8:dc:f0:2a:d3:01",
+            DeviceState(True, message.Function.Steady, brightness, 50),
+        )
+    assert not path.exists()
+    await asyncio.sleep(0.05)
+    assert FileStateStore(path).load("f8:dc:f0:2a:d3:01").brightness == 9
+
+    # Pending changes are written by flush
+    store.remove("f8:dc:f0:2a:d3:01")
+    store.flush()
+    assert FileStateStore(path).load("f8:dc:f0:2a:d3:01") is None
+    await asyncio.sleep(0.05)
+    assert FileStateStore(path).load("f8:dc:f0:2a:d3:01") is None
+
+
+@pytest.mark.asyncio
+async def test_device_store(tmp_path):
+    path = tmp_path / "state.kst"
+    adapter = SimulatedAdapter()
+    sim = adapter.add("f8:dc:f0:2a:d3:01")
+    timers = [
+        None,
+        None,
+        TimerSetting(False, 22, 30, repeat=message.Repeat.Weekend),
+        # Restored in a different order
+        TimerSetting(
+            True, 7, 0, repeat=[message.Repeat.Wednesday, message.Repeat.Monday]
+        ),
+    ]
+
+    store = FileStateStore(path)
+    async with device.Device(
+        sim.ble_device, client_factory=adapter.client, store=store, rtc_interval=3600
+    ) as dev:
+        assert await dev.set_timers(timers) == list(range(8))
+        assert await dev.set_timers(timers) == []
+        await dev.control(message.Function.Chasing, 30, 40)
+    store.flush()
+
+    # A restarted process skips the status, time and timer synchronization
+    sent = len(sim.frames)
+    store = FileStateStore(path)
+    async with device.Device(
+        sim.ble_device,
+        function=message.Function.Chasing,
+        brightness=30,
+        flash_speed=40,
+        client_factory=adapter.client,
+        store=store,
+        rtc_interval=3600,
+    ) as dev:
+        assert await dev.set_timers(timers) == []
+        assert len(sim.frames) == sent + 1
+        assert message.parse(sim.frames[-1]) == message.PasswordInput("123456")
+
+    # A different desired status is synchronized
+    store = FileStateStore(path)
+    async with device.Device(
+        sim.ble_device, client_factory=adapter.client, store=store, rtc_interval=3600
+    ):
+        assert sim.state.function == message.Function.Steady
+        assert sim.state.brightness == 100
+    store.flush()
+
+
+@pytest.mark.asyncio
+async def test_file_state_store_write_error(tmp_path, caplog):
+    path = tmp_path / "missing" / "state.kst"
+    store = FileStateStore(path, delay=0.01)
+    state = DeviceState(True, message.Function.Steady, 50, 50)
+    store.save("f8:dc:f0:2a:d3:01", state)
+    await asyncio.sleep(0.05)
+    assert "Failed to write state file" in caplog.text
+
+    # The changes are still pending
+    path.parent.mkdir()
+    store.flush()
+    assert FileStateStore(path).load("f8:dc:f0:2a:d3:01") == state